@@ -0,0 +1,202 @@
+###############################################################################
+##  `generators.py`                                                          ##
+##                                                                           ##
+##  Purpose: Generates synthetic inputs for benchmarks & tests (Gmail       ##
+##           message payloads, product pages w/ embedded item JSON, price    ##
+##           histories) & fake Gmail API objects                             ##
+###############################################################################
+
+
+import json
+import base64
+import random
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+
+PRODUCT_WORDS = [
+    "Organic", "Honeycrisp", "Apples", "Whole", "Milk", "Sourdough", "Bread", "Large", "Eggs", "Cheddar",
+    "Cheese", "Greek", "Yogurt", "Baby", "Spinach", "Roma", "Tomatoes", "Chicken", "Breast", "Pasta",
+]
+SIZES = ["8 oz", "12 oz", "16 oz", "1 lb", "2 lb", "1 gal", "12 ct", "6 pk"]
+START_DATE = datetime(2023, 1, 1, 9, 0, 0)
+
+
+def make_product_names(count, seed=0):
+    # Unique, realistic-ish names (e.g. "Organic Whole Milk 1 gal #12")
+    rng = random.Random(seed)
+    return [f"{' '.join(rng.sample(PRODUCT_WORDS, rng.randint(2, 4)))} {rng.choice(SIZES)} #{i}" for i in range(count)]
+
+
+def encode(text):
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("utf-8")
+
+
+def make_receipt_html(items):
+    blocks = []
+    for i, item in enumerate(items):
+        blocks.append(f"""
+        <tr><td>
+          <!--ITEM IMAGE-->
+          <a href="https://shop.example.com/item/{item.get("id", i)}"><img src="img{i}.png"/></a>
+        </td></tr>
+        <tr><td class="copy"><a href="https://shop.example.com/item/{item.get("id", i)}">{item["name"]}</a></td></tr>
+        <tr><td>
+          <!--IF SHOW QTY-->
+          <table><tr><td class="copy">Qty: {item["quantity"]}</td></tr></table>
+        </td></tr>
+        <tr><td>
+          <!--IF SHOW PRICE-->
+          <table><tr><td class="price-mobile">{item["price"]}</td></tr></table>
+        </td></tr>
+        <tr><td>
+          <!--IF SHOW PRICE-->
+          <table><tr><td class="price-mobile">{item["price"]}</td></tr></table>
+        </td></tr>""")
+
+    footer = '<tr><td class="copy"><a href="https://shop.example.com">shop.example.com</a></td></tr>'
+    return f"<html><body><table>{''.join(blocks)}{footer}</table></body></html>"
+
+
+def make_receipt_plain(items):
+    lines = ["Thanks for your order!", "", "Order Items"]
+    for item in items:
+        price = "0.00" if item["price"] == "FREE" else item["price"].lstrip("$")
+        lines.append(f"{item['quantity']} x {item['name']} - {price}")
+    return "\n".join(lines + ["", "Total"])
+
+
+def make_receipt_email(email_id, items, internal_date=1735740000000):
+    # Same shape as Gmail API's messages.get (w/ EMAIL_FIELDS mask)
+    return {
+        "id": email_id,
+        "internalDate": str(internal_date),
+        "payload": {
+            "parts": [
+                {"mimeType": "text/plain", "body": {"data": encode(make_receipt_plain(items))}},
+                {"mimeType": "text/html", "body": {"data": encode(make_receipt_html(items))}},
+            ]
+        },
+    }
+
+
+def make_receipt_emails(num_emails, items_per_email=8, num_products=200, seed=0):
+    rng = random.Random(seed)
+    names = make_product_names(num_products, seed)
+    emails = []
+
+    for i in range(num_emails):
+        items = []
+        for product_id in rng.sample(range(num_products), min(items_per_email, num_products)):
+            # Free promo items are named as such in real receipts
+            free = rng.random() < 0.05
+            items.append({
+                "id": product_id,
+                "name": f"Promo {names[product_id]}" if free else names[product_id],
+                "price": "FREE" if free else f"${rng.uniform(0.5, 30):.2f}",
+                "quantity": rng.randint(1, 3),
+            })
+
+        internal_date = int((START_DATE + timedelta(days=i)).timestamp() * 1000)
+        emails.append(make_receipt_email(f"msg{i:07d}", items, internal_date))
+
+    return emails
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeBatch:
+    # Stands in for googleapiclient BatchHttpRequest (runs callbacks on
+    # execute), optionally recording each batch's size
+    def __init__(self, callback, sizes=None):
+        self.callback = callback
+        self.requests = []
+        self.sizes = sizes
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        if self.sizes is not None:
+            self.sizes.append(len(self.requests))
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class FakeGmailService:
+    # Just enough of Gmail API's service object for fetch_email(s) & listing
+    def __init__(self, emails):
+        self.emails = {email["id"]: email for email in emails}
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId="me", id=None, **kwargs):
+        return FakeRequest(self.emails[id])
+
+    def list(self, **kwargs):
+        # Gmail lists newest first
+        return FakeRequest({"messages": [{"id": ID} for ID in reversed(list(self.emails))]})
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(callback)
+
+
+def make_item_json(item_id, name, price):
+    return {
+        "__typename": "Item",
+        "usItemId": str(item_id),
+        "name": name,
+        "imageInfo": {"thumbnailUrl": f"https://img.example.com/{item_id}.jpg"},
+        "priceInfo": {"currentPrice": {"price": price, "priceString": "each"}},
+        "badges": {"flags": [{"__typename": "BaseBadge", "text": "Popular pick"}]},
+    }
+
+
+def make_product_page(product_name, num_items=40, filler_kb=300, seed=0):
+    # Page w/ tracked product somewhere among related items, plus markup noise
+    rng = random.Random(seed)
+    names = make_product_names(num_items - 1, seed + 1)
+    names.insert(rng.randrange(num_items), product_name)
+
+    items = [make_item_json(i, name, f"${rng.uniform(0.5, 30):.2f}") for i, name in enumerate(names)]
+    state = {"props": {"pageProps": {"initialData": {"contentLayout": {"modules": [
+        {"__typename": "Module", "config": {"products": items}}
+    ]}}}}}
+    script = json.dumps(state, separators=(",", ":"))
+    filler = "<div class=\"promo\">" + "lorem ipsum " * (filler_kb * 1024 // 12) + "</div>"
+
+    return f"<html><head><title>{product_name}</title></head><body>{filler}<script id=\"__NEXT_DATA__\">{script}</script></body></html>"
+
+
+def make_price_history(num_rows, num_products=1000, quantity=False, seed=0):
+    # Daily-ish observations per product, w/ occasional price changes
+    rng = np.random.default_rng(seed)
+    names = np.array(make_product_names(num_products, seed))
+
+    name_idx = rng.integers(0, num_products, num_rows)
+    minutes = np.sort(rng.integers(0, 3 * 365 * 24 * 60, num_rows))
+    base_prices = rng.uniform(1, 30, num_products)
+    jitter = np.where(rng.random(num_rows) < 0.3, rng.normal(0, 0.1, num_rows), 0)
+    prices = np.round(base_prices[name_idx] * (1 + jitter), 2).clip(0.01)
+
+    history = pd.DataFrame({
+        "timestamp": (pd.Timestamp(START_DATE) + pd.to_timedelta(minutes, unit="m")).strftime("%Y-%m-%d %H:%M:%S"),
+        "name": names[name_idx],
+        "price": [f"${price:.2f}" for price in prices],
+    })
+
+    if quantity:
+        history.insert(2, "quantity", rng.integers(1, 4, num_rows))
+
+    return history
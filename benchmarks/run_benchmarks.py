@@ -0,0 +1,397 @@
+###############################################################################
+##  `run_benchmarks.py`                                                      ##
+##                                                                           ##
+##  Purpose: Times pipeline hot paths offline (fake Gmail service, local     ##
+##           pages, synthetic histories) & writes results as JSON, so runs   ##
+##           can be diffed across versions                                   ##
+###############################################################################
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from functools import partial
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.generators import (
+    make_receipt_emails, make_receipt_html, make_product_names, make_product_page, make_price_history,
+    FakeGmailService
+)
+
+
+SIZES = {
+    "smoke": {"emails": 20, "receipt_items": 50, "pages": 3, "history_rows": [1_000], "batch": 20, "repeat": 1},
+    "small": {"emails": 200, "receipt_items": 200, "pages": 20, "history_rows": [10_000], "batch": 200, "repeat": 3},
+    "medium": {"emails": 1_000, "receipt_items": 500, "pages": 50, "history_rows": [10_000, 100_000], "batch": 500, "repeat": 3},
+    "large": {"emails": 5_000, "receipt_items": 1_000, "pages": 100, "history_rows": [10_000, 100_000, 1_000_000], "batch": 1_000, "repeat": 3},
+}
+
+# Pipeline settings for offline runs (env is read once, at first import of src)
+BENCH_ENV = {
+    "STORAGE_BACKEND": "csv",
+    "FETCH_STRATEGY": "browser",
+    "DISPLAY_REBUILD_HOURS": "-1",
+    "PARSE_WORKERS": "1",
+}
+
+
+# Modules each subcommand imports lazily (on top of src.main), for cold start
+# import timings
+COMMAND_IMPORTS = {
+    "ingest": ["src.parser", "src.scraper", "src.tracker"],
+    "track": ["src.utils.data_utils", "src.tracker"],
+    "scrape": ["src.scraper"],
+    "report": ["pandas", "src.utils.price_utils", "src.utils.data_utils", "src.tracker"],
+    "migrate": ["src.utils.data_utils"],
+    "history": ["src.utils.price_utils", "src.utils.index_utils"],
+}
+IMPORT_TIME_TOP = 5
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_call(fn, repeat, setup=None):
+    # Best & mean of `repeat` runs (setup isn't timed, & its result is passed in)
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+
+    return {"best_s": round(min(timings), 6), "mean_s": round(sum(timings) / len(timings), 6), "repeat": repeat}
+
+
+def fake_shorten_url(url):
+    # Offline stand-in for TinyURL
+    return f"https://tinyurl.com/{abs(hash(url)) % 10**8:08d}"
+
+
+def reset_data_dir(data_dir):
+    shutil.rmtree(data_dir, ignore_errors=True)
+    os.makedirs(data_dir)
+
+
+def bench_parse_emails(size, repeat, data_dir):
+    from src.parser import parse_emails
+    import src.utils.data_utils as data_utils
+    import src.utils.url_utils as url_utils
+
+    data_utils.shorten_urls = partial(url_utils.shorten_urls, shortener=fake_shorten_url)
+    emails = make_receipt_emails(size["emails"])
+    service = FakeGmailService(emails)
+    email_IDs = [email["id"] for email in reversed(emails)]
+
+    def setup():
+        # Cold run: no CSVs, dedup keys, watermarks or cached short URLs yet
+        reset_data_dir(data_dir)
+        data_utils._dedup_indexes.clear()
+        url_utils._url_caches.clear()
+        return ()
+
+    result = time_call(lambda: parse_emails(service, email_IDs), repeat, setup)
+    return {f"parse_emails[emails={size['emails']}]": result}
+
+
+def bench_extract_receipt_items(size, repeat):
+    from src.parser import get_item_names_URLs_prices_quantities, HTML_PARSER_BACKENDS
+
+    items = [{"name": name, "price": "$1.00", "quantity": 1} for name in make_product_names(size["receipt_items"])]
+    html_body = make_receipt_html(items)
+
+    results = {}
+    for backend in HTML_PARSER_BACKENDS:
+        fn = partial(get_item_names_URLs_prices_quantities, html_body, backend)
+        results[f"get_item_names_URLs_prices_quantities[backend={backend},items={size['receipt_items']}]"] = time_call(fn, repeat)
+
+    return results
+
+
+def bench_scrape_page_find_match(size, repeat):
+    import src.scraper as scraper
+    import src.utils.match_utils as match_utils
+
+    names = make_product_names(size["pages"], seed=7)
+    pages = {f"https://shop.example.com/ip/{i}": make_product_page(name, seed=i) for i, name in enumerate(names)}
+    scraper.get_page_source = lambda url, pool=None: pages[url]
+
+    def scrape_all():
+        return [scraper.scrape_page(url) for url in pages]
+
+    candidates = [results for _, results in scrape_all()]
+
+    def match_all():
+        for results, name in zip(candidates, names):
+            scraper.find_match(results, name)
+
+    def cold_cache():
+        match_utils._match_cache = {}
+        return ()
+
+    return {
+        f"scrape_page[pages={len(pages)}]": time_call(scrape_all, repeat),
+        f"find_match[pages={len(pages)},cold]": time_call(match_all, repeat, cold_cache),
+        f"find_match[pages={len(pages)},memoized]": time_call(match_all, repeat),
+    }
+
+
+def bench_calculate_price_deltas(size, repeat):
+    from src.tracker import calculate_price_deltas
+
+    results = {}
+    for rows in size["history_rows"]:
+        history = make_price_history(rows)
+        history["timestamp"] = pd.to_datetime(history["timestamp"])
+        results[f"calculate_price_deltas[rows={rows}]"] = time_call(calculate_price_deltas, repeat, lambda: (history.copy(),))
+
+    return results
+
+
+def bench_price_index(size, repeat, num_queries=1_000):
+    from src.utils.price_utils import to_cents
+    from src.utils.index_utils import PriceIndex
+
+    results = {}
+    for rows in size["history_rows"]:
+        history = make_price_history(rows)
+        history["price"] = to_cents(history["price"])
+        results[f"price_index_build[rows={rows}]"] = time_call(PriceIndex.from_frame, repeat, lambda: (history,))
+
+        index = PriceIndex.from_frame(history)
+        sample = history.sample(num_queries, replace=True, random_state=0)
+        queries = list(zip(sample["name"], pd.to_datetime(sample["timestamp"]).to_numpy()))
+
+        def query_all():
+            for name, when in queries:
+                index.price_at(name, when)
+                index.min_over(name, end=when)
+
+        results[f"price_index_query[rows={rows},queries={num_queries}]"] = time_call(query_all, repeat)
+
+    return results
+
+
+def make_new_batch(history, batch_size, columns):
+    # Newer observations for products already in history
+    batch = history.drop_duplicates(subset=["name"]).head(batch_size).copy()
+    latest = pd.to_datetime(history["timestamp"]).max()
+    batch["timestamp"] = (latest + pd.Timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    return batch[columns]
+
+
+def snapshot(files, snapshot_dir):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for i, path in enumerate(files):
+        if os.path.exists(path):
+            shutil.copy(path, os.path.join(snapshot_dir, str(i)))
+
+
+def restore(files, snapshot_dir):
+    for i, path in enumerate(files):
+        saved = os.path.join(snapshot_dir, str(i))
+        if os.path.exists(saved):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copy(saved, path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def bench_track_prices(size, repeat, data_dir):
+    from src.tracker import track_prices
+    from src.parser import PURCHASES_COLUMNS
+    from src.utils.data_utils import PURCHASES_FILE, PRICE_TRACKER_FILE, PRICE_TRACKER_DATA_FILE, PRICE_TRACKER_STATE_FILE
+
+    tracked_files = [PURCHASES_FILE, PRICE_TRACKER_FILE, PRICE_TRACKER_DATA_FILE, PRICE_TRACKER_STATE_FILE]
+    snapshot_dir = os.path.join(os.path.dirname(data_dir), "snapshot_tracker")
+    results = {}
+
+    for rows in size["history_rows"]:
+        purchases = make_price_history(rows, quantity=True)
+        purchases["email_id"] = [f"msg{i:07d}" for i in range(rows)]
+        purchases["date"], purchases["time"], purchases["url"] = "", "", ""
+        batch = make_new_batch(purchases, size["batch"], PURCHASES_COLUMNS)
+
+        def setup_full():
+            reset_data_dir(data_dir)
+            purchases[PURCHASES_COLUMNS].to_csv(PURCHASES_FILE, index=False)
+            return ()
+
+        all_items = purchases[["timestamp", "name"]].to_dict(orient="records")
+        results[f"track_prices[rows={rows},full]"] = time_call(lambda: track_prices(all_items, incremental=False), repeat, setup_full)
+        snapshot(tracked_files, snapshot_dir)
+
+        def setup_incremental():
+            restore(tracked_files, snapshot_dir)
+            batch.to_csv(PURCHASES_FILE, mode="a", header=False, index=False)
+            return ()
+
+        batch_items = batch[["timestamp", "name"]].to_dict(orient="records")
+        results[f"track_prices[rows={rows},batch={len(batch)}]"] = time_call(lambda: track_prices(batch_items), repeat, setup_incremental)
+
+    return results
+
+
+def bench_track_scraped(size, repeat, data_dir):
+    from src.scraper import track_scraped
+    from src.utils.data_utils import PRICE_SCRAPER_LOG_FILE, PRICE_SCRAPER_STATE_FILE
+
+    tracked_files = [PRICE_SCRAPER_LOG_FILE, PRICE_SCRAPER_STATE_FILE]
+    snapshot_dir = os.path.join(os.path.dirname(data_dir), "snapshot_scraper")
+    columns = ["timestamp", "name", "matching_name", "price"]
+    results = {}
+
+    for rows in size["history_rows"]:
+        history = make_price_history(rows)
+        history["matching_name"] = history["name"]
+        history_items = history[columns].to_dict(orient="records")
+        batch_items = make_new_batch(history, size["batch"], columns).to_dict(orient="records")
+
+        results[f"track_scraped[rows={rows},full]"] = time_call(
+            lambda: track_scraped(history_items), repeat, lambda: reset_data_dir(data_dir) or ()
+        )
+        snapshot(tracked_files, snapshot_dir)
+
+        results[f"track_scraped[rows={rows},batch={len(batch_items)}]"] = time_call(
+            lambda: track_scraped(batch_items), repeat, lambda: restore(tracked_files, snapshot_dir) or ()
+        )
+
+    return results
+
+
+def read_import_times(code):
+    # Self time (us) of each module imported by a fresh interpreter running
+    # `code` (from `-X importtime` log on stderr)
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    ).stderr
+
+    import_times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        import_times[name.strip()] = int(self_us)
+    return import_times
+
+
+def bench_import_time(repeat):
+    # Cold start import cost of src.main & of each subcommand on top of it
+    # (interpreter's own startup imports left out)
+    startup = set(read_import_times("pass"))
+    targets = {"import_time[src.main]": ["src.main"]}
+    targets.update({
+        f"import_time[command={command}]": ["src.main", *modules] for command, modules in COMMAND_IMPORTS.items()
+    })
+
+    results = {}
+    for name, modules in targets.items():
+        runs = []
+        for _ in range(repeat):
+            import_times = read_import_times("; ".join(f"import {module}" for module in modules))
+            runs.append({module: us for module, us in import_times.items() if module not in startup})
+
+        totals = [sum(run.values()) / 1e6 for run in runs]
+        best_run = runs[totals.index(min(totals))]
+        slowest = sorted(best_run.items(), key=lambda item: item[1], reverse=True)[:IMPORT_TIME_TOP]
+
+        results[name] = {
+            "best_s": round(min(totals), 6), "mean_s": round(sum(totals) / len(totals), 6), "repeat": repeat,
+            "modules": len(best_run), "slowest_self_s": [[module, round(us / 1e6, 6)] for module, us in slowest],
+        }
+
+    return results
+
+
+def get_git_version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(size_name, repeat=None):
+    size = SIZES[size_name]
+    repeat = repeat or size["repeat"]
+
+    work_dir = tempfile.mkdtemp(prefix="price-tracker-bench-")
+    data_dir = os.path.join(work_dir, "data")
+
+    # Must happen before anything from src is imported (paths are set at import)
+    if "src.config" in sys.modules:
+        raise ValueError("Error, benchmarks must run before src is imported")
+    os.environ.update({**BENCH_ENV, "ABSOLUTE_PATH_PREFIX": work_dir})
+
+    try:
+        results = {}
+        results.update(bench_import_time(repeat))
+        results.update(bench_parse_emails(size, repeat, data_dir))
+        results.update(bench_extract_receipt_items(size, repeat))
+        results.update(bench_scrape_page_find_match(size, repeat))
+        results.update(bench_calculate_price_deltas(size, repeat))
+        results.update(bench_price_index(size, repeat))
+        results.update(bench_track_prices(size, repeat, data_dir))
+        results.update(bench_track_scraped(size, repeat, data_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "version": get_git_version(),
+            "size": size_name,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare_results(old, new):
+    # Ratio > 1 means new run is slower
+    lines = []
+    for name, result in new["results"].items():
+        old_result = old["results"].get(name)
+        ratio = f"{result['best_s'] / old_result['best_s']:.2f}x" if old_result and old_result["best_s"] else "new"
+        lines.append(f"{name:<80} {result['best_s']:>10.4f}s  {ratio}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Run offline pipeline benchmarks")
+    arg_parser.add_argument("--size", choices=list(SIZES), default="small")
+    arg_parser.add_argument("--repeat", type=int, help="runs per benchmark (best & mean reported)")
+    arg_parser.add_argument("--output", help="write results JSON here")
+    arg_parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = arg_parser.parse_args(argv)
+
+    report = run_benchmarks(args.size, args.repeat)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, mode="w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+    old = {"results": {}}
+    if args.compare:
+        with open(args.compare) as file:
+            old = json.load(file)
+    print(compare_results(old, report))
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,13 @@
 import os
 import sys
 import time
-import requests
 import subprocess
 from datetime import datetime
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from dotenv import dotenv_values
+
+from src.utils.metrics_utils import timed
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -31,78 +34,394 @@ def format_date_time(timestamp):
         return timestamp, timestamp
 
 
-def shorten_url(url):
-    # Utilize TinyURL to condense link
-    api_url = f"http://tinyurl.com/api-create.php?url={url}"
-    response = requests.get(api_url)
+TINYURL_API_URL = "http://tinyurl.com/api-create.php"
+
+
+@timed()
+def shorten_url(url, api_url=TINYURL_API_URL):
+    # Utilize TinyURL to condense link (requests imported here, since it's
+    # slow to import & most commands never shorten anything)
+    import requests
+
+    try:
+        response = requests.get(api_url, params={"url": url}, timeout=15)
+    except requests.RequestException as error:
+        print(f"Warning: Could not shorten {url}: {error}")
+        return None
+
     return response.text if response.status_code == 200 else None
 
 
+@dataclass(frozen=True)
+class Settings:
+    # Email filter
+    gmail_from: Optional[str]
+    gmail_subject: Optional[str]
+
+    # Site access & test params
+    ip: Optional[str]
+    port: Optional[str]
+    main_url: Optional[str]
+    test_url: Optional[str]
+    test_name: Optional[str]
+    test_params: Tuple[Optional[str], ...]
+
+    absolute_path_prefix: Optional[str]
+
+    # Storage
+    storage_backend: str
+    sqlite_db_file: str
+    display_rebuild_hours: float
+
+    # Scraping
+    driver_max_pages: int
+    scrape_workers: int
+    scrape_tabs: int
+    scrape_host_rate: float
+    scrape_host_burst: int
+    fetch_strategy: str
+    scrape_schedule: str
+    scrape_min_hours: float
+    scrape_max_hours: float
+
+    # Short URL cache
+    url_cache_max_entries: int
+    url_cache_ttl_days: Optional[float]
+    url_shorten_workers: int
+
+    # Receipt parsing
+    parse_workers: int
+    parse_chunk_size: int
+
+    # Rolling-window price stats
+    rolling_window_points: int
+    rolling_window_days: float
+    ewma_alpha: float
+    rolling_percentile: float
+
+    # Price alerts
+    alert_rules_file: str
+    alert_notifier: str
+    alert_log_file: str
+    alert_max_age_hours: float
+    twilio_account_sid: Optional[str]
+    twilio_auth_token: Optional[str]
+    twilio_from_number: Optional[str]
+    twilio_to_number: Optional[str]
+
+    # Run instrumentation
+    metrics_enabled: bool
+    metrics_file: str
+    metrics_prometheus_file: Optional[str]
+
+
+_settings = None
+
+
+def parse_settings(env):
+    # Parse & validate everything in one go (raises on first bad value)
+    storage_backend = env.get("STORAGE_BACKEND", "csv").lower()
+    if storage_backend not in ("csv", "sqlite"):
+        raise ValueError("STORAGE_BACKEND must be either 'csv' or 'sqlite' in .env")
+
+    fetch_strategy = env.get("FETCH_STRATEGY", "auto").lower()
+    if fetch_strategy not in ("auto", "browser"):
+        raise ValueError("FETCH_STRATEGY must be either 'auto' or 'browser' in .env")
+
+    scrape_schedule = env.get("SCRAPE_SCHEDULE", "adaptive").lower()
+    if scrape_schedule not in ("adaptive", "all"):
+        raise ValueError("SCRAPE_SCHEDULE must be either 'adaptive' or 'all' in .env")
+
+    try:
+        driver_max_pages = int(env.get("DRIVER_MAX_PAGES", "50"))
+    except ValueError:
+        raise ValueError("DRIVER_MAX_PAGES must be an integer in .env")
+
+    try:
+        scrape_workers = int(env.get("SCRAPE_WORKERS", "1"))
+    except ValueError:
+        raise ValueError("SCRAPE_WORKERS must be an integer in .env")
+    if scrape_workers < 1:
+        raise ValueError("SCRAPE_WORKERS must be at least 1")
+
+    # Tabs = pages in flight per browser, rate = per-host requests per second
+    # w/ allowed burst (default 1 every 5 secs, since plain HTTP fetches have
+    # no browser pauses; 0 = no limit)
+    try:
+        scrape_tabs = int(env.get("SCRAPE_TABS", "1"))
+        scrape_host_rate = float(env.get("SCRAPE_HOST_RATE", "0.2"))
+        scrape_host_burst = int(env.get("SCRAPE_HOST_BURST", "1"))
+    except ValueError:
+        raise ValueError("SCRAPE_TABS, SCRAPE_HOST_RATE, SCRAPE_HOST_BURST must be numbers in .env")
+    if scrape_tabs < 1 or scrape_host_rate < 0 or scrape_host_burst < 1:
+        raise ValueError("SCRAPE_TABS & SCRAPE_HOST_BURST must be at least 1, SCRAPE_HOST_RATE not negative")
+
+    try:
+        scrape_min_hours = float(env.get("SCRAPE_MIN_HOURS", "6"))
+        scrape_max_hours = float(env.get("SCRAPE_MAX_HOURS", "168"))
+    except ValueError:
+        raise ValueError("SCRAPE_MIN_HOURS and SCRAPE_MAX_HOURS must be numbers in .env")
+    if scrape_min_hours < 0 or scrape_max_hours < scrape_min_hours:
+        raise ValueError("SCRAPE_MIN_HOURS must not be negative or above SCRAPE_MAX_HOURS")
+
+    # TTL is optional, in days
+    try:
+        url_cache_max_entries = int(env.get("URL_CACHE_MAX_ENTRIES", "10000"))
+        url_shorten_workers = int(env.get("URL_SHORTEN_WORKERS", "8"))
+        ttl_days_env = env.get("URL_CACHE_TTL_DAYS")
+        url_cache_ttl_days = float(ttl_days_env) if ttl_days_env else None
+    except ValueError:
+        raise ValueError("URL_CACHE_MAX_ENTRIES, URL_CACHE_TTL_DAYS, URL_SHORTEN_WORKERS must be numbers in .env")
+
+    try:
+        parse_workers = int(env.get("PARSE_WORKERS", "1"))
+        parse_chunk_size = int(env.get("PARSE_CHUNK_SIZE", "8"))
+    except ValueError:
+        raise ValueError("PARSE_WORKERS and PARSE_CHUNK_SIZE must be integers in .env")
+    if parse_workers < 1 or parse_chunk_size < 1:
+        raise ValueError("PARSE_WORKERS and PARSE_CHUNK_SIZE must be at least 1")
+
+    # Hours between display CSV rebuilds (0 = every run, negative = only on request)
+    try:
+        display_rebuild_hours = float(env.get("DISPLAY_REBUILD_HOURS", "24"))
+    except ValueError:
+        raise ValueError("DISPLAY_REBUILD_HOURS must be a number in .env")
+
+    # Windows: last N points & last N days (for each product's price history)
+    try:
+        rolling_window_points = int(env.get("ROLLING_WINDOW_POINTS", "5"))
+        rolling_window_days = float(env.get("ROLLING_WINDOW_DAYS", "30"))
+        ewma_alpha = float(env.get("EWMA_ALPHA", "0.3"))
+        rolling_percentile = float(env.get("ROLLING_PERCENTILE", "50"))
+    except ValueError:
+        raise ValueError("ROLLING_WINDOW_POINTS, ROLLING_WINDOW_DAYS, EWMA_ALPHA, ROLLING_PERCENTILE must be numbers in .env")
+    if rolling_window_points < 1 or rolling_window_days <= 0:
+        raise ValueError("ROLLING_WINDOW_POINTS must be at least 1 and ROLLING_WINDOW_DAYS above 0")
+    if not 0 < ewma_alpha <= 1 or not 0 <= rolling_percentile <= 100:
+        raise ValueError("EWMA_ALPHA must be in (0, 1] and ROLLING_PERCENTILE in [0, 100]")
+
+    # "local" = append to alert log only, "twilio" = also text them
+    alert_notifier = env.get("ALERT_NOTIFIER", "local").lower()
+    if alert_notifier not in ("local", "twilio"):
+        raise ValueError("ALERT_NOTIFIER must be either 'local' or 'twilio' in .env")
+
+    twilio_keys = ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_FROM_NUMBER", "TWILIO_TO_NUMBER")
+    if alert_notifier == "twilio" and not all(env.get(key) for key in twilio_keys):
+        raise ValueError("TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER, TWILIO_TO_NUMBER must be set in .env when ALERT_NOTIFIER=twilio")
+
+    try:
+        alert_max_age_hours = float(env.get("ALERT_MAX_AGE_HOURS", "48"))
+    except ValueError:
+        raise ValueError("ALERT_MAX_AGE_HOURS must be a number in .env")
+
+    metrics_env = env.get("METRICS", "0").lower()
+    if metrics_env not in ("0", "1", "false", "true", "no", "yes", "off", "on"):
+        raise ValueError("METRICS must be either on (1/true/yes) or off (0/false/no) in .env")
+
+    return Settings(
+        gmail_from=env.get("GMAIL_FROM"),
+        gmail_subject=env.get("GMAIL_SUBJECT"),
+        ip=env.get("IP"),
+        port=env.get("PORT"),
+        main_url=env.get("MAIN_URL"),
+        test_url=env.get("TEST_URL"),
+        test_name=env.get("TEST_NAME"),
+        test_params=tuple(env.get(f"TEST_PARAM_{i}") for i in range(1, 5)),
+        absolute_path_prefix=env.get("ABSOLUTE_PATH_PREFIX"),
+        storage_backend=storage_backend,
+        sqlite_db_file=env.get("SQLITE_DB_FILE", "data/price_tracker.db"),
+        display_rebuild_hours=display_rebuild_hours,
+        driver_max_pages=driver_max_pages,
+        scrape_workers=scrape_workers,
+        scrape_tabs=scrape_tabs,
+        scrape_host_rate=scrape_host_rate,
+        scrape_host_burst=scrape_host_burst,
+        fetch_strategy=fetch_strategy,
+        scrape_schedule=scrape_schedule,
+        scrape_min_hours=scrape_min_hours,
+        scrape_max_hours=scrape_max_hours,
+        url_cache_max_entries=url_cache_max_entries,
+        url_cache_ttl_days=url_cache_ttl_days,
+        url_shorten_workers=url_shorten_workers,
+        parse_workers=parse_workers,
+        parse_chunk_size=parse_chunk_size,
+        rolling_window_points=rolling_window_points,
+        rolling_window_days=rolling_window_days,
+        ewma_alpha=ewma_alpha,
+        rolling_percentile=rolling_percentile,
+        alert_rules_file=env.get("ALERT_RULES_FILE", "data/alert_rules.json"),
+        alert_notifier=alert_notifier,
+        alert_log_file=env.get("ALERT_LOG_FILE", "data/alerts/alerts.jsonl"),
+        alert_max_age_hours=alert_max_age_hours,
+        twilio_account_sid=env.get("TWILIO_ACCOUNT_SID"),
+        twilio_auth_token=env.get("TWILIO_AUTH_TOKEN"),
+        twilio_from_number=env.get("TWILIO_FROM_NUMBER"),
+        twilio_to_number=env.get("TWILIO_TO_NUMBER"),
+        metrics_enabled=metrics_env in ("1", "true", "yes", "on"),
+        metrics_file=env.get("METRICS_FILE", "data/metrics/last_run.json"),
+        metrics_prometheus_file=env.get("METRICS_PROMETHEUS_FILE") or None,
+    )
+
+
+def load_settings():
+    # Real environment wins over .env (same as load_dotenv)
+    env = {key: value for key, value in dotenv_values().items() if value is not None}
+    env.update(os.environ)
+    return parse_settings(env)
+
+
+def get_settings():
+    # Parsed once per process, then shared
+    global _settings
+
+    if _settings is None:
+        _settings = load_settings()
+
+    return _settings
+
+
+def reload_settings():
+    # Explicitly re-read .env & environment (e.g. after changing either)
+    global _settings
+
+    _settings = load_settings()
+    return _settings
+
+
 def load_email_vars():
     # Load email filter parameters
-    load_dotenv()
+    settings = get_settings()
 
-    from_env = os.getenv("GMAIL_FROM")
-    subject_env = os.getenv("GMAIL_SUBJECT")
-
-    if not from_env and subject_env:
+    if not settings.gmail_from and settings.gmail_subject:
         raise ValueError("GMAIL_FROM and GMAIL_SUBJECT must be set in .env to filter")
 
-    return from_env, subject_env
+    return settings.gmail_from, settings.gmail_subject
 
 
 def load_IP_vars():
     # Load IP & port parameters
-    load_dotenv()
-
-    ip_env = os.getenv("IP")
-    port_env = os.getenv("PORT")
-    main_url_env = os.getenv("MAIN_URL")
+    settings = get_settings()
 
-    if not ip_env and port_env and main_url_env:
+    if not settings.ip and settings.port and settings.main_url:
         raise ValueError("IP, PORT, MAIN_URL must be set in .env to query site")
 
-    return ip_env, port_env, main_url_env
+    return settings.ip, settings.port, settings.main_url
     
 
 def load_test_URL_vars():
     # Load test URL & name parameters
-    load_dotenv()
-
-    test_url_env = os.getenv("TEST_URL")
-    test_name_env = os.getenv("TEST_NAME")
+    settings = get_settings()
 
-    if not test_url_env and test_name_env:
+    if not settings.test_url and settings.test_name:
         raise ValueError("TEST_URL and TEST_NAME must be set in .env to query site")
 
-    return test_url_env, test_name_env
+    return settings.test_url, settings.test_name
 
 
 def load_test_param_vars():
     # Load test parameter vars
-    load_dotenv()
+    test_param_1, test_param_2, test_param_3, test_param_4 = get_settings().test_params
 
-    test_param_1_env = os.getenv("TEST_PARAM_1")
-    test_param_2_env = os.getenv("TEST_PARAM_2")
-    test_param_3_env = os.getenv("TEST_PARAM_3")
-    test_param_4_env = os.getenv("TEST_PARAM_4")
-
-    if not test_param_1_env and test_param_2_env and test_param_3_env and test_param_4_env:
+    if not test_param_1 and test_param_2 and test_param_3 and test_param_4:
         raise ValueError("TEST_PARAMS_ 1, 2, 3, 4 must be set in .env")
 
-    return test_param_1_env, test_param_2_env, test_param_3_env, test_param_4_env
+    return test_param_1, test_param_2, test_param_3, test_param_4
+
+
+def load_storage_vars():
+    # Load storage backend parameters ("csv" by default)
+    settings = get_settings()
+    return settings.storage_backend, settings.sqlite_db_file
+
+
+def load_driver_pool_vars():
+    # Load WebDriver session pool parameters (pages before session recycle)
+    return get_settings().driver_max_pages
+
+
+def load_scrape_vars():
+    # Load number of parallel scrape workers (one browser instance each)
+    return get_settings().scrape_workers
+
+
+def load_pacing_vars():
+    # Load scrape pacing parameters: tabs (pages in flight per browser), &
+    # per-host request rate (per second, 0 = no limit) w/ allowed burst
+    settings = get_settings()
+    return settings.scrape_tabs, settings.scrape_host_rate, settings.scrape_host_burst
+
+
+def load_fetch_vars():
+    # Load page fetch strategy ("auto" = plain HTTP first, browser fallback)
+    return get_settings().fetch_strategy
+
+
+def load_schedule_vars():
+    # Load scrape scheduling parameters ("adaptive" = only items due, based on
+    # price history; "all" = every item, every run) w/ bounds on check interval
+    settings = get_settings()
+    return settings.scrape_schedule, settings.scrape_min_hours, settings.scrape_max_hours
+
+
+def load_url_cache_vars():
+    # Load short URL cache parameters (TTL is optional, in days)
+    settings = get_settings()
+    return settings.url_cache_max_entries, settings.url_cache_ttl_days, settings.url_shorten_workers
+
+
+def load_parse_vars():
+    # Load receipt parsing pool parameters (1 worker = parse in sequence)
+    settings = get_settings()
+    return settings.parse_workers, settings.parse_chunk_size
+
+
+def load_display_rebuild_vars():
+    # Load how often (in hours) sorted display CSVs get rebuilt from logs
+    # (0 = every run, negative = only when explicitly requested)
+    return get_settings().display_rebuild_hours
+
+
+def load_rolling_vars():
+    # Load rolling-window stat parameters: window sizes (points & days), EWMA
+    # smoothing factor, & percentile (50 = median) over point window
+    settings = get_settings()
+    return settings.rolling_window_points, settings.rolling_window_days, settings.ewma_alpha, settings.rolling_percentile
+
+
+def load_alert_vars():
+    # Load price alert parameters: rules file, notifier ("local" / "twilio"),
+    # local alert log, & how recent a price point must be to alert on
+    settings = get_settings()
+    return settings.alert_rules_file, settings.alert_notifier, settings.alert_log_file, settings.alert_max_age_hours
+
+
+def load_twilio_vars():
+    # Load Twilio SMS parameters (only needed when ALERT_NOTIFIER=twilio)
+    settings = get_settings()
+    twilio_vars = (
+        settings.twilio_account_sid, settings.twilio_auth_token, settings.twilio_from_number, settings.twilio_to_number
+    )
+
+    if not all(twilio_vars):
+        raise ValueError("TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER, TWILIO_TO_NUMBER must be set in .env")
+
+    return twilio_vars
+
+
+def load_metrics_vars():
+    # Load run instrumentation parameters (off by default; Prometheus optional)
+    settings = get_settings()
+    return settings.metrics_enabled, settings.metrics_file, settings.metrics_prometheus_file
 
 
 def load_absolute_path_prefix():
     # Load absolute path for cron job
-    load_dotenv()
-
-    absolute_path_env = os.getenv("ABSOLUTE_PATH_PREFIX")
+    absolute_path = get_settings().absolute_path_prefix
 
-    if not absolute_path_env:
+    if not absolute_path:
         raise ValueError("ABSOLUTE_PATH_PREFIX must be set in .env")
 
-    return absolute_path_env
+    return absolute_path
 
 
 def add_path_prefix(specific_file_path):
@@ -113,14 +432,19 @@ def add_path_prefix(specific_file_path):
     return os.path.join(path_prefix, specific_file_path).rstrip("/")
 
 
-def launch_chrome():
-    # Launch Chrome as independent process 
+CHROME_DEBUG_PORT = 9222
+CHROME_PROFILE_DIR = "/tmp/chrome-debug-new{instance}"
+
+
+def launch_chrome(port=CHROME_DEBUG_PORT, instance=1, wait=True):
+    # Launch Chrome as independent process (each instance gets its own
+    # debug port & profile, so several can run side by side)
     subprocess.Popen([
-        # -g flag to open in background (specific to macOS)
-        "open", "-g", "-a", "Google Chrome", 
+        # -g flag to open in background, -n for new instance (specific to macOS)
+        "open", "-g", "-n", "-a", "Google Chrome", 
         "--args",
-        "--remote-debugging-port=9222",
-        "--user-data-dir=/tmp/chrome-debug-new1",
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={CHROME_PROFILE_DIR.format(instance=instance)}",
         "--disable-gpu",
         "--disable-webrtc",
         "--disable-software-rasterizer",
@@ -132,6 +456,14 @@ def launch_chrome():
         "--log-level=3"
     ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)  
 
+    if wait:
+        time.sleep(5)
+
+
+def launch_chromes(ports):
+    # Start all instances first, then wait once for them to come up
+    for instance, port in enumerate(ports, start=1):
+        launch_chrome(port, instance, wait=False)
     time.sleep(5)
 
 
@@ -1,35 +1,183 @@
 ###############################################################################
 ##  `main.py`                                                                ##
 ##                                                                           ##
-##  Purpose: Orchestrate functionality at a high level                       ##
+##  Purpose: Orchestrate functionality at a high level (subcommands only     ##
+##           import the stages they need, to keep cron runs fast to start)   ##
 ###############################################################################
 
 
-from src.parser import check_emails # Message / text parsing logic
-from src.tracker import track_prices # Price trend analysis logic
-from src.scraper import update_log, scrape # Web scraping logic
-
+import sys
+import argparse
 from datetime import datetime
 
-from src.config import TIMESTAMP_FORMAT
-
+from src.config import TIMESTAMP_FORMAT, load_metrics_vars, add_path_prefix
+from src.utils.metrics_utils import enable_metrics, span, write_metrics
 
-def main():
-    print("\n\n")
-    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
-    print(f"Logged results as of timestamp { {timestamp} } : ")
 
+def ingest(track=True):
+    # Message / text parsing logic
+    from src.parser import check_emails
+    from src.scraper import update_log
 
     new_items = check_emails()
     if new_items:
         update_log(new_items)
-        track_prices(new_items)
+        if track:
+            track_new(new_items)
+
+    return new_items
+
+
+def track_new(items, incremental=True):
+    # Price trend analysis logic
+    from src.tracker import track_prices
+    track_prices(items, incremental)
+
+
+def track(full=False):
+    # Catch tracker up w/ everything in purchases file (or recompute it all)
+    from src.utils.data_utils import csv_exists, read_purchases_prices_csv, PURCHASES_FILE
+
+    if not csv_exists(PURCHASES_FILE):
+        print("No purchases to track yet.")
+        return
+
+    items = read_purchases_prices_csv(PURCHASES_FILE, ["timestamp", "name"])
+    track_new(items.to_dict(orient="records"), incremental=not full)
+
+
+def scrape(workers=None):
+    # Web scraping logic
+    from src.scraper import scrape as run_scrape
+    run_scrape(workers)
+
+
+def report():
+    # Rebuild sorted display files from logs, then show latest scraped prices
+    import pandas as pd
+    from src.utils.price_utils import format_cents, format_percent
+    from src.utils.data_utils import (
+        csv_exists, build_display_csv, read_purchases_prices_csv,
+        PRICE_SCRAPER_LOG_FILE, PRICE_SCRAPER_FILE
+    )
+
+    # Tracker display is otherwise only rebuilt once stale
+    from src.tracker import build_price_tracker_display
+    build_price_tracker_display(force=True)
+
+    if not csv_exists(PRICE_SCRAPER_LOG_FILE):
+        print("No scraped prices to report yet.")
+        return
+
+    build_display_csv(PRICE_SCRAPER_LOG_FILE, PRICE_SCRAPER_FILE)
+
+    scraped = read_purchases_prices_csv(PRICE_SCRAPER_LOG_FILE, ["timestamp", "name", "price", "percent_change"])
+    scraped["timestamp"] = pd.to_datetime(scraped["timestamp"])
+    latest = scraped.sort_values(by="timestamp", kind="stable").groupby("name").tail(1).sort_values(by="name")
+
+    latest["price"] = format_cents(latest["price"])
+    latest["percent_change"] = format_percent(latest["percent_change"])
+
+    for row in latest.itertuples(index=False):
+        print(f"{row.name}: {row.price} ({row.percent_change}) as of {row.timestamp:%Y-%m-%d}")
+
+
+def history(name, source="scraper", at=None, days=90, last=5):
+    # Point-in-time / range lookups for one product (via in-memory index)
+    from datetime import timedelta
+    from src.utils.price_utils import format_cents
+    from src.utils.index_utils import get_price_index
 
+    index = get_price_index(source)
+    if name not in index:
+        print(f"No {source} price history for '{name}'.")
+        return
+
+    if at:
+        print(f"{name} on {at}: {format_cents([index.price_at(name, at)])[0]}")
+
+    since = datetime.now() - timedelta(days=days)
+    lowest = index.min_over(name, start=since)
+    if lowest:
+        print(f"Lowest in last {days} days: {format_cents([lowest[1]])[0]} on {str(lowest[0])[:10]}")
+
+    timestamps, prices = index.last_n(name, last)
+    for timestamp, price in zip(timestamps, format_cents(prices)):
+        print(f"  {str(timestamp).replace('T', ' ')}  {price}")
+
+
+def migrate():
+    from src.utils.data_utils import migrate_to_sqlite
+    migrate_to_sqlite()
+
+
+def run():
+    # Full pipeline (what cron runs by default)
+    ingest()
     scrape()
 
-    
 
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(prog="price-tracker", description="Track purchase & scraped prices")
+    subparsers = arg_parser.add_subparsers(dest="command")
 
-if __name__ == "__main__":
-    main()
+    subparsers.add_parser("run", help="ingest new emails, track, then scrape (default)")
+
+    ingest_parser = subparsers.add_parser("ingest", help="log new purchases from emails")
+    ingest_parser.add_argument("--no-track", action="store_true", help="skip tracking new purchases")
+
+    track_parser = subparsers.add_parser("track", help="track prices for all logged purchases")
+    track_parser.add_argument("--full", action="store_true", help="recompute instead of catching up")
+
+    scrape_parser = subparsers.add_parser("scrape", help="scrape current prices for tracked items")
+    scrape_parser.add_argument("--workers", type=int, help="browser instances (default: SCRAPE_WORKERS)")
+
+    subparsers.add_parser("report", help="rebuild display files & show latest prices")
+    subparsers.add_parser("migrate", help="move CSV data into SQLite")
 
+    history_parser = subparsers.add_parser("history", help="look up a product's price history")
+    history_parser.add_argument("name", help="product name (as tracked)")
+    history_parser.add_argument("--source", choices=["scraper", "tracker"], default="scraper")
+    history_parser.add_argument("--at", help="price in effect at this date / time")
+    history_parser.add_argument("--days", type=int, default=90, help="window for lowest price")
+    history_parser.add_argument("--last", type=int, default=5, help="most recent points to show")
+
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    print("\n\n")
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    print(f"Logged results as of timestamp { {timestamp} } : ")
+
+    # Per-stage timings & counters (only collected when METRICS is on)
+    metrics_on, metrics_file, prometheus_file = load_metrics_vars()
+    if metrics_on:
+        enable_metrics()
+
+    try:
+        with span(f"command:{args.command or 'run'}"):
+            if args.command == "ingest":
+                ingest(track=not args.no_track)
+            elif args.command == "track":
+                track(full=args.full)
+            elif args.command == "scrape":
+                scrape(args.workers)
+            elif args.command == "report":
+                report()
+            elif args.command == "migrate":
+                migrate()
+            elif args.command == "history":
+                history(args.name, args.source, args.at, args.days, args.last)
+            else:
+                run()
+    finally:
+        if metrics_on:
+            write_metrics(add_path_prefix(metrics_file), prometheus_file and add_path_prefix(prometheus_file))
+            print(f"Run metrics written to {metrics_file}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -10,22 +10,41 @@
 import re
 import pytz
 import base64
+from multiprocessing import Pool
 from xml.dom import ValidationErr
 from datetime import datetime
-from bs4 import BeautifulSoup, Comment
+from lxml import etree, html as lxml_html
+from bs4 import BeautifulSoup, Comment, Tag
 
-from src.config import TIMESTAMP_FORMAT
+from src.config import load_parse_vars, TIMESTAMP_FORMAT
+from src.utils.metrics_utils import timed, increment, metrics_enabled, merge_metrics, run_worker_task
 
 from src.utils.email_utils import (
-    connect_to_gmail, fetch_email_IDs, fetch_email 
+    connect_to_gmail, fetch_email_IDs, fetch_email, fetch_emails,
+    GMAIL_BATCH_SIZE, EMAIL_FIELDS
 )
 from src.utils.data_utils import (
     csv_exists, get_latest_date, append_to_purchases_free_promo_csv,
     PURCHASES_FILE, FREE_PROMO_FILE
 )
+from src.utils.url_utils import save_url_caches
 
 PURCHASES_COLUMNS = ["email_id", "timestamp", "date", "time", "name", "quantity", "price", "url"]
 
+# BeautifulSoup tree builders ("lxml", "html.parser"), or "lxml-etree" to 
+# skip BeautifulSoup entirely & walk lxml's own tree (fastest)
+HTML_PARSER_BACKENDS = ("lxml", "html.parser", "lxml-etree")
+HTML_PARSER_BACKEND = "lxml-etree"
+
+# Markers (HTML comments) that precede each item detail in receipts
+ITEM_IMAGE_MARKER = "ITEM IMAGE"
+ITEM_PRICE_MARKER = "IF SHOW PRICE"
+ITEM_QTY_MARKER = "IF SHOW QTY"
+
+COMMENT_PARENT_TAGS = ("td", "tr", "div")
+
+LXML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
 
 def get_email_timestamp(email, timezone="America/New_York"):
     internal_date = email.get("internalDate", None)
@@ -153,13 +172,119 @@ def extract_item_quantities(soup):
     return quantities
 
 
-def get_item_names_URLs_prices_quantities(html_body):
-    soup = BeautifulSoup(html_body, "html.parser")
+def parse_quantity(qty_text):
+    return int(qty_text.replace("Qty: ", "")) if "Qty: " in qty_text else 1
+
+
+# Same rules as the extract_item_* functions above, but collects names,
+# URLs, prices, & quantities in one walk over the soup (document order)
+def extract_items_single_pass(soup):
+    names, URLs, prices, quantities = [], [], [], []
+
+    for node in soup.descendants:
+        if isinstance(node, Comment):
+            if ITEM_IMAGE_MARKER in node:
+                parent = node.find_parent(COMMENT_PARENT_TAGS)
+                item_link = parent.find("a", href=True) if parent else None
+                if item_link:
+                    URLs.append(item_link["href"])
+
+            if ITEM_PRICE_MARKER in node:
+                parent = node.find_parent(COMMENT_PARENT_TAGS)
+                item_price = parent.find("td", class_="price-mobile") if parent else None
+                if item_price:
+                    prices.append(item_price.get_text(strip=True))
+
+            if ITEM_QTY_MARKER in node:
+                parent = node.find_parent(COMMENT_PARENT_TAGS)
+                qty_td = parent.find("td", class_="copy") if parent else None
+                if qty_td:
+                    quantities.append(parse_quantity(qty_td.get_text(strip=True)))
+
+        elif isinstance(node, Tag) and node.name == "td" and "copy" in node.get("class", []):
+            name_link = node.find("a")
+            if name_link:
+                name_text = name_link.text.strip()
+                if name_text and ".com" not in name_text:
+                    names.append(name_text)
+
+    # Each price is embedded twice (item price & order summary)
+    return names, URLs, prices[::2], quantities
+
+
+def lxml_text(element, strip=False):
+    # Match BeautifulSoup's .text / .get_text(strip=True) (comments skipped)
+    if strip:
+        return "".join(text.strip() for text in element.itertext())
+    return "".join(element.itertext())
+
+
+def lxml_has_class(element, class_name):
+    return class_name in (element.get("class") or "").split()
+
+
+def lxml_find_parent(node):
+    for parent in node.iterancestors(*COMMENT_PARENT_TAGS):
+        return parent
+    return None
+
+
+def lxml_find(parent, tag, class_name=None, attr=None):
+    for element in parent.iterdescendants(tag):
+        if class_name and not lxml_has_class(element, class_name):
+            continue
+        if attr and element.get(attr) is None:
+            continue
+        return element
+    return None
+
 
-    names = extract_item_names(soup)
-    URLs = extract_item_URLs(soup)
-    prices = extract_item_prices(soup)
-    quantities = extract_item_quantities(soup)
+# Same single pass, but over lxml's tree directly (no BeautifulSoup objects)
+def extract_items_single_pass_lxml(root):
+    names, URLs, prices, quantities = [], [], [], []
+
+    for node in root.iter():
+        if node.tag is etree.Comment:
+            comment = node.text or ""
+
+            if ITEM_IMAGE_MARKER in comment:
+                parent = lxml_find_parent(node)
+                item_link = lxml_find(parent, "a", attr="href") if parent is not None else None
+                if item_link is not None:
+                    URLs.append(item_link.get("href"))
+
+            if ITEM_PRICE_MARKER in comment:
+                parent = lxml_find_parent(node)
+                item_price = lxml_find(parent, "td", class_name="price-mobile") if parent is not None else None
+                if item_price is not None:
+                    prices.append(lxml_text(item_price, strip=True))
+
+            if ITEM_QTY_MARKER in comment:
+                parent = lxml_find_parent(node)
+                qty_td = lxml_find(parent, "td", class_name="copy") if parent is not None else None
+                if qty_td is not None:
+                    quantities.append(parse_quantity(lxml_text(qty_td, strip=True)))
+
+        elif node.tag == "td" and lxml_has_class(node, "copy"):
+            name_link = lxml_find(node, "a")
+            if name_link is not None:
+                name_text = lxml_text(name_link).strip()
+                if name_text and ".com" not in name_text:
+                    names.append(name_text)
+
+    return names, URLs, prices[::2], quantities
+
+
+def get_item_names_URLs_prices_quantities(html_body, backend=HTML_PARSER_BACKEND):
+    if backend not in HTML_PARSER_BACKENDS:
+        raise ValueError(f"Error, unknown HTML parser backend {backend}")
+
+    if backend == "lxml-etree":
+        root = lxml_html.document_fromstring(html_body.encode("utf-8"), parser=LXML_PARSER)
+        names, URLs, prices, quantities = extract_items_single_pass_lxml(root)
+    else:
+        soup = BeautifulSoup(html_body, backend)
+        names, URLs, prices, quantities = extract_items_single_pass(soup)
 
     # Zip all item info into dicts
     items = [
@@ -229,6 +354,7 @@ def validate_HTML_with_plaintext(html_items, plain_items):
     return html_set == plain_set
 
 
+@timed()
 def get_items(email):
     payload = get_email_body(email)
     html_body, plain_body = payload["html"], payload["plain"]
@@ -247,6 +373,7 @@ def get_items(email):
     }
 
 
+@timed()
 def check_emails():
     mail = connect_to_gmail()
     latest_purchase, latest_free_promo = "", ""
@@ -268,37 +395,90 @@ def check_emails():
         return parse_emails(mail, email_IDs)
 
 
-def parse_emails(mail, email_IDs):
-    new_items = []
+def iter_email_batches(mail, email_IDs, batch_size=GMAIL_BATCH_SIZE):
+    # Fetch emails in batches (keeping order), retrying any failed ones solo
+    for start in range(0, len(email_IDs), batch_size):
+        batch_IDs = email_IDs[start:start + batch_size]
+        emails = []
 
-    # Read & append emails from oldest to newest
-    for ID in email_IDs[::-1]:
-        email = fetch_email(mail, ID)
+        for ID, email in zip(batch_IDs, fetch_emails(mail, batch_IDs, batch_size)):
+            if email is None:
+                email = fetch_email(mail, ID, fields=EMAIL_FIELDS)
+            if email is None:
+                print(f"Skipping email {ID}: could not fetch")
+                continue
 
-        email_ID = email.get("id", "Unknown ID")
-        timestamp = get_email_timestamp(email)
+            emails.append(email)
 
-        items = get_items(email)
-        
-        if items["purchases"]:
-            email_data = {
-                "id": email_ID,
-                "timestamp": timestamp,
-                "items": items["purchases"]
-            }
-            curr_items = append_to_purchases_free_promo_csv(PURCHASES_FILE, email_data)
-            new_items.extend(curr_items)
-
-        if items["free_promo"]:
-            email_data = {
-                "id": email_ID,
-                "timestamp": timestamp,
-                "items": items["free_promo"]
-            }
-            append_to_purchases_free_promo_csv(FREE_PROMO_FILE, email_data)
+        yield emails
+
+
+def get_items_worker(args):
+    email, metrics_on = args
+    return run_worker_task(get_items, email, metrics_on=metrics_on)
+
+
+def parse_email_items(emails, pool=None, chunk_size=1):
+    # Parse receipts across pool workers (if any); imap keeps input order
+    if pool is None:
+        return [get_items(email) for email in emails]
+
+    # Workers hand back each email's metrics too (else pool parsing's timings
+    # never reach the run's totals)
+    args = [(email, metrics_enabled()) for email in emails]
+    items_list = []
+    for items, metrics in pool.imap(get_items_worker, args, chunksize=chunk_size):
+        merge_metrics(metrics)
+        items_list.append(items)
+    return items_list
+
+
+def parse_emails(mail, email_IDs, workers=None, chunk_size=None):
+    default_workers, default_chunk_size = load_parse_vars()
+    workers = workers or default_workers
+    chunk_size = chunk_size or default_chunk_size
+
+    pool = Pool(workers) if workers > 1 else None
+    new_items = []
+
+    try:
+        # Read & append emails from oldest to newest
+        for emails in iter_email_batches(mail, email_IDs[::-1]):
+            parsed = parse_email_items(emails, pool, chunk_size)
+            increment("emails_parsed", len(emails))
+
+            for email, items in zip(emails, parsed):
+                new_items.extend(log_email_items(email, items))
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+        # Short URLs resolved so far kept even if a batch failed
+        save_url_caches()
 
     # Flag whether any new email items to track 
     return new_items   
-        
 
 
+def log_email_items(email, items):
+    email_ID = email.get("id", "Unknown ID")
+    timestamp = get_email_timestamp(email)
+    curr_items = []
+
+    if items["purchases"]:
+        email_data = {
+            "id": email_ID,
+            "timestamp": timestamp,
+            "items": items["purchases"]
+        }
+        curr_items = append_to_purchases_free_promo_csv(PURCHASES_FILE, email_data)
+
+    if items["free_promo"]:
+        email_data = {
+            "id": email_ID,
+            "timestamp": timestamp,
+            "items": items["free_promo"]
+        }
+        append_to_purchases_free_promo_csv(FREE_PROMO_FILE, email_data)
+
+    return curr_items
@@ -7,33 +7,57 @@
 ###############################################################################
 
 
-import re
-import json
 import time
 import random
+import asyncio
+from functools import partial
 
 import pandas as pd
-from rapidfuzz import fuzz
 from datetime import datetime
 
 from multiprocessing import Pool
-from selenium import webdriver
-from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
 
-from src.tracker import calculate_price_deltas
+from src.tracker import (
+    calculate_price_deltas_numeric, calculate_price_deltas_incremental, build_price_state
+)
 
 from src.config import (
-    load_IP_vars, load_test_param_vars, add_path_prefix, launch_chrome, close_chrome, clear_cache_and_hard_reload,
-    TIMESTAMP_FORMAT, TIMESTAMP_DATE_FORMAT,
+    load_IP_vars, load_test_param_vars, load_driver_pool_vars, load_scrape_vars, load_pacing_vars, load_fetch_vars, load_schedule_vars, 
+    load_rolling_vars, 
+    launch_chromes, close_chrome, clear_cache_and_hard_reload,
+    TIMESTAMP_FORMAT,
 )
 
 from src.utils.data_utils import (
-    csv_exists, make_dir, read_purchases_prices_csv, read_unique_items_csv, update_price_tracker_scraper_csv,
-    UNIQUE_ITEMS_FILE, PRICE_SCRAPER_FILE
+    csv_exists, read_purchases_prices_csv, read_unique_items_csv, update_price_tracker_scraper_csv, 
+    append_to_price_log_csv, build_display_csv, display_csv_is_stale, convert_price_csv_to_cents,
+    UNIQUE_ITEMS_FILE, PRICE_SCRAPER_FILE, PRICE_SCRAPER_LOG_FILE, PRICE_SCRAPER_STATE_FILE
+)
+from src.utils.state_utils import read_state, write_state
+from src.utils.price_utils import to_cents, parse_display_prices, ROLLING_COLUMNS
+from src.utils.index_utils import refresh_price_index
+from src.utils.snapshot_utils import write_snapshot, compact_snapshots, migrate_legacy_snapshots
+from src.utils.alert_utils import check_alerts
+from src.utils.rolling_utils import rolling_state_matches
+from src.utils.metrics_utils import timed, increment, metrics_enabled, merge_metrics, run_worker_task
+from src.utils.browser_utils import DriverPool
+from src.utils.pacing_utils import HostPacer, run_paced
+from src.utils.fetch_utils import fetch_page_source, collect_fetch_state, merge_fetch_state, save_fetch_state
+from src.utils.extract_utils import extract_items, ITEM_DATA_MARKER
+from src.utils.match_utils import find_matches, collect_match_cache, merge_match_cache, save_match_cache
+from src.utils.schedule_utils import (
+    record_page_fingerprint, collect_page_fingerprints, merge_page_fingerprints, save_page_fingerprints, 
+    select_due_items, update_scrape_schedule
 )
 
 UNIQUE_ITEMS_COLUMNS = ["name", "url"]
 SCRAPED_COLUMNS_BRIEF = ["timestamp", "name", "matching_name", "price"]
+SCRAPED_COLUMNS_FULL = [
+    "timestamp", "name", "matching_name", "price", 
+    "prev_price", "price_change", "percent_change", "avg_price", "diff_from_avg", *ROLLING_COLUMNS
+]
 
 
 def update_log(items):
@@ -53,108 +77,188 @@ def update_log(items):
     update_price_tracker_scraper_csv(UNIQUE_ITEMS_FILE, unique_items)
 
 
-def track_scraped(items):
-    new_scraped = pd.DataFrame(items)
-
-    # If we already have scraped data, combine updated with unchanged
-    if csv_exists(PRICE_SCRAPER_FILE):
-        prev_scraped = read_purchases_prices_csv(PRICE_SCRAPER_FILE, SCRAPED_COLUMNS_BRIEF)
-        all_scraped = pd.concat([prev_scraped, new_scraped], ignore_index=True)
+def seed_price_scraper_log():
+    # One-time: start append-only log from existing (sorted, formatted) scraper
+    # file, or upgrade a log written before prices were stored as cents (only
+    # 1st rows get checked once log is already typed)
+    if csv_exists(PRICE_SCRAPER_LOG_FILE):
+        convert_price_csv_to_cents(PRICE_SCRAPER_LOG_FILE)
+        return
+    if not csv_exists(PRICE_SCRAPER_FILE):
+        return
+
+    print(f"Seeding {PRICE_SCRAPER_LOG_FILE} from {PRICE_SCRAPER_FILE}...")
+    prev_tracked = pd.read_csv(PRICE_SCRAPER_FILE, dtype=str, keep_default_na=False).replace("", None)
+    prev_tracked = parse_display_prices(prev_tracked).sort_values(by="timestamp", kind="stable")
+    append_to_price_log_csv(PRICE_SCRAPER_LOG_FILE, prev_tracked.reindex(columns=SCRAPED_COLUMNS_FULL))
+
+
+def build_price_scraper_display(force=False):
+    # Sorted display file gets rebuilt from log lazily (see DISPLAY_REBUILD_HOURS)
+    if not csv_exists(PRICE_SCRAPER_LOG_FILE):
+        return
+    if force or display_csv_is_stale(PRICE_SCRAPER_FILE):
+        build_display_csv(PRICE_SCRAPER_LOG_FILE, PRICE_SCRAPER_FILE)
+
+
+@timed()
+def track_scraped(items, incremental=True):
+    # Skip products that had no matching item on the page
+    new_scraped = pd.DataFrame([item for item in items if item])
+    if new_scraped.empty:
+        print("No scraped items to track.")
+        return
+
+    # Scraped "$x.xx" --> cents, once, on the way in
+    new_scraped["price"] = to_cents(new_scraped["price"])
+
+    seed_price_scraper_log()
+
+    has_scraper_log = csv_exists(PRICE_SCRAPER_LOG_FILE)
+    state = read_state(PRICE_SCRAPER_STATE_FILE) if incremental and has_scraper_log else {}
+
+    # Older saved windows (or other window settings) need one full pass
+    if not rolling_state_matches(state, load_rolling_vars()):
+        state = {}
+
+    if state:
+        # Only new rows need deltas (from each product's last known point),
+        # & they just get appended to log
+        new_tracked, state = calculate_price_deltas_incremental(new_scraped, state)
+        append_to_price_log_csv(PRICE_SCRAPER_LOG_FILE, new_tracked[SCRAPED_COLUMNS_FULL])
+        refresh_price_index("scraper", new_tracked)
+        alert_rows = new_tracked
     else:
-        # No existing file, so just use the new formatted data
-        all_scraped = new_scraped
+        # If we already have scraped data, combine updated with unchanged
+        if has_scraper_log:
+            prev_scraped = read_purchases_prices_csv(PRICE_SCRAPER_LOG_FILE, SCRAPED_COLUMNS_BRIEF)
+            all_scraped = pd.concat([prev_scraped, new_scraped], ignore_index=True)
+        else:
+            # No existing file, so just use the new formatted data
+            all_scraped = new_scraped
+
+        all_scraped["timestamp"] = pd.to_datetime(all_scraped["timestamp"])
+        deltas = calculate_price_deltas_numeric(all_scraped)
+        state = build_price_state(deltas)
+
+        # Full rewrite of log (in time order, as if appended all along)
+        tracked = deltas.sort_values(by="timestamp", kind="stable").reset_index(drop=True)
+        update_price_tracker_scraper_csv(PRICE_SCRAPER_LOG_FILE, tracked[SCRAPED_COLUMNS_FULL])
+        refresh_price_index("scraper", tracked, replace_names=tracked["name"].unique())
+        alert_rows = tracked
+
+    write_state(PRICE_SCRAPER_STATE_FILE, state)
+    build_price_scraper_display()
 
-    tracked_and_formatted = calculate_price_deltas(all_scraped)
+    # Only once everything above is saved (alert problems never undo tracking)
+    check_alerts("scraper", alert_rows)
 
-    tracked_and_formatted = tracked_and_formatted.sort_values(by=["name", "timestamp"], ascending=[True, False]).reset_index(drop=True)
-    update_price_tracker_scraper_csv(PRICE_SCRAPER_FILE, tracked_and_formatted)
 
+    # Raw scraped rows also kept in day-partitioned snapshot store (earlier
+    # dated files moved over 1st, & finished days compacted)
+    migrate_legacy_snapshots()
+    manifest = write_snapshot(new_scraped)
+    compact_snapshots(manifest=manifest)
 
-    # Do the same thing, but export to its own CSV (& don't bother with deltas)
-    curr_date_timestamp = datetime.now().strftime(TIMESTAMP_DATE_FORMAT)
-    PRICE_SCRAPER_FILE_DATED = add_path_prefix(f"data/scraped/scraper_{curr_date_timestamp}.csv")
 
-    # If folder doesn't exist, then create it
-    make_dir(PRICE_SCRAPER_FILE_DATED)
+def create_driver_pool(size=1, port=None):
+    ip, default_port, _ = load_IP_vars()
+    port = default_port if port is None else port
+    return DriverPool(f"{ip}:{port}", size=size, max_pages=load_driver_pool_vars())
 
-    new_scraped_formatted = new_scraped.sort_values(by=["name", "timestamp"], ascending=[True, False]).reset_index(drop=True)
-    update_price_tracker_scraper_csv(PRICE_SCRAPER_FILE_DATED, new_scraped_formatted)
 
+def get_debug_ports(workers):
+    # One debug port per browser instance, counting up from PORT
+    _, port, _ = load_IP_vars()
+    return [int(port) + i for i in range(workers)]
 
-def get_page_source(url):
-    ip, port, main_url = load_IP_vars()
-    address = f"{ip}:{port}"
 
-    # Now set up web driver
-    options = webdriver.ChromeOptions()
-    options.add_experimental_option("debuggerAddress", address)
+def pause(low, high):
+    # Human-like pause (tracked, since it's a big share of scrape time)
+    seconds = random.uniform(low, high)
+    increment("browser_sleep_seconds", seconds)
+    time.sleep(seconds)
 
-    driver = webdriver.Chrome(options=options)
 
-    # 30% of the time, switch things up
-    if random.random() < 0.3:  
-        driver.get(main_url)
-        time.sleep(random.uniform(1.5, 4.5))
+@timed()
+def get_page_source(url, pool=None):
+    _, _, main_url = load_IP_vars()
 
-    driver.get(url)
+    # W/o a pool (e.g. one-off page), use a single-use session
+    if pool is None:
+        with create_driver_pool() as one_off_pool:
+            return get_page_source(url, one_off_pool)
 
-    # Refresh / clean out everything
-    clear_cache_and_hard_reload(driver)
+    # W/ per-host pacing on, pacer sets request rate (so no fixed sleeps)
+    _, host_rate, _ = load_pacing_vars()
+    human_pause = (lambda low, high: None) if host_rate else pause
 
-    driver.execute_script("document.body.style.zoom='100%'") 
-    time.sleep(random.uniform(1, 3))
+    with pool.session() as driver:
+        # 30% of the time, switch things up
+        if random.random() < 0.3:  
+            driver.get(main_url)
+            human_pause(1.5, 4.5)
 
-    actions = ActionChains(driver)
-    actions.move_by_offset(100, 100).perform()
-    time.sleep(random.uniform(1, 3))
+        driver.get(url)
 
-    page_source = driver.page_source
-    driver.quit()
+        # Refresh / clean out everything
+        clear_cache_and_hard_reload(driver)
 
-    return page_source
+        driver.execute_script("document.body.style.zoom='100%'") 
+        human_pause(1, 3)
 
+        # Absolute move (relative offsets would pile up across reused sessions)
+        actions = ActionBuilder(driver)
+        actions.pointer_action.move_to_location(100, 100)
+        actions.perform()
+        human_pause(1, 3)
+
+        return driver.page_source
+
+
+def has_item_data(page_source):
+    return ITEM_DATA_MARKER in page_source
+
+
+@timed()
+def scrape_page(url, pool=None):
+    # Plain HTTP when it works for this domain, otherwise full browser render
+    browser_fetch = partial(get_page_source, pool=pool)
+    if load_fetch_vars() == "auto":
+        page_source = fetch_page_source(url, browser_fetch, has_item_data)
+    else:
+        page_source = browser_fetch(url)
 
-def scrape_page(url):
-    page_source = get_page_source(url)
     _, test_param_2, test_param_3, _ = load_test_param_vars()
 
-    pattern = rf'"__typename":"Item".*?"{test_param_2}":"(.*?)".*?"{test_param_3}":"(\$[\d.]+)"'
-    matches = re.findall(pattern, page_source)
-    
-    # Convert results into structured list of dicts
-    results = [
-        {
-            test_param_2: json.loads(f'"{param_2}"'),  # Decode special chars
-            test_param_3: param_3,
-        }
-        for param_2, param_3 in matches
-    ]
+    # Structured list of dicts, one per embedded item object
+    results = extract_items(page_source, test_param_2, test_param_3)
 
     curr_timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
 
     return curr_timestamp, results
 
 
+@timed()
 def find_match(potential_matches, name):
-    matching_item = None
-    max_match_score = 0
-
-    for item in potential_matches:
-        # Scores 0-100 based on text match (e.g. 85% logical similarity, 90%, etc)
-        similarity_score = fuzz.ratio(item["name"], name)  
-
-        if similarity_score > max_match_score:
-            matching_item = item
-            max_match_score = similarity_score
-
-    return matching_item
+    # Scores 0-100 based on text match (e.g. 85% logical similarity, 90%, etc),
+    # memoized while page's candidate names stay the same
+    return find_matches([name], potential_matches)[0]
 
 
-def ping_url(row):
+def ping_url(row, pool=None):
     name, url = row["name"], row["url"]
     _, _, test_param_3, _ = load_test_param_vars()
 
-    timestamp, results = scrape_page(url)
+    try:
+        timestamp, results = scrape_page(url, pool)
+    except WebDriverException as error:
+        # Session gets recycled by pool, so just move on to next item
+        print(f"Skipping {name}: Browser error ({error.msg})")
+        return None
+
+    # Unchanged page content pushes item's next check further out
+    record_page_fingerprint(name, results)
     matching_item = find_match(results, name)
 
     if not matching_item:
@@ -169,21 +273,99 @@ def ping_url(row):
     }
 
 
-def scrape():
+def collect_scrape_state():
+    # Which fetch strategy works per domain (& HTTP validators), plus matches
+    # per candidate set & page fingerprints
+    return collect_fetch_state(), collect_match_cache(), collect_page_fingerprints()
+
+
+def merge_scrape_state(scrape_state):
+    fetch_state, match_cache, page_fingerprints = scrape_state
+    merge_fetch_state(fetch_state)
+    merge_match_cache(match_cache)
+    merge_page_fingerprints(page_fingerprints)
+
+
+def save_scrape_state():
+    save_fetch_state()
+    save_match_cache()
+    save_page_fingerprints()
+
+
+def scrape_items(rows, port=None, save_state=True):
+    # Scrape rows through one browser (warm sessions for whole batch), w/
+    # several tabs in flight & per-host pacing if configured
+    tabs, host_rate, host_burst = load_pacing_vars()
+
+    with create_driver_pool(size=tabs, port=port) as pool:
+        if tabs == 1 and not host_rate:
+            results = [ping_url(row, pool) for row in rows]
+        else:
+            pacer = HostPacer(host_rate, host_burst) if host_rate else None
+            jobs = [(row["url"], partial(asyncio.to_thread, ping_url, row, pool)) for row in rows]
+            results = asyncio.run(run_paced(jobs, pacer, concurrency=tabs))
+
+    # Workers hand theirs back instead (so only one process writes each file)
+    if save_state:
+        save_scrape_state()
+    return results
+
+
+def scrape_items_worker(args):
+    port, rows, metrics_on = args
+
+    # Worker processes keep their own scrape state & this task's metrics,
+    # handed back w/ results
+    results, metrics = run_worker_task(partial(scrape_items, save_state=False), rows, port, metrics_on=metrics_on)
+    return results, metrics, collect_scrape_state()
+
+
+def scrape_items_parallel(items_list, ports, map_fn=None):
+    # Deal rows out round robin (one share per browser), then put results
+    # back in original row order & save workers' merged scrape state once
+    shares = [items_list[i::len(ports)] for i in range(len(ports))]
+    metrics_on = [metrics_enabled()] * len(ports)
+    share_results = (map_fn or map)(scrape_items_worker, list(zip(ports, shares, metrics_on)))
+
+    latest_batch = [None] * len(items_list)
+    for i, (results, metrics, scrape_state) in enumerate(share_results):
+        latest_batch[i::len(ports)] = results
+        merge_metrics(metrics)
+        merge_scrape_state(scrape_state)
+
+    save_scrape_state()
+    return latest_batch
+
+
+def scrape(workers=None):
     items_df = read_unique_items_csv()
     items_list = items_df.to_dict(orient="records")
 
-    # Launch Chrome before pinging URLs 
-    launch_chrome()
-    
-    latest_batch = []
-    for row in items_list:
-        latest_batch.append(ping_url(row))
+    # Only items due for a check (based on how much their prices move)
+    schedule_mode, min_hours, max_hours = load_schedule_vars()
+    if schedule_mode == "adaptive":
+        total_items = len(items_list)
+        items_list = select_due_items(items_list)
+        print(f"Scraping {len(items_list)} of {total_items} items (rest not due yet).")
 
-    # Close Chrome instance & run calculations for batch
-    close_chrome()
-    track_scraped(latest_batch)
+        if not items_list:
+            return
 
+    workers = min(workers or load_scrape_vars(), max(1, len(items_list)))
+    ports = get_debug_ports(workers)
 
+    # Launch Chrome (one instance per worker) before pinging URLs 
+    launch_chromes(ports)
+    
+    if workers == 1:
+        latest_batch = scrape_items(items_list, ports[0])
+    else:
+        with Pool(workers) as pool:
+            latest_batch = scrape_items_parallel(items_list, ports, pool.map)
 
+    # Close Chrome instance(s) & run calculations for batch
+    close_chrome()
+    track_scraped(latest_batch)
 
+    if schedule_mode == "adaptive":
+        update_scrape_schedule(latest_batch, min_hours, max_hours)
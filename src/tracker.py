@@ -6,91 +6,266 @@
 ###############################################################################
 
 
-import pandas as pd
 import numpy as np
+import pandas as pd
 
+from src.config import TIMESTAMP_FORMAT, load_rolling_vars
+
+from src.utils.state_utils import read_state, write_state
+from src.utils.metrics_utils import timed
+from src.utils.index_utils import refresh_price_index
+from src.utils.alert_utils import check_alerts
+from src.utils.price_utils import to_cents, round_cents, format_prices_for_display, parse_display_prices, PERCENT_DECIMALS, ROLLING_COLUMNS
+from src.utils.rolling_utils import (
+    RollingWindow, calculate_rolling_stats, build_rolling_state, rolling_state_matches, to_epoch_seconds, EWMA_EXACT_COLUMN
+)
 from src.utils.data_utils import (
-    csv_exists, read_purchases_prices_csv, update_price_tracker_scraper_csv,
-    PURCHASES_FILE, PRICE_TRACKER_FILE
+    csv_exists, csv_columns_match, read_purchases_prices_csv, merge_into_price_tracker_scraper_csv, 
+    update_price_tracker_scraper_csv, append_to_price_log_csv, build_display_csv, display_csv_is_stale, PURCHASES_FILE, PRICE_TRACKER_FILE, PRICE_TRACKER_DATA_FILE, PRICE_TRACKER_STATE_FILE
 )
 
 PURCHASES_COLUMNS_BRIEF = ["timestamp", "name", "quantity", "price"]
-PRICES_COLUMNS_ANALYSIS = ["price", "prev_price", "price_change", "percent_change", "avg_price", "diff_from_avg"]
-TRACKER_COLUMNS_FULL = ["timestamp", "name", "quantity", "price", "prev_price", "price_change", "percent_change", "avg_price", "diff_from_avg"]
-
-
-def format_price(price):
-    return f"${price:,.2f}" if pd.notna(price) else "N/A"
-
-
-def format_percentage(percentage):
-    return f"{percentage:,.2f}%" if pd.notna(percentage) else "N/A"
+TRACKER_COLUMNS_FULL = [
+    "timestamp", "name", "quantity", "price", "prev_price", "price_change", "percent_change", "avg_price", "diff_from_avg", 
+    *ROLLING_COLUMNS
+]
 
 
 def format_price_log_for_display(price_log):
     # Restore $ sign, % sign, etc only for export/display
-    price_log_display = price_log.copy()
+    return format_prices_for_display(price_log)
 
-    for col in PRICES_COLUMNS_ANALYSIS:
-        if col == "percent_change":
-            price_log_display[col] = price_log_display[col].apply(format_percentage)
-        else:
-            price_log_display[col] = price_log_display[col].apply(format_price)
 
-    return price_log_display
+def calculate_percent_change(price_change, prev_price):
+    percent_change = price_change.astype(float) / prev_price.astype(float) * 100
+    return percent_change.round(PERCENT_DECIMALS)
 
 
-def calculate_price_deltas(items):
-    items = items.sort_values(by=["name", "timestamp"])
+@timed()
+def calculate_price_deltas_numeric(items, rolling_config=None):
+    rolling_config = rolling_config or load_rolling_vars()
+
+    items["timestamp"] = pd.to_datetime(items["timestamp"])
+    items = items.sort_values(by=["name", "timestamp"], kind="stable")
   
-    # Remove $ sign & convert prices to float for math
-    items["price"] = items["price"].replace(r"[\$,]", "", regex=True).astype(float)
+    # All price math in integer cents
+    items["price"] = to_cents(items["price"])
 
     items["prev_price"] = items.groupby("name")["price"].shift(1) 
-    items["prev_price"] = items["prev_price"].fillna(np.nan)
 
     items["price_change"] = items["price"] - items["prev_price"] 
-    items["percent_change"] = (items["price_change"] / items["prev_price"]) * 100
+    items["percent_change"] = calculate_percent_change(items["price_change"], items["prev_price"])
 
     # Track rolling average (mean up until & including curr row, i.e.
     # disregard any future purchases, only focus on avg until this point)
-    items["avg_price"] = (
-        items.groupby("name")["price"]
+    avg_prices = (
+        items["price"].astype(float)
+        .groupby(items["name"])
         .expanding()
         .mean()
         .reset_index(level=0, drop=True)
     )
-    items["diff_from_avg"] = items["price"] - items["avg_price"] 
+    items["avg_price"] = round_cents(avg_prices)
+    items["diff_from_avg"] = round_cents(items["price"].astype(float) - avg_prices)
+
+    # Windowed stats (N points / N days, EWMA, percentile)
+    items[ROLLING_COLUMNS + [EWMA_EXACT_COLUMN]] = calculate_rolling_stats(items, rolling_config)
     
-    return format_price_log_for_display(items)
+    return items
 
 
-def track_prices(items):
-    new_items = pd.DataFrame(items)
-    
-    # Automatically create datetime instances from CSV for sorting
-    all_purchases = read_purchases_prices_csv(PURCHASES_FILE, PURCHASES_COLUMNS_BRIEF)
-    items_to_update = all_purchases[all_purchases["name"].isin(new_items["name"])].copy()
+@timed()
+def calculate_price_deltas(items):
+    deltas = calculate_price_deltas_numeric(items).drop(columns=EWMA_EXACT_COLUMN)
+    return format_price_log_for_display(deltas)
 
-    tracked_and_formatted = calculate_price_deltas(items_to_update)
 
-    # If we already have price tracking data, combine updated with unchanged
-    if csv_exists(PRICE_TRACKER_FILE):
-        prev_tracked = read_purchases_prices_csv(PRICE_TRACKER_FILE, TRACKER_COLUMNS_FULL)
-        unchanged_items = prev_tracked[~prev_tracked["name"].isin(new_items["name"])]
+def build_price_state(deltas, state=None, rolling_config=None):
+    # Summarize each product's history (from numeric deltas) so future runs
+    # can extend it without revisiting old rows
+    state = {} if state is None else state
+    rolling_config = rolling_config or load_rolling_vars()
 
-        all_tracked = pd.concat([unchanged_items, tracked_and_formatted], ignore_index=True)
-    else:
-        # No existing file, so just use the new formatted data
-        all_tracked = tracked_and_formatted
+    deltas = deltas.sort_values(by=["name", "timestamp"], kind="stable")
+    names = deltas["name"].to_numpy(dtype=object)
+    seconds = to_epoch_seconds(deltas["timestamp"])
+    prices = deltas["price"].to_numpy(dtype=np.int64)
+    ewmas = deltas[EWMA_EXACT_COLUMN].to_numpy(dtype=float)
 
-    all_tracked = all_tracked.sort_values(by=["name", "timestamp"], ascending=[True, False]).reset_index(drop=True)
-    update_price_tracker_scraper_csv(PRICE_TRACKER_FILE, all_tracked)
+    # Contiguous rows per product (sorted above)
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]]) if len(names) else np.zeros(0, dtype=int)
+    ends = np.r_[starts[1:], len(names)]
+    last_timestamps = pd.to_datetime(deltas["timestamp"]).iloc[ends - 1].dt.strftime(TIMESTAMP_FORMAT).tolist()
 
+    for start, end, last_timestamp in zip(starts, ends, last_timestamps):
+        state[names[start]] = {
+            "last_timestamp": last_timestamp,
+            "last_price": int(prices[end - 1]),
+            "count": int(end - start),
+            "sum": int(prices[start:end].sum()),
+            "rolling": build_rolling_state(seconds[start:end], prices[start:end], ewmas[end - 1], rolling_config),
+        }
+
+    return state
+
+
+@timed()
+def calculate_price_deltas_incremental(new_items, state, rolling_config=None):
+    # Same columns as calculate_price_deltas_numeric, but only for new rows,
+    # seeded by per-product state (last price, count, running sum, windows);
+    # updates state
+    rolling_config = rolling_config or load_rolling_vars()
+
+    new_items = new_items.copy()
+    new_items["timestamp"] = pd.to_datetime(new_items["timestamp"])
+    new_items = new_items.sort_values(by=["name", "timestamp"], kind="stable")
+    new_items["price"] = to_cents(new_items["price"])
+
+    prev_prices, avg_prices, rolling_stats = [], [], []
+    windows = {}
+
+    epoch_seconds = to_epoch_seconds(new_items["timestamp"])
+    for name, timestamp, seconds, price in zip(new_items["name"], new_items["timestamp"], epoch_seconds, new_items["price"]):
+        product = state.get(name)
+        price = int(price)
+
+        if product:
+            prev_prices.append(product["last_price"])
+            product["count"] += 1
+            product["sum"] += price
+        else:
+            prev_prices.append(None)
+            product = state[name] = {"count": 1, "sum": price}
+
+        product["last_price"] = price
+        product["last_timestamp"] = timestamp.strftime(TIMESTAMP_FORMAT)
+        avg_prices.append(product["sum"] / product["count"])
+
+        window = windows.get(name)
+        if window is None:
+            rolling_state = product.get("rolling")
+            window = windows[name] = (
+                RollingWindow.from_state(rolling_state, rolling_config) if rolling_state else RollingWindow(rolling_config)
+            )
+        rolling_stats.append(window.add(int(seconds), price))
+
+    for name, window in windows.items():
+        state[name]["rolling"] = window.to_state()
+
+    new_items["prev_price"] = pd.array(prev_prices, dtype="Int64")
+    new_items["price_change"] = new_items["price"] - new_items["prev_price"]
+    new_items["percent_change"] = calculate_percent_change(new_items["price_change"], new_items["prev_price"])
+
+    avg_prices = pd.Series(avg_prices, index=new_items.index, dtype=float)
+    new_items["avg_price"] = round_cents(avg_prices)
+    new_items["diff_from_avg"] = round_cents(new_items["price"].astype(float) - avg_prices)
+
+    rolling_stats = pd.DataFrame(rolling_stats, index=new_items.index, columns=ROLLING_COLUMNS, dtype=float)
+    for col in ROLLING_COLUMNS:
+        new_items[col] = round_cents(rolling_stats[col])
+    new_items[EWMA_EXACT_COLUMN] = rolling_stats["ewma_price"]
+
+    return new_items, state
+
+
+def split_incremental_rows(all_items, names, state):
+    # For each product, pick out rows newer than its saved state; products
+    # w/o state (or whose older history no longer matches it) need a full pass
+    new_rows, full_names = [], []
+    candidates = all_items[all_items["name"].isin(names)]
+
+    for name, product_rows in candidates.groupby("name", sort=False):
+        product = state.get(name)
+
+        if not product:
+            full_names.append(name)
+            continue
+
+        is_new = product_rows["timestamp"] > pd.Timestamp(product["last_timestamp"])
+
+        # e.g. backfilled / removed rows, so saved sums are no longer valid
+        if (~is_new).sum() != product["count"]:
+            full_names.append(name)
+            continue
+
+        new_rows.append(product_rows[is_new])
+
+    new_rows = pd.concat(new_rows, ignore_index=True) if new_rows else all_items.iloc[0:0]
+    return new_rows, full_names
+
+
+def seed_price_tracker_data():
+    # One-time: start typed tracker data from existing (formatted) tracker file
+    if csv_exists(PRICE_TRACKER_DATA_FILE) or not csv_exists(PRICE_TRACKER_FILE):
+        return
+
+    print(f"Seeding {PRICE_TRACKER_DATA_FILE} from {PRICE_TRACKER_FILE}...")
+    prev_tracked = pd.read_csv(PRICE_TRACKER_FILE, dtype=str, keep_default_na=False).replace("", None)
+    update_price_tracker_scraper_csv(PRICE_TRACKER_DATA_FILE, parse_display_prices(prev_tracked).reindex(columns=TRACKER_COLUMNS_FULL))
+
+
+def build_price_tracker_display(force=False):
+    # Formatted copy for viewing ($ & % signs added only here), rebuilt from
+    # data lazily (see DISPLAY_REBUILD_HOURS)
+    if not csv_exists(PRICE_TRACKER_DATA_FILE):
+        return
+    if force or display_csv_is_stale(PRICE_TRACKER_FILE):
+        build_display_csv(PRICE_TRACKER_DATA_FILE, PRICE_TRACKER_FILE)
+
+
+@timed()
+def track_prices(items, incremental=True):
+    new_items = pd.DataFrame(items)
+    new_names = new_items["name"].unique()
+
+    seed_price_tracker_data()
+
+    # State only describes what's already in the tracker data, so drop it if
+    # the file is gone (or when doing a full recompute)
+    has_tracker_file = csv_exists(PRICE_TRACKER_DATA_FILE)
+    state = read_state(PRICE_TRACKER_STATE_FILE) if incremental and has_tracker_file else {}
+
+    # Saved windows from older runs / other window settings: recompute every
+    # product once, so all rows get matching rolling stats
+    if state and not rolling_state_matches(state, load_rolling_vars()):
+        print("Rolling window settings changed, recomputing all tracked prices...")
+        state, new_names = {}, None
     
-    
- 
+    # Automatically create datetime instances from CSV for sorting
+    # (only products that just got new purchases are needed)
+    all_purchases = read_purchases_prices_csv(PURCHASES_FILE, PURCHASES_COLUMNS_BRIEF, names=new_names)
+    if new_names is None:
+        new_names = all_purchases["name"].unique()
+
+    new_rows, full_names = split_incremental_rows(all_purchases, new_names, state)
+    tracked_parts = []
 
+    if not new_rows.empty:
+        tracked_new, state = calculate_price_deltas_incremental(new_rows, state)
+        tracked_parts.append(tracked_new)
 
+    if full_names:
+        items_to_update = all_purchases[all_purchases["name"].isin(full_names)].copy()
+        deltas = calculate_price_deltas_numeric(items_to_update)
+        state = build_price_state(deltas, state)
+        tracked_parts.append(deltas)
+
+    if not tracked_parts:
+        print("No new purchases to track.")
+        return
+
+    # Incrementally tracked products only gain rows (appended); file only
+    # gets rewritten when some products were fully recomputed (their new rows
+    # replace the whole history)
+    tracked = pd.concat(tracked_parts, ignore_index=True)
+    if full_names or not csv_columns_match(PRICE_TRACKER_DATA_FILE, TRACKER_COLUMNS_FULL):
+        merge_into_price_tracker_scraper_csv(PRICE_TRACKER_DATA_FILE, tracked[TRACKER_COLUMNS_FULL], replace_names=full_names)
+    else:
+        append_to_price_log_csv(PRICE_TRACKER_DATA_FILE, tracked[TRACKER_COLUMNS_FULL])
+    write_state(PRICE_TRACKER_STATE_FILE, state)
+    refresh_price_index("tracker", tracked, replace_names=full_names)
 
+    build_price_tracker_display()
 
+    # Only once everything above is saved (alert problems never undo tracking)
+    check_alerts("tracker", tracked)
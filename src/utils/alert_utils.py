@@ -0,0 +1,279 @@
+###############################################################################
+##  `alert_utils.py`                                                         ##
+##                                                                           ##
+##  Purpose: Handles price alerts: per-product rules (target price, % drop   ##
+##           vs avg, new all-time low) kept as sorted thresholds, checked    ##
+##           against each new point, deduped, & sent in one batch            ##
+###############################################################################
+
+
+import os
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.config import TIMESTAMP_FORMAT, load_alert_vars, load_twilio_vars, add_path_prefix
+from src.utils.state_utils import read_state, write_state
+from src.utils.price_utils import to_cents, format_cents
+from src.utils.metrics_utils import timed, increment
+from src.utils.index_utils import get_price_index
+
+
+ALERT_STATE_FILE = add_path_prefix("data/state/alert_state.json")
+
+# Rules under this key apply to every product (merged w/ product's own)
+DEFAULT_RULES_KEY = "*"
+
+# Twilio concatenates long SMS up to this many chars
+MAX_SMS_CHARS = 1600
+
+
+def as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def compile_rules(rules, defaults=None):
+    # Rules file prices are dollars (e.g. 2.5 or "$2.50"), kept as sorted cents
+    defaults = defaults or {}
+
+    targets = as_list(defaults.get("target_price")) + as_list(rules.get("target_price"))
+    drops = as_list(defaults.get("drop_percent")) + as_list(rules.get("drop_percent"))
+
+    compiled = {
+        "targets": sorted(set(to_cents([str(target) for target in targets]).dropna().astype(int).tolist())),
+        "drops": sorted(set(float(drop) for drop in drops)),
+        "all_time_low": bool(rules.get("all_time_low", defaults.get("all_time_low", False))),
+    }
+
+    if compiled["targets"] or compiled["drops"] or compiled["all_time_low"]:
+        return compiled
+    return None
+
+
+class AlertRules:
+    # Threshold index: product --> sorted targets / drops (so checking a new
+    # point is a couple of binary searches, however many rules there are)
+    def __init__(self, rules_by_name):
+        defaults = rules_by_name.get(DEFAULT_RULES_KEY, {})
+
+        self.default = compile_rules(defaults)
+        self.products = {
+            name: compile_rules(rules, defaults)
+            for name, rules in rules_by_name.items() if name != DEFAULT_RULES_KEY
+        }
+
+    def __bool__(self):
+        return bool(self.default) or any(self.products.values())
+
+    def get(self, name):
+        return self.products.get(name, self.default)
+
+
+def load_alert_rules(rules_file):
+    if not os.path.exists(rules_file):
+        return AlertRules({})
+
+    with open(rules_file, mode="r") as file:
+        rules_by_name = json.load(file)
+
+    if not isinstance(rules_by_name, dict):
+        raise ValueError("Error, alert rules must map product names to rules")
+    return AlertRules(rules_by_name)
+
+
+def make_alert(kind, source, name, timestamp, price, threshold, message):
+    return {
+        "timestamp": pd.Timestamp(timestamp).strftime(TIMESTAMP_FORMAT),
+        "source": source,
+        "name": name,
+        "kind": kind,
+        "price": int(price),
+        "threshold": threshold,
+        "message": message,
+    }
+
+
+def check_target(rules, fired, price):
+    # Lowest target at or above price is the one that counts; alert only if
+    # it's deeper than what already fired (re-arms once price goes back up)
+    targets = rules["targets"]
+    pos = bisect_left(targets, price)
+    crossed = targets[pos] if pos < len(targets) else None
+    prev = fired.get("target_price")
+
+    fired["target_price"] = crossed
+    return crossed is not None and (prev is None or crossed < prev)
+
+
+def check_drop(rules, fired, drop):
+    # Highest threshold at or below drop counts (same re-arming as targets)
+    drops = rules["drops"]
+    pos = bisect_right(drops, drop) - 1
+    crossed = drops[pos] if pos >= 0 else None
+    prev = fired.get("drop_percent")
+
+    fired["drop_percent"] = crossed
+    return crossed is not None and (prev is None or crossed > prev)
+
+
+def evaluate_alerts(rows, source, rules, state, get_prior_low=None):
+    # Rows (time order) w/ timestamp, name, price & avg_price in cents;
+    # updates state (what already fired, lowest prices seen)
+    fired_by_key = state.setdefault("fired", {})
+    lows = state.setdefault("lows", {})
+    alerts = []
+
+    for timestamp, name, price, avg_price in zip(rows["timestamp"], rows["name"], rows["price"], rows["avg_price"]):
+        product_rules = rules.get(name)
+        if not product_rules or pd.isna(price):
+            continue
+
+        key = f"{source}|{name}"
+        fired = fired_by_key.setdefault(key, {})
+        price = int(price)
+        price_str = format_cents([price])[0]
+
+        if product_rules["targets"] and check_target(product_rules, fired, price):
+            target = fired["target_price"]
+            alerts.append(make_alert(
+                "target_price", source, name, timestamp, price, target,
+                f"{name} is {price_str} (target {format_cents([target])[0]})"
+            ))
+
+        if product_rules["drops"] and not pd.isna(avg_price) and avg_price > 0:
+            drop = (avg_price - price) / avg_price * 100
+            if check_drop(product_rules, fired, drop):
+                alerts.append(make_alert(
+                    "drop_percent", source, name, timestamp, price, fired["drop_percent"],
+                    f"{name} is {price_str}, {drop:.1f}% below its average {format_cents([avg_price])[0]}"
+                ))
+
+        if product_rules["all_time_low"]:
+            prior_low = lows.get(key)
+            if prior_low is None and get_prior_low:
+                prior_low = get_prior_low(source, name, timestamp)
+
+            if prior_low is not None and price < prior_low:
+                alerts.append(make_alert(
+                    "all_time_low", source, name, timestamp, price, prior_low,
+                    f"{name} hit a new all-time low: {price_str} (was {format_cents([prior_low])[0]})"
+                ))
+            lows[key] = price if prior_low is None else min(prior_low, price)
+
+    return alerts
+
+
+def get_prior_low(source, name, timestamp):
+    # Lowest price before this point (only needed once per product, after
+    # which alert state keeps track)
+    index = get_price_index(source)
+    if name not in index:
+        return None
+
+    lowest = index.min_over(name, end=pd.Timestamp(timestamp) - pd.Timedelta(seconds=1))
+    return lowest[1] if lowest else None
+
+
+class LocalNotifier:
+    # Stand-in sink (& permanent record): alerts appended as JSON lines
+    def __init__(self, log_file):
+        self.log_file = log_file
+
+    def send(self, alerts):
+        folder = os.path.dirname(self.log_file)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        with open(self.log_file, mode="a") as file:
+            file.writelines(json.dumps(alert) + "\n" for alert in alerts)
+
+        for alert in alerts:
+            print(f"ALERT: {alert['message']}")
+
+
+def batch_messages(lines, max_chars=MAX_SMS_CHARS, header="Price alerts:"):
+    # As few messages as possible, each under SMS size limit
+    messages, curr = [], header
+
+    for line in lines:
+        if len(curr) + 1 + len(line) > max_chars and curr != header:
+            messages.append(curr)
+            curr = header
+        curr = f"{curr}\n{line}"[:max_chars]
+
+    if curr != header:
+        messages.append(curr)
+    return messages
+
+
+class TwilioNotifier:
+    # Texts alerts in as few SMS as possible (Twilio only imported if used)
+    def __init__(self, account_sid, auth_token, from_number, to_number, client=None):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.to_number = to_number
+        self.client = client
+
+    def send(self, alerts):
+        if self.client is None:
+            from twilio.rest import Client
+            self.client = Client(self.account_sid, self.auth_token)
+
+        for body in batch_messages([alert["message"] for alert in alerts]):
+            self.client.messages.create(body=body, from_=self.from_number, to=self.to_number)
+            increment("alert_sms_sent")
+
+
+def get_notifiers():
+    _, notifier, log_file, _ = load_alert_vars()
+
+    notifiers = [LocalNotifier(add_path_prefix(log_file))]
+    if notifier == "twilio":
+        notifiers.append(TwilioNotifier(*load_twilio_vars()))
+    return notifiers
+
+
+def send_alerts(alerts, notifiers=None):
+    for notifier in notifiers or get_notifiers():
+        try:
+            notifier.send(alerts)
+        except Exception as e:
+            # Tracking already succeeded, so don't fail run over a notifier
+            print(f"Warning: Could not send alerts via {type(notifier).__name__}: {e}")
+
+
+def find_alerts(source, tracked, now=None, notifiers=None):
+    rules_file, _, _, max_age_hours = load_alert_vars()
+    rules = load_alert_rules(add_path_prefix(rules_file))
+    if not rules or tracked.empty:
+        return []
+
+    now = now or datetime.now()
+    rows = tracked.assign(timestamp=pd.to_datetime(tracked["timestamp"]))
+    rows = rows[rows["timestamp"] >= now - timedelta(hours=max_age_hours)].sort_values(by="timestamp", kind="stable")
+
+    state = read_state(ALERT_STATE_FILE)
+    alerts = evaluate_alerts(rows, source, rules, state, get_prior_low)
+    write_state(ALERT_STATE_FILE, state)
+
+    if alerts:
+        send_alerts(alerts, notifiers)
+        increment("alerts_sent", len(alerts))
+    return alerts
+
+
+@timed()
+def check_alerts(source, tracked, now=None, notifiers=None):
+    # Called once tracked rows (& pipeline state) are saved; only recent
+    # points can alert. Bad rules / notifier settings only warn, since
+    # tracking itself already succeeded
+    try:
+        return find_alerts(source, tracked, now, notifiers)
+    except Exception as e:
+        print(f"Warning: Could not check price alerts: {e}")
+        return []
@@ -0,0 +1,157 @@
+###############################################################################
+##  `browser_utils.py`                                                       ##
+##                                                                           ##
+##  Purpose: Handles pool of warm WebDriver sessions (attached to a running  ##
+##           Chrome via debugger address) reused across a scrape batch       ##
+###############################################################################
+
+
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+
+
+def create_debugger_driver(address):
+    # Attach to already running Chrome (see `config.launch_chrome`)
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option("debuggerAddress", address)
+    return webdriver.Chrome(options=options)
+
+
+def is_driver_healthy(driver):
+    # Cheap round trip; fails if browser / chromedriver connection is gone
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def quit_driver(driver, close_tab=False):
+    # Tabs a session opened itself get closed too (browser's main tab stays)
+    if close_tab:
+        try:
+            driver.close()
+        except Exception:
+            pass
+
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class DriverPool:
+    # Keeps up to `size` sessions alive (each w/ own tab), recycling one
+    # after `max_pages` page loads or whenever it errors / fails health check
+    def __init__(self, address, size=1, max_pages=50, driver_factory=create_debugger_driver):
+        if size < 1 or max_pages < 1:
+            raise ValueError("Error, pool size & max pages must be at least 1")
+
+        self.address = address
+        self.size = size
+        self.max_pages = max_pages
+        self.driver_factory = driver_factory
+
+        self._idle = queue.LifoQueue()
+        self._page_counts = {}
+        self._open_count = 0
+        self._lock = threading.Lock()
+        self._main_tab_driver = None
+
+    def _open_driver(self):
+        driver = self.driver_factory(self.address)
+
+        # One session at a time keeps browser's current tab, others get their own
+        with self._lock:
+            use_main_tab = self._main_tab_driver is None
+            if use_main_tab:
+                self._main_tab_driver = id(driver)
+        if not use_main_tab:
+            driver.switch_to.new_window("tab")
+
+        self._page_counts[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        self._page_counts.pop(id(driver), None)
+
+        # Main tab is free for next session again, own tabs get closed (so
+        # recycling doesn't pile up tabs in attached browser)
+        with self._lock:
+            is_main_tab = self._main_tab_driver == id(driver)
+            if is_main_tab:
+                self._main_tab_driver = None
+            self._open_count -= 1
+
+        quit_driver(driver, close_tab=not is_main_tab)
+
+    def _take_idle(self, timeout=None):
+        try:
+            if timeout is None:
+                return self._idle.get_nowait()
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def acquire(self):
+        while True:
+            driver = self._take_idle()
+
+            if driver is None:
+                with self._lock:
+                    can_open = self._open_count < self.size
+                    if can_open:
+                        self._open_count += 1
+
+                if can_open:
+                    try:
+                        return self._open_driver()
+                    except Exception:
+                        with self._lock:
+                            self._open_count -= 1
+                        raise
+
+                # Pool is at capacity, so wait for a session to come back
+                # (re-checking capacity in case one got discarded meanwhile)
+                driver = self._take_idle(timeout=0.5)
+                if driver is None:
+                    continue
+
+            if is_driver_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def release(self, driver, failed=False):
+        self._page_counts[id(driver)] = self._page_counts.get(id(driver), 0) + 1
+
+        if failed or self._page_counts[id(driver)] >= self.max_pages:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def session(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, failed=True)
+            raise
+        else:
+            self.release(driver)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
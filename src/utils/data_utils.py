@@ -7,13 +7,23 @@
 
 import os
 import csv
+import time
+import hashlib
 import pandas as pd
 from datetime import datetime
 
 from src.config import (
-    format_date_time, shorten_url, add_path_prefix,
+    format_date_time, add_path_prefix, load_storage_vars, load_display_rebuild_vars,
     TIMESTAMP_FORMAT
 )
+from src.utils.url_utils import shorten_urls
+from src.utils.state_utils import read_state, write_state
+from src.utils.metrics_utils import timed
+from src.utils.price_utils import PRICE_DTYPES, format_prices_for_display, parse_display_prices, has_display_prices
+from src.utils.sqlite_utils import (
+    connect_db, frame_to_table_rows, insert_rows, replace_rows, read_table, table_has_rows,
+    get_latest_timestamp, export_table_to_csv, migrate_csvs_to_sqlite
+)
 
 UNIQUE_ITEMS_FILE = add_path_prefix("data/unique_items.csv")
 
@@ -23,8 +33,79 @@ FREE_PROMO_FILE = add_path_prefix("data/free_promo_tracker.csv")
 PRICE_TRACKER_FILE = add_path_prefix("data/price_tracker.csv")
 PRICE_SCRAPER_FILE = add_path_prefix("data/price_scraper.csv")
 
+# Typed data (prices in cents) behind formatted price tracker display file
+PRICE_TRACKER_DATA_FILE = add_path_prefix("data/price_tracker_data.csv")
+
+# Append-only history behind (sorted) price scraper display file
+PRICE_SCRAPER_LOG_FILE = add_path_prefix("data/price_scraper_log.csv")
+
+# Files whose prices are stored as cents (display files get formatted copies)
+TYPED_PRICE_FILES = (PRICE_TRACKER_DATA_FILE, PRICE_SCRAPER_LOG_FILE)
+
+STORAGE_BACKEND, SQLITE_DB_FILE = load_storage_vars()
+SQLITE_DB_FILE = add_path_prefix(SQLITE_DB_FILE)
+
+# Each tracked CSV maps to a table when using SQLite backend
+TABLE_NAMES = {
+    UNIQUE_ITEMS_FILE: "unique_items",
+    PURCHASES_FILE: "purchase_tracker",
+    FREE_PROMO_FILE: "free_promo_tracker",
+    PRICE_TRACKER_FILE: "price_tracker",
+    PRICE_TRACKER_DATA_FILE: "price_tracker",
+    PRICE_SCRAPER_FILE: "price_scraper",
+    PRICE_SCRAPER_LOG_FILE: "price_scraper",
+}
+
+# These still get a (sorted) CSV export for viewing, even w/ SQLite backend
+DISPLAY_FILES = (UNIQUE_ITEMS_FILE, PRICE_TRACKER_FILE, PRICE_SCRAPER_FILE)
+
+# Per-product running totals (in cents), so deltas only get computed for new rows
+PRICE_TRACKER_STATE_FILE = add_path_prefix("data/state/price_tracker_state_cents.json")
+PRICE_SCRAPER_STATE_FILE = add_path_prefix("data/state/price_scraper_state_cents.json")
+
+# Rows checked for display ("$x.xx") prices when deciding if a file predates cents
+CENTS_SNIFF_ROWS = 20
+
+# Rows per chunk when only some products' rows are wanted from a CSV (keeps
+# peak memory to matching rows, not the whole file)
+READ_CHUNK_ROWS = 100_000
+
+# Latest logged timestamp per purchase / free / promo CSV (sync watermark)
+WATERMARK_FILE = add_path_prefix("data/state/watermarks.json")
+TAIL_READ_BYTES = 64 * 1024
+
+# Purchase / free / promo row keys (loaded once per run, per CSV)
+DEDUP_KEY_COLUMNS = ["email_id", "name", "price", "quantity"]
+_dedup_indexes = {}
+
+
+def get_table(csv_file):
+    # Table backing given CSV (or None if it just lives on disk as CSV)
+    if STORAGE_BACKEND != "sqlite":
+        return None
+    return TABLE_NAMES.get(csv_file)
+
+
+def migrate_to_sqlite():
+    # One-shot move of existing CSVs into SQLite DB (safe to re-run)
+    conn = connect_db(SQLITE_DB_FILE)
+    # Legacy data lives in display files, so log is left out here (tracker
+    # data file is used if there is one)
+    csv_files_by_table = {
+        table: csv_file for csv_file, table in TABLE_NAMES.items() 
+        if csv_file not in (PRICE_SCRAPER_LOG_FILE, PRICE_TRACKER_DATA_FILE)
+    }
+    if os.path.exists(PRICE_TRACKER_DATA_FILE):
+        csv_files_by_table["price_tracker"] = PRICE_TRACKER_DATA_FILE
+
+    return migrate_csvs_to_sqlite(conn, csv_files_by_table)
+
 
 def csv_exists(csv_file, create_header=None):
+    table = get_table(csv_file)
+    if table:
+        return table_has_rows(connect_db(SQLITE_DB_FILE), table)
+
     # Extracts the 'data/' folder path
     folder = os.path.dirname(csv_file)  
     
@@ -53,6 +134,7 @@ def make_dir(csv_file_path):
     return
 
 
+@timed()
 def create_csv(csv_file, header):
     if csv_exists(csv_file):
         raise ValueError("Error, {csv_file} already exists")
@@ -66,10 +148,86 @@ def create_csv(csv_file, header):
         writer.writerow(header)
 
 
+def get_watermark_key(csv_file):
+    return os.path.basename(csv_file)
+
+
+def read_watermark(csv_file):
+    # Latest logged timestamp, as long as file hasn't shrunk since (e.g.
+    # deleted & recreated), otherwise None
+    watermark = read_state(WATERMARK_FILE).get(get_watermark_key(csv_file))
+    if not watermark or not os.path.exists(csv_file):
+        return None
+
+    if os.path.getsize(csv_file) < watermark["size"]:
+        return None
+    return watermark["timestamp"]
+
+
+def update_watermark(csv_file, timestamp):
+    watermarks = read_state(WATERMARK_FILE)
+    key = get_watermark_key(csv_file)
+
+    prev_timestamp = (watermarks.get(key) or {}).get("timestamp")
+    if prev_timestamp and prev_timestamp > timestamp:
+        timestamp = prev_timestamp
+
+    watermarks[key] = {"timestamp": timestamp, "size": os.path.getsize(csv_file)}
+    write_state(WATERMARK_FILE, watermarks)
+
+
+def get_latest_date_from_tail(csv_file, tail_bytes=TAIL_READ_BYTES):
+    # Rows get appended oldest to newest, so latest timestamp is near the end
+    with open(csv_file, mode="r", newline="") as file:
+        header = next(csv.reader(file), None)
+    if not header or "timestamp" not in header:
+        return None
+
+    with open(csv_file, mode="rb") as file:
+        file.seek(0, os.SEEK_END)
+        start = max(0, file.tell() - tail_bytes)
+        file.seek(start)
+        tail = file.read().decode("utf-8", errors="ignore")
+
+    lines = tail.splitlines()
+    # Drop (likely partial) first line, or header if whole file fits
+    lines = lines[1:]
+
+    timestamp_idx = header.index("timestamp")
+    latest = None
+
+    for row in csv.reader(lines):
+        if len(row) <= timestamp_idx:
+            continue
+        try:
+            timestamp = datetime.strptime(row[timestamp_idx].strip(), TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+        latest = timestamp if latest is None else max(latest, timestamp)
+
+    return latest.strftime(TIMESTAMP_FORMAT) if latest else None
+
+
 def get_latest_date(csv_file):
     if not csv_file:
         raise ValueError("Error, missing CSV file")
 
+    table = get_table(csv_file)
+    if table:
+        return get_latest_timestamp(connect_db(SQLITE_DB_FILE), table)
+
+    # Constant time when watermark exists, then tail read, then full scan
+    latest = read_watermark(csv_file)
+    if latest:
+        return latest
+
+    latest = get_latest_date_from_tail(csv_file) or get_latest_date_full_scan(csv_file)
+    if latest:
+        update_watermark(csv_file, latest)
+    return latest
+
+
+def get_latest_date_full_scan(csv_file):
     timestamps = []
 
     with open(csv_file, mode="r", newline="") as file:
@@ -92,62 +250,259 @@ def get_latest_date(csv_file):
         return None
 
 
+def get_dedup_key_file(csv_file):
+    # e.g. data/purchase_tracker.csv --> data/state/purchase_tracker.csv.keys
+    folder, file_name = os.path.split(csv_file)
+    return os.path.join(folder, "state", f"{file_name}.keys")
+
+
+def make_row_key(email_ID, name, price, quantity):
+    key = "\x1f".join(str(value) for value in (email_ID, name, price, quantity))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_dedup_index(csv_file, key_file):
+    keys = set()
+
+    if os.path.exists(csv_file):
+        with open(csv_file, mode="r", newline="") as file:
+            for row in csv.DictReader(file):
+                keys.add(make_row_key(*(row[col] for col in DEDUP_KEY_COLUMNS)))
+
+    make_dir(key_file)
+    with open(key_file, mode="w") as file:
+        file.writelines(f"{key}\n" for key in keys)
+
+    return keys
+
+
+def load_dedup_index(csv_file):
+    if csv_file in _dedup_indexes:
+        return _dedup_indexes[csv_file]
+
+    key_file = get_dedup_key_file(csv_file)
+
+    # Rebuild if sidecar is missing, or if CSV changed after it (e.g. edited by hand)
+    if (
+        not os.path.exists(key_file) or 
+        (os.path.exists(csv_file) and os.path.getmtime(key_file) < os.path.getmtime(csv_file))
+    ):
+        keys = build_dedup_index(csv_file, key_file)
+    else:
+        with open(key_file, mode="r") as file:
+            keys = {line.strip() for line in file if line.strip()}
+
+    _dedup_indexes[csv_file] = keys
+    return keys
+
+
+@timed()
 def append_to_purchases_free_promo_csv(csv_file, data):
     # Can handle purchase / free / promo items log
     item_names_urls = []
-    
-    file_df = pd.read_csv(csv_file)
-    curr_rows = file_df.values.tolist()
-
-    with open(csv_file, mode="a", newline="") as file:
-        writer = csv.writer(file)
-
-        email_ID = data["id"]
-        timestamp = data["timestamp"]
-        date, time = format_date_time(timestamp)
-
-        # New row for each item, based on email contents (data)
-        for item in data["items"]:
-            name = item["name"]
-            url = item["URL"]
-            price = item["price"]
-            quantity = item["quantity"]
-            
-            row = [email_ID, timestamp, date, time, name, quantity, price, shorten_url(url)]
-            if row not in curr_rows:
-                writer.writerow(row)
-
-            item_names_urls.append({
-                "name": name, 
-                "url": shorten_url(url) # Can adjust long vs short URL return
-            })
+    new_rows, row_keys = [], []
+
+    email_ID = data["id"]
+    timestamp = data["timestamp"]
+    date, time = format_date_time(timestamp)
+
+    # Shorten every URL in email at once (cached ones skip TinyURL)
+    short_urls = shorten_urls([item["URL"] for item in data["items"]])
+
+    # New row for each item, based on email contents (data)
+    for item in data["items"]:
+        name = item["name"]
+        url = item["URL"]
+        price = item["price"]
+        quantity = item["quantity"]
+        
+        new_rows.append([email_ID, timestamp, date, time, name, quantity, price, short_urls[url]])
+        row_keys.append(make_row_key(email_ID, name, price, quantity))
+
+        item_names_urls.append({
+            "name": name, 
+            "url": short_urls[url] # Can adjust long vs short URL return
+        })
+
+    table = get_table(csv_file)
+    if table:
+        # Unique (email_id, name, price, quantity) index skips duplicates
+        insert_rows(connect_db(SQLITE_DB_FILE), table, [tuple(row) for row in new_rows], ignore_duplicates=True)
+    else:
+        # O(1) membership checks against (email_id, name, price, quantity) keys
+        existing_keys = load_dedup_index(csv_file)
+        new_keys = []
+
+        with open(csv_file, mode="a", newline="") as file:
+            writer = csv.writer(file)
+
+            for row, row_key in zip(new_rows, row_keys):
+                if row_key not in existing_keys:
+                    writer.writerow(row)
+                    existing_keys.add(row_key)
+                    new_keys.append(row_key)
+
+        # Sidecar is append-only too, & written after CSV (so stays newer)
+        with open(get_dedup_key_file(csv_file), mode="a") as file:
+            file.writelines(f"{key}\n" for key in new_keys)
+
+        update_watermark(csv_file, timestamp)
 
     # Return the new products we've just added
     return item_names_urls
 
 
-def read_purchases_prices_csv(csv_file, columns):
+def read_purchases_prices_csv(csv_file, columns, names=None):
     # Can handle any purchase/price file with timestamp
     if not csv_exists(csv_file):
         raise ValueError("Error, missing CSV file")
     if not columns:
         raise ValueError("Error, missing columns")
 
-    return pd.read_csv(csv_file, parse_dates=["timestamp"], usecols=columns)
+    # Optionally only load rows for certain products
+    table = get_table(csv_file)
+    if table:
+        return read_table(connect_db(SQLITE_DB_FILE), table, columns, names)
+
+    dtypes = {col: PRICE_DTYPES[col] for col in columns if col in PRICE_DTYPES} if csv_file in TYPED_PRICE_FILES else None
+    if names is None:
+        return pd.read_csv(csv_file, parse_dates=["timestamp"], usecols=columns, dtype=dtypes)
+
+    chunks = pd.read_csv(csv_file, parse_dates=["timestamp"], usecols=columns, dtype=dtypes, chunksize=READ_CHUNK_ROWS)
+    items = pd.concat([chunk[chunk["name"].isin(names)] for chunk in chunks], ignore_index=True)
+    return items
 
 
 def read_unique_items_csv():
     if not csv_exists(UNIQUE_ITEMS_FILE):
         raise ValueError("Error, missing CSV file")
 
+    table = get_table(UNIQUE_ITEMS_FILE)
+    if table:
+        return read_table(connect_db(SQLITE_DB_FILE), table)
+
     return pd.read_csv(UNIQUE_ITEMS_FILE)
 
 
+@timed()
 def update_price_tracker_scraper_csv(csv_file, sorted_items):
     if sorted_items.empty:
         raise ValueError("Error, missing tracked items, cannot update")
 
+    table = get_table(csv_file)
+    if table:
+        conn = connect_db(SQLITE_DB_FILE)
+        replace_rows(conn, table, frame_to_table_rows(table, sorted_items))
+        if csv_file in DISPLAY_FILES:
+            export_table_to_csv(conn, table, csv_file)
+        return
+
     sorted_items.to_csv(csv_file, index=False)
 
 
+@timed()
+def merge_into_price_tracker_scraper_csv(csv_file, new_items, replace_names=()):
+    # Add freshly tracked rows, dropping any old rows for products that were
+    # fully recomputed (i.e. their new rows replace the whole history)
+    if new_items.empty:
+        raise ValueError("Error, missing tracked items, cannot update")
+
+    table = get_table(csv_file)
+    if table:
+        # Only touches rows for affected products (via name index)
+        conn = connect_db(SQLITE_DB_FILE)
+        replace_rows(conn, table, frame_to_table_rows(table, new_items), names=replace_names)
+        if csv_file in DISPLAY_FILES:
+            export_table_to_csv(conn, table, csv_file)
+        return
+
+    if csv_exists(csv_file):
+        dtypes = PRICE_DTYPES if csv_file in TYPED_PRICE_FILES else None
+        # (columns added since file was written just come back empty)
+        prev_items = pd.read_csv(csv_file, parse_dates=["timestamp"], usecols=lambda col: col in new_items.columns, dtype=dtypes)
+        prev_items = prev_items.reindex(columns=new_items.columns)
+        unchanged_items = prev_items[~prev_items["name"].isin(replace_names)]
+        all_items = pd.concat([unchanged_items, new_items], ignore_index=True)
+    else:
+        all_items = new_items
+
+    all_items["timestamp"] = pd.to_datetime(all_items["timestamp"])
+    all_items = all_items.sort_values(by=["name", "timestamp"], ascending=[True, False]).reset_index(drop=True)
+    all_items.to_csv(csv_file, index=False)
+
+
+def csv_columns_match(csv_file, columns):
+    # Appends only line up if file's header has the same columns (older files
+    # may lack ones added since, so need one full rewrite)
+    if get_table(csv_file):
+        return True
+    if not os.path.exists(csv_file):
+        return False
+    return pd.read_csv(csv_file, nrows=0).columns.tolist() == list(columns)
+
+
+@timed()
+def append_to_price_log_csv(log_file, new_items):
+    # Append-only write (cost depends on new rows, not on history length)
+    if new_items.empty:
+        raise ValueError("Error, missing tracked items, cannot update")
+
+    table = get_table(log_file)
+    if table:
+        insert_rows(connect_db(SQLITE_DB_FILE), table, frame_to_table_rows(table, new_items))
+        return
+
+    new_items = new_items.copy()
+    if pd.api.types.is_datetime64_any_dtype(new_items["timestamp"]):
+        new_items["timestamp"] = new_items["timestamp"].dt.strftime(TIMESTAMP_FORMAT)
+
+    write_header = not os.path.exists(log_file)
+    new_items.to_csv(log_file, mode="a", header=write_header, index=False)
+
+
+@timed()
+def build_display_csv(log_file, display_file):
+    # Sorted (name, newest first) copy of an append-only log, for viewing
+    table = get_table(log_file)
+    if table:
+        export_table_to_csv(connect_db(SQLITE_DB_FILE), table, display_file)
+        return
+
+    if not os.path.exists(log_file):
+        raise ValueError("Error, missing log file")
+
+    # Timestamps stay strs (copied over exactly as logged); prices get
+    # formatted all at once
+    items = pd.read_csv(log_file, dtype={"timestamp": str, **PRICE_DTYPES})
+    items = items.sort_values(by=["name", "timestamp"], ascending=[True, False], kind="stable")
+    format_prices_for_display(items).to_csv(display_file, index=False)
+
+
+def convert_price_csv_to_cents(csv_file):
+    # One-time upgrade of files written before prices were stored as cents.
+    # Whole files get written one way or the other, so just sniff 1st rows
+    # (cheap check each run, rather than reading whole append-only log)
+    if get_table(csv_file) or not os.path.exists(csv_file):
+        return False
+
+    head = pd.read_csv(csv_file, dtype=str, keep_default_na=False, nrows=CENTS_SNIFF_ROWS)
+    if "price" not in head or not has_display_prices(head["price"]):
+        return False
+
+    items = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+
+    print(f"Converting {csv_file} to typed prices (cents)...")
+    parse_display_prices(items.replace("", None)).to_csv(csv_file, index=False)
+    return True
+
+
+def display_csv_is_stale(display_file, rebuild_hours=None):
+    rebuild_hours = load_display_rebuild_vars() if rebuild_hours is None else rebuild_hours
+
+    if rebuild_hours < 0:
+        return False
+    if not os.path.exists(display_file):
+        return True
 
+    age_hours = (time.time() - os.path.getmtime(display_file)) / 3600
+    return age_hours >= rebuild_hours
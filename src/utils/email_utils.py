@@ -16,6 +16,7 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from src.utils.data_utils import TIMESTAMP_FORMAT
+from src.utils.metrics_utils import timed, increment
 from src.config import (
     load_email_vars, add_path_prefix,
 )
@@ -27,6 +28,12 @@ CREDENTIALS_FILE = add_path_prefix("secrets/client_secret_gmail.json")
 
 GMAIL_TIMESTAMP_FORMAT = "%Y/%m/%d"
 
+# Gmail API allows up to 100 calls per batch HTTP request
+GMAIL_BATCH_SIZE = 100
+
+# Partial response mask: only what parser needs (timestamp & body parts)
+EMAIL_FIELDS = "id,internalDate,payload(body/data,parts(mimeType,body/data))"
+
 
 def generate_oauth2_string(email, access_token):
     auth_string = f"user={email}\x01auth=Bearer {access_token}\x01\x01"
@@ -122,15 +129,53 @@ def fetch_email_IDs(mail, since_date=None):
     return [email["id"] for email in email_IDs]
 
 
+def report_fetch_error(email_ID, error):
+    if isinstance(error, HttpError) and error.resp.status == 404:
+        print(f"Error: Email ID {email_ID} not found")
+    else:
+        print(f"An error occurred: {error}")
+
+
 # Fetch a specific email by ID
-def fetch_email(mail, email_ID):
+@timed()
+def fetch_email(mail, email_ID, fields=None):
     try:
-        return mail.users().messages().get(userId="me", id=email_ID, format="full").execute()
+        request_args = {"userId": "me", "id": email_ID, "format": "full"}
+        if fields:
+            request_args["fields"] = fields
+
+        return mail.users().messages().get(**request_args).execute()
     except HttpError as error:
-        if error.resp.status == 404:
-            print(f"Error: Email ID {email_ID} not found")
-        else:
-            print(f"An error occurred: {error}")
-        return None 
+        report_fetch_error(email_ID, error)
+        return None
+
+
+# Fetch many emails by ID, grouping `get` calls into batch HTTP requests
+# (results come back in same order as IDs, w/ None for any failures)
+@timed()
+def fetch_emails(mail, email_IDs, batch_size=GMAIL_BATCH_SIZE, fields=EMAIL_FIELDS):
+    if not 0 < batch_size <= GMAIL_BATCH_SIZE:
+        raise ValueError(f"Error, batch size must be between 1 and {GMAIL_BATCH_SIZE}")
+
+    emails = {}
+
+    def handle_response(request_id, response, exception):
+        if exception:
+            report_fetch_error(request_id, exception)
+            return
+        emails[request_id] = response
+
+    # Batch request IDs must be unique, so only request each email once
+    unique_IDs = list(dict.fromkeys(email_IDs))
+
+    for start in range(0, len(unique_IDs), batch_size):
+        batch = mail.new_batch_http_request(callback=handle_response)
+
+        for email_ID in unique_IDs[start:start + batch_size]:
+            request = mail.users().messages().get(userId="me", id=email_ID, format="full", fields=fields)
+            batch.add(request, request_id=email_ID)
 
+        batch.execute()
+        increment("gmail_batch_requests")
 
+    return [emails.get(email_ID) for email_ID in email_IDs]
@@ -0,0 +1,118 @@
+###############################################################################
+##  `extract_utils.py`                                                       ##
+##                                                                           ##
+##  Purpose: Handles extraction of embedded item JSON objects from product   ##
+##           page source (single scan, parsing each object's own bounds)     ##
+###############################################################################
+
+
+import re
+import json
+import time
+from functools import lru_cache
+
+
+ITEM_DATA_MARKER = '"__typename":"Item"'
+
+# How many preceding "{" to try when looking for start of an item object
+# (i.e. how many nested objects may come before "__typename" in it)
+MAX_OBJECT_START_ATTEMPTS = 16
+
+_json_decoder = json.JSONDecoder()
+
+
+@lru_cache(maxsize=None)
+def get_item_matchers(marker=ITEM_DATA_MARKER):
+    # Compiled once per process, then reused for every page
+    return re.compile(re.escape(marker)), re.compile(r"\$[\d.]+")
+
+
+def find_object_start(page_source, marker_start, marker_end):
+    # Walk back over "{" until one decodes into an object that spans marker
+    # & is itself the item (not a sibling or parent)
+    brace = marker_start
+
+    for _ in range(MAX_OBJECT_START_ATTEMPTS):
+        brace = page_source.rfind("{", 0, brace)
+        if brace < 0:
+            return None, None, None
+
+        try:
+            obj, end = _json_decoder.raw_decode(page_source, brace)
+        except ValueError:
+            continue
+
+        if end >= marker_end and isinstance(obj, dict) and obj.get("__typename") == "Item":
+            return obj, brace, end
+
+    return None, None, None
+
+
+def iter_item_objects(page_source, marker=ITEM_DATA_MARKER):
+    marker_pattern, _ = get_item_matchers(marker)
+    scanned_to = 0
+
+    for match in marker_pattern.finditer(page_source):
+        # Markers inside an item we already parsed (nested items) are skipped
+        if match.start() < scanned_to:
+            continue
+
+        obj, _, end = find_object_start(page_source, match.start(), match.end())
+        if obj is not None:
+            scanned_to = end
+            yield obj
+
+
+def find_first_value(obj, key, pattern=None):
+    # Depth-first in document order, i.e. first "key":"value" in object text
+    if isinstance(obj, dict):
+        for curr_key, value in obj.items():
+            if curr_key == key and isinstance(value, str) and (pattern is None or pattern.fullmatch(value)):
+                return value
+
+            found = find_first_value(value, key, pattern)
+            if found is not None:
+                return found
+
+    elif isinstance(obj, list):
+        for value in obj:
+            found = find_first_value(value, key, pattern)
+            if found is not None:
+                return found
+
+    return None
+
+
+def extract_items(page_source, name_key, price_key):
+    # Name & price always come from same item object (never paired across items)
+    _, price_pattern = get_item_matchers()
+    results = []
+
+    for obj in iter_item_objects(page_source):
+        name = find_first_value(obj, name_key)
+        price = find_first_value(obj, price_key, price_pattern)
+
+        if name is not None and price is not None:
+            results.append({name_key: name, price_key: price})
+
+    return results
+
+
+def measure_extraction_throughput(page_source, name_key, price_key, repeat=3):
+    # Best of `repeat` runs, reported as MB/s & items/s
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = extract_items(page_source, name_key, price_key)
+        timings.append(time.perf_counter() - start)
+
+    best = max(min(timings), 1e-9)
+    size_mb = len(page_source.encode("utf-8")) / 1e6
+
+    return {
+        "size_mb": round(size_mb, 3),
+        "items": len(items),
+        "seconds": best,
+        "mb_per_sec": size_mb / best,
+        "items_per_sec": len(items) / best,
+    }
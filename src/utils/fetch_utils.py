@@ -0,0 +1,205 @@
+###############################################################################
+##  `fetch_utils.py`                                                         ##
+##                                                                           ##
+##  Purpose: Handles page fetch strategies: pooled plain HTTP first (keep-   ##
+##           alive, gzip, conditional requests), browser only when needed,   ##
+##           remembering per domain which one works                          ##
+###############################################################################
+
+
+import os
+import gzip
+import time
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import add_path_prefix
+from src.utils.state_utils import read_state, write_state, merge_state_changes
+from src.utils.pacing_utils import get_host
+from src.utils.metrics_utils import timed, increment
+
+
+FETCH_STRATEGIES_FILE = add_path_prefix("data/state/fetch_strategies.json")
+HTTP_VALIDATORS_FILE = add_path_prefix("data/state/http_validators.json")
+HTTP_CACHE_DIR = add_path_prefix("data/cache/pages")
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+HTTP_TIMEOUT = 20
+
+# Domains switch to browser after this many HTTP misses in a row, & get
+# re-tried over HTTP after this long
+HTTP_MAX_FAILURES = 3
+HTTP_RETRY_SECONDS = 7 * 86400
+
+_http_session = None
+_state_lock = threading.Lock()
+_fetch_strategies = None
+_http_validators = None
+
+
+def get_http_session():
+    # One pooled (keep-alive) session per process
+    global _http_session
+
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=1)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(HTTP_HEADERS)
+        _http_session = session
+
+    return _http_session
+
+
+def load_fetch_state():
+    global _fetch_strategies, _http_validators
+
+    with _state_lock:
+        if _fetch_strategies is None:
+            _fetch_strategies = read_state(FETCH_STRATEGIES_FILE)
+        if _http_validators is None:
+            _http_validators = read_state(HTTP_VALIDATORS_FILE)
+
+    return _fetch_strategies, _http_validators
+
+
+def collect_fetch_state():
+    # This process's copies (None if never loaded), for handing to parent
+    with _state_lock:
+        return _fetch_strategies, _http_validators
+
+
+def merge_fetch_state(fetch_state):
+    # Worker's changes --> this process's state (saved once, by parent only)
+    strategies, validators = fetch_state
+    saved_strategies, saved_validators = load_fetch_state()
+
+    with _state_lock:
+        merge_state_changes(saved_strategies, strategies, FETCH_STRATEGIES_FILE)
+        merge_state_changes(saved_validators, validators, HTTP_VALIDATORS_FILE)
+
+
+def save_fetch_state():
+    # Called once per batch (not per page), & only by one process
+    with _state_lock:
+        if _fetch_strategies is not None:
+            write_state(FETCH_STRATEGIES_FILE, _fetch_strategies)
+        if _http_validators is not None:
+            write_state(HTTP_VALIDATORS_FILE, _http_validators)
+
+
+def should_try_http(domain, now=None):
+    strategies, _ = load_fetch_state()
+    record = strategies.get(domain)
+
+    if not record or record["strategy"] == "http":
+        return True
+
+    now = time.time() if now is None else now
+    return now - record["updated"] >= HTTP_RETRY_SECONDS
+
+
+def record_http_result(domain, success):
+    strategies, _ = load_fetch_state()
+
+    with _state_lock:
+        record = strategies.get(domain, {"strategy": "http", "http_failures": 0})
+        failures = 0 if success else record["http_failures"] + 1
+
+        # A single miss (e.g. one odd product page) doesn't flip whole domain
+        strategy = "browser" if failures >= HTTP_MAX_FAILURES else "http"
+        if strategy != record["strategy"]:
+            print(f"Fetch strategy for {domain}: {strategy}")
+
+        strategies[domain] = {"strategy": strategy, "http_failures": failures, "updated": time.time()}
+
+
+def get_cache_file(url):
+    url_hash = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(HTTP_CACHE_DIR, f"{url_hash}.html.gz")
+
+
+def read_cached_page(url):
+    cache_file = get_cache_file(url)
+    if not os.path.exists(cache_file):
+        return None
+
+    with gzip.open(cache_file, mode="rt", encoding="utf-8") as file:
+        return file.read()
+
+
+def write_cached_page(url, page_source):
+    cache_file = get_cache_file(url)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+    with gzip.open(cache_file, mode="wt", encoding="utf-8") as file:
+        file.write(page_source)
+
+
+@timed()
+def fetch_http(url, session=None):
+    # Plain GET w/ conditional headers (unchanged page = 304 = cached copy)
+    session = session or get_http_session()
+    _, validators = load_fetch_state()
+
+    headers = {}
+    cached = validators.get(url, {})
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as error:
+        print(f"HTTP fetch failed for {url}: {error}")
+        return None
+
+    if response.status_code == 304:
+        page_source = read_cached_page(url)
+        if page_source is not None:
+            return page_source
+
+        # Cached copy went missing, so ask again unconditionally
+        with _state_lock:
+            validators.pop(url, None)
+        return fetch_http(url, session) if headers else None
+
+    if response.status_code != 200:
+        return None
+
+    page_source = response.text
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    if etag or last_modified:
+        write_cached_page(url, page_source)
+        with _state_lock:
+            validators[url] = {"etag": etag, "last_modified": last_modified}
+
+    return page_source
+
+
+def fetch_page_source(url, browser_fetch, is_complete, session=None):
+    # Try plain HTTP first (unless it's known not to work for this domain),
+    # & only fall back to browser when page lacks the data we're after
+    domain = get_host(url)
+
+    if should_try_http(domain):
+        page_source = fetch_http(url, session)
+
+        success = page_source is not None and is_complete(page_source)
+        record_http_result(domain, success)
+        if success:
+            increment("pages_fetched_http")
+            return page_source
+
+    increment("pages_fetched_browser")
+    return browser_fetch(url)
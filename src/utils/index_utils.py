@@ -0,0 +1,216 @@
+###############################################################################
+##  `index_utils.py`                                                         ##
+##                                                                           ##
+##  Purpose: Keeps each product's price history in memory as sorted NumPy    ##
+##           arrays (timestamps & cents), so point-in-time / range queries   ##
+##           are binary searches instead of CSV loads                        ##
+###############################################################################
+
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from src.utils.metrics_utils import timed, increment
+from src.utils.data_utils import (
+    csv_exists, get_table, read_purchases_prices_csv,
+    PRICE_TRACKER_DATA_FILE, PRICE_SCRAPER_LOG_FILE, SQLITE_DB_FILE
+)
+from src.utils.sqlite_utils import connect_db, get_db_version
+
+
+# Typed data (not display files) behind each index
+INDEX_SOURCES = {
+    "tracker": PRICE_TRACKER_DATA_FILE,
+    "scraper": PRICE_SCRAPER_LOG_FILE,
+}
+
+TIMESTAMP_UNIT = "datetime64[s]"
+
+_indexes_lock = threading.Lock()
+_indexes = {}
+
+
+def to_datetime64(value):
+    # Anything pandas can parse (str, datetime, Timestamp) --> second precision
+    if isinstance(value, np.datetime64):
+        return value.astype(TIMESTAMP_UNIT)
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), "s")
+
+
+class PriceIndex:
+    def __init__(self):
+        # name --> slot in timestamps / prices lists (+ casefolded lookup)
+        self.names = {}
+        self.lookup = {}
+        self.timestamps = []
+        self.prices = []
+
+    @classmethod
+    def from_frame(cls, items):
+        index = cls()
+        index.add_items(items)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.get_slot(name) is not None
+
+    def get_slot(self, name):
+        slot = self.names.get(name)
+        return slot if slot is not None else self.lookup.get(str(name).casefold())
+
+    def get_series(self, name):
+        slot = self.get_slot(name)
+        if slot is None:
+            raise KeyError(f"Error, no price history for '{name}'")
+        return self.timestamps[slot], self.prices[slot]
+
+    def set_series(self, name, timestamps, prices):
+        slot = self.names.get(name)
+        if slot is None:
+            slot = self.names[name] = len(self.timestamps)
+            self.lookup.setdefault(name.casefold(), slot)
+            self.timestamps.append(timestamps)
+            self.prices.append(prices)
+        else:
+            self.timestamps[slot] = timestamps
+            self.prices[slot] = prices
+
+    def add_items(self, items, replace_names=()):
+        # Rows w/ timestamp, name, price (cents); products in replace_names
+        # drop their old history first
+        items = items.dropna(subset=["price"])
+        if items.empty:
+            return
+
+        # One sort, then split into contiguous per-product runs
+        items = items.assign(timestamp=pd.to_datetime(items["timestamp"]))
+        items = items.sort_values(by=["name", "timestamp"], kind="stable")
+
+        names = items["name"].to_numpy(dtype=object)
+        timestamps = items["timestamp"].to_numpy().astype(TIMESTAMP_UNIT)
+        prices = items["price"].to_numpy(dtype=np.int64)
+
+        starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+        ends = np.r_[starts[1:], len(names)]
+
+        replace_names = set(replace_names)
+        for start, end in zip(starts, ends):
+            name = names[start]
+            new_timestamps, new_prices = timestamps[start:end].copy(), prices[start:end].copy()
+
+            slot = self.names.get(name)
+            if slot is not None and name not in replace_names:
+                new_timestamps, new_prices = merge_series(
+                    self.timestamps[slot], self.prices[slot], new_timestamps, new_prices
+                )
+            self.set_series(name, new_timestamps, new_prices)
+
+    def price_at(self, name, when):
+        # Price in effect at `when` (latest point at or before it)
+        timestamps, prices = self.get_series(name)
+        pos = np.searchsorted(timestamps, to_datetime64(when), side="right") - 1
+        return int(prices[pos]) if pos >= 0 else None
+
+    def range(self, name, start=None, end=None):
+        # Points w/ start <= timestamp <= end (either side open if None);
+        # returns views, not copies
+        timestamps, prices = self.get_series(name)
+        lo = np.searchsorted(timestamps, to_datetime64(start), side="left") if start is not None else 0
+        hi = np.searchsorted(timestamps, to_datetime64(end), side="right") if end is not None else len(timestamps)
+        return timestamps[lo:hi], prices[lo:hi]
+
+    def min_over(self, name, start=None, end=None):
+        # (timestamp, cents) of lowest price in range (earliest if tied)
+        timestamps, prices = self.range(name, start, end)
+        if not len(prices):
+            return None
+
+        pos = int(np.argmin(prices))
+        return timestamps[pos], int(prices[pos])
+
+    def last_n(self, name, n):
+        timestamps, prices = self.get_series(name)
+        start = max(len(timestamps) - max(n, 0), 0)
+        return timestamps[start:], prices[start:]
+
+
+def merge_series(timestamps, prices, new_timestamps, new_prices):
+    # Common case: new points come after existing ones, so just append
+    if not len(timestamps) or new_timestamps[0] >= timestamps[-1]:
+        return np.concatenate([timestamps, new_timestamps]), np.concatenate([prices, new_prices])
+
+    # Backfilled points: re-sort (stable, so existing points stay first)
+    merged_timestamps = np.concatenate([timestamps, new_timestamps])
+    order = np.argsort(merged_timestamps, kind="stable")
+    return merged_timestamps[order], np.concatenate([prices, new_prices])[order]
+
+
+def get_source_file(source):
+    if source not in INDEX_SOURCES:
+        raise ValueError(f"Error, unknown price index source '{source}'")
+    return INDEX_SOURCES[source]
+
+
+def get_source_version(source):
+    # Changes whenever backing data does (e.g. written by another run)
+    source_file = get_source_file(source)
+
+    if get_table(source_file):
+        if not os.path.exists(SQLITE_DB_FILE):
+            return None
+        return get_db_version(connect_db(SQLITE_DB_FILE))
+
+    try:
+        stat = os.stat(source_file)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@timed()
+def load_price_index(source):
+    source_file = get_source_file(source)
+    if not csv_exists(source_file):
+        return PriceIndex()
+
+    items = read_purchases_prices_csv(source_file, ["timestamp", "name", "price"])
+    return PriceIndex.from_frame(items)
+
+
+def get_price_index(source="scraper"):
+    # Loaded once per process, reloaded only if data changed underneath
+    version = get_source_version(source)
+
+    with _indexes_lock:
+        cached = _indexes.get(source)
+        if cached and cached[0] == version:
+            increment("price_index_hits")
+            return cached[1]
+
+        index = load_price_index(source)
+        _indexes[source] = (version, index)
+        increment("price_index_loads")
+        return index
+
+
+def refresh_price_index(source, items, replace_names=()):
+    # After our own write: extend cached index in place (cheaper than reload);
+    # nothing to do if it was never loaded in this process
+    with _indexes_lock:
+        cached = _indexes.get(source)
+        if not cached:
+            return
+
+        index = cached[1]
+        index.add_items(items[["timestamp", "name", "price"]], replace_names)
+        _indexes[source] = (get_source_version(source), index)
+
+
+def clear_price_indexes():
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,107 @@
+###############################################################################
+##  `match_utils.py`                                                         ##
+##                                                                           ##
+##  Purpose: Handles fuzzy matching of tracked product names against items   ##
+##           scraped from a page (batched in rapidfuzz, memoized per         ##
+##           candidate set)                                                  ##
+###############################################################################
+
+
+import hashlib
+import threading
+from rapidfuzz import fuzz, process
+
+from src.config import add_path_prefix
+from src.utils.state_utils import read_state, write_state, merge_state_changes
+from src.utils.metrics_utils import increment
+
+
+MATCH_CACHE_FILE = add_path_prefix("data/state/match_cache.json")
+
+# Any score above 0 counts as a match (first best one wins)
+MATCH_SCORE_CUTOFF = 1e-9
+
+_cache_lock = threading.Lock()
+_match_cache = None
+
+
+def load_match_cache():
+    global _match_cache
+
+    with _cache_lock:
+        if _match_cache is None:
+            _match_cache = read_state(MATCH_CACHE_FILE)
+
+    return _match_cache
+
+
+def collect_match_cache():
+    # This process's copy (None if never loaded), for handing to parent
+    with _cache_lock:
+        return _match_cache
+
+
+def merge_match_cache(match_cache):
+    # Worker's changes --> this process's cache (saved once, by parent only)
+    cache = load_match_cache()
+    with _cache_lock:
+        merge_state_changes(cache, match_cache, MATCH_CACHE_FILE)
+
+
+def save_match_cache():
+    with _cache_lock:
+        if _match_cache is not None:
+            write_state(MATCH_CACHE_FILE, _match_cache)
+
+
+def get_candidates_fingerprint(candidate_names):
+    joined = "\x1f".join(candidate_names)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def best_match_index(name, candidate_names):
+    # Same result as looping fuzz.ratio & keeping first strictly better score
+    result = process.extractOne(name, candidate_names, scorer=fuzz.ratio, score_cutoff=MATCH_SCORE_CUTOFF)
+    return None if result is None else result[2]
+
+
+def best_match_indexes(names, candidate_names):
+    # Many names vs same candidates in one scoring matrix (argmax = first best)
+    if not names or not candidate_names:
+        return [None] * len(names)
+
+    scores = process.cdist(names, candidate_names, scorer=fuzz.ratio, score_cutoff=MATCH_SCORE_CUTOFF)
+    best = scores.argmax(axis=1)
+
+    return [int(index) if scores[row, index] > 0 else None for row, index in enumerate(best)]
+
+
+def find_matches(names, potential_matches, key="name", use_cache=True):
+    candidate_names = [item[key] for item in potential_matches]
+    fingerprint = get_candidates_fingerprint(candidate_names)
+    cache = load_match_cache() if use_cache else {}
+
+    # Unchanged listing for this name means same match, so skip scoring
+    indexes, to_score = {}, []
+    for name in dict.fromkeys(names):
+        cached = cache.get(name)
+        if cached and cached["fingerprint"] == fingerprint:
+            indexes[name] = cached["index"]
+        else:
+            to_score.append(name)
+
+    increment("match_cache_hits", len(indexes))
+    increment("match_cache_misses", len(to_score))
+
+    if len(to_score) == 1:
+        scored = [best_match_index(to_score[0], candidate_names)]
+    else:
+        scored = best_match_indexes(to_score, candidate_names)
+
+    for name, index in zip(to_score, scored):
+        indexes[name] = index
+        if use_cache:
+            with _cache_lock:
+                cache[name] = {"fingerprint": fingerprint, "index": index}
+
+    return [None if indexes[name] is None else potential_matches[indexes[name]] for name in names]
@@ -0,0 +1,238 @@
+###############################################################################
+##  `metrics_utils.py`                                                       ##
+##                                                                           ##
+##  Purpose: Handles run instrumentation: timed spans & counters per stage,  ##
+##           written out as JSON summary (& optional Prometheus text file).  ##
+##           Off by default, in which case wrappers just call through        ##
+###############################################################################
+
+
+import os
+import json
+import time
+import tempfile
+import threading
+import multiprocessing
+from functools import wraps
+from datetime import datetime
+
+
+METRICS_PREFIX = "price_tracker"
+
+_lock = threading.Lock()
+_enabled = False
+_started = None
+_spans = {}
+_counters = {}
+
+
+class NullSpan:
+    # Shared no-op span for when metrics are off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record_span(self.name, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+
+def enable_metrics():
+    global _enabled, _started
+
+    with _lock:
+        _enabled = True
+        _started = _started or time.time()
+
+
+def disable_metrics():
+    global _enabled
+    _enabled = False
+
+
+def metrics_enabled():
+    return _enabled
+
+
+def reset_metrics():
+    global _started
+
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.time() if _enabled else None
+
+
+def record_span(name, seconds, failed=False):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = {"count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0}
+
+        stats["count"] += 1
+        stats["errors"] += failed
+        stats["total_s"] += seconds
+        stats["max_s"] = max(stats["max_s"], seconds)
+
+
+def span(name):
+    return Span(name) if _enabled else NULL_SPAN
+
+
+def timed(name=None):
+    # Decorator version of span (named after function unless given)
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record_span(span_name, time.perf_counter() - start, failed)
+
+        return wrapper
+    return decorator
+
+
+def increment(name, value=1):
+    if not _enabled:
+        return
+
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def collect_metrics():
+    # Snapshot (e.g. to hand back from a worker process)
+    with _lock:
+        return {
+            "spans": {name: dict(stats) for name, stats in _spans.items()},
+            "counters": dict(_counters),
+        }
+
+
+def run_worker_task(fn, *args, metrics_on=False):
+    # Runs a pool task, handing back only that task's metrics (forked workers
+    # inherit parent's totals, & reused ones still hold earlier tasks'). Run
+    # in-process, task already counts toward parent's totals, so none returned
+    if multiprocessing.parent_process() is None:
+        return fn(*args), None
+
+    if metrics_on:
+        enable_metrics()
+    reset_metrics()
+
+    return fn(*args), collect_metrics()
+
+
+def merge_metrics(snapshot):
+    if not _enabled or not snapshot:
+        return
+
+    with _lock:
+        for name, stats in snapshot["spans"].items():
+            curr = _spans.setdefault(name, {"count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+            curr["count"] += stats["count"]
+            curr["errors"] += stats["errors"]
+            curr["total_s"] += stats["total_s"]
+            curr["max_s"] = max(curr["max_s"], stats["max_s"])
+
+        for name, value in snapshot["counters"].items():
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def build_summary():
+    snapshot = collect_metrics()
+    started = _started or time.time()
+
+    spans = {
+        name: {**stats, "total_s": round(stats["total_s"], 6), "max_s": round(stats["max_s"], 6)}
+        for name, stats in sorted(snapshot["spans"].items(), key=lambda item: -item[1]["total_s"])
+    }
+
+    return {
+        "started": datetime.fromtimestamp(started).strftime("%Y-%m-%d %H:%M:%S"),
+        "duration_s": round(time.time() - started, 3),
+        "spans": spans,
+        "counters": dict(sorted(snapshot["counters"].items())),
+    }
+
+
+def format_prometheus(summary):
+    # Prometheus text exposition format (e.g. for node_exporter textfile dir)
+    lines = [
+        f"# TYPE {METRICS_PREFIX}_run_duration_seconds gauge",
+        f"{METRICS_PREFIX}_run_duration_seconds {summary['duration_s']}",
+    ]
+
+    span_metrics = [
+        ("span_calls_total", "counter", "count"),
+        ("span_errors_total", "counter", "errors"),
+        ("span_seconds_total", "counter", "total_s"),
+        ("span_seconds_max", "gauge", "max_s"),
+    ]
+    for metric, metric_type, key in span_metrics:
+        lines.append(f"# TYPE {METRICS_PREFIX}_{metric} {metric_type}")
+        for name, stats in summary["spans"].items():
+            lines.append(f'{METRICS_PREFIX}_{metric}{{span="{name}"}} {stats[key]}')
+
+    lines.append(f"# TYPE {METRICS_PREFIX}_events_total counter")
+    for name, value in summary["counters"].items():
+        lines.append(f'{METRICS_PREFIX}_events_total{{event="{name}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_text_atomic(file_path, text):
+    folder = os.path.dirname(file_path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+
+    # Unique temp file per write, so concurrent runs never swap in each
+    # other's half-written files
+    fd, tmp_file = tempfile.mkstemp(dir=folder or ".", prefix=f"{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode="w") as file:
+            file.write(text)
+        # mkstemp files are owner-only; keep them readable (e.g. by a
+        # Prometheus textfile collector)
+        os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, file_path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def write_metrics(json_file, prometheus_file=None):
+    summary = build_summary()
+
+    write_text_atomic(json_file, json.dumps(summary, indent=2))
+    if prometheus_file:
+        write_text_atomic(prometheus_file, format_prometheus(summary))
+
+    return summary
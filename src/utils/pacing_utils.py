@@ -0,0 +1,141 @@
+###############################################################################
+##  `pacing_utils.py`                                                        ##
+##                                                                           ##
+##  Purpose: Handles asyncio scheduling of page fetches w/ per-host pacing   ##
+##           (token bucket), so waits on one host overlap work on others     ##
+###############################################################################
+
+
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from urllib.parse import urlparse
+
+
+class MonotonicClock:
+    def now(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock:
+    # Virtual time for offline tests: whenever every task is waiting, jump
+    # straight to the earliest wake-up instead of actually sleeping
+    def __init__(self, start=0.0):
+        self._now = start
+        self._sleepers = []
+        self._counter = itertools.count()
+
+    def now(self):
+        return self._now
+
+    async def sleep(self, seconds):
+        wake_up = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + max(0.0, seconds), next(self._counter), wake_up))
+        await wake_up
+
+    async def _settle(self, rounds=20):
+        # Give every runnable task a chance to reach its next sleep
+        for _ in range(rounds):
+            await asyncio.sleep(0)
+
+    def run(self, coro):
+        async def drive():
+            task = asyncio.ensure_future(coro)
+
+            while not task.done():
+                await self._settle()
+                if task.done() or not self._sleepers:
+                    continue
+
+                wake_time = self._sleepers[0][0]
+                self._now = wake_time
+                while self._sleepers and self._sleepers[0][0] == wake_time:
+                    _, _, wake_up = heapq.heappop(self._sleepers)
+                    if not wake_up.done():
+                        wake_up.set_result(None)
+
+            return task.result()
+
+        return asyncio.run(drive())
+
+
+def get_host(url):
+    return urlparse(url).netloc.lower()
+
+
+class HostPacer:
+    # Per-host token bucket (GCRA form): on average `rate` requests per
+    # second to any one host, w/ up to `burst` back to back. Slots are
+    # reserved up front, so concurrent tasks never double book a host
+    def __init__(self, rate, burst=1, clock=None):
+        if rate <= 0 or burst < 1:
+            raise ValueError("Error, pacing rate must be positive & burst at least 1")
+
+        self.interval = 1.0 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self.clock = clock or MonotonicClock()
+        self._theoretical_arrival = {}
+
+    def _next_start(self, host, now):
+        arrival = max(self._theoretical_arrival.get(host, now), now)
+        return arrival, max(now, arrival - self.tolerance)
+
+    def wait_time(self, url):
+        # How long a request to this URL's host would wait right now (w/o booking)
+        now = self.clock.now()
+        _, start = self._next_start(get_host(url), now)
+        return start - now
+
+    def reserve(self, url):
+        # Books next slot for this URL's host, returns how long to wait for it
+        host = get_host(url)
+        now = self.clock.now()
+
+        arrival, start = self._next_start(host, now)
+        self._theoretical_arrival[host] = arrival + self.interval
+
+        return start - now
+
+    async def acquire(self, url):
+        wait = self.reserve(url)
+        if wait > 0:
+            await self.clock.sleep(wait)
+
+
+async def run_paced(jobs, pacer=None, concurrency=1):
+    # Jobs are (url, async callable) pairs, run by `concurrency` workers.
+    # Each free worker takes the job whose host can be hit soonest, so
+    # waiting on one host overlaps w/ work on others. Results keep job order
+    results = [None] * len(jobs)
+
+    pending_by_host = {}
+    for i, (url, _) in enumerate(jobs):
+        pending_by_host.setdefault(get_host(url), deque()).append(i)
+
+    def next_job():
+        if pacer:
+            host = min(pending_by_host, key=lambda host: pacer.wait_time(jobs[pending_by_host[host][0]][0]))
+        else:
+            host = min(pending_by_host, key=lambda host: pending_by_host[host][0])
+
+        i = pending_by_host[host].popleft()
+        if not pending_by_host[host]:
+            del pending_by_host[host]
+        return i
+
+    async def worker():
+        while pending_by_host:
+            i = next_job()
+            url, job = jobs[i]
+
+            if pacer:
+                await pacer.acquire(url)
+            results[i] = await job()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(jobs))))))
+    return results
@@ -0,0 +1,127 @@
+###############################################################################
+##  `price_utils.py`                                                         ##
+##                                                                           ##
+##  Purpose: Handles price representation: prices are int64 cents (percent   ##
+##           changes floats) everywhere but display exports, which get       ##
+##           formatted in one vectorized step                                ##
+###############################################################################
+
+
+import numpy as np
+import pandas as pd
+
+
+# Columns holding cents (nullable ints) & percentages (floats) in tracker /
+# scraper data
+ROLLING_COLUMNS = ["rolling_mean", "rolling_percentile", "window_mean", "window_min", "window_max", "ewma_price"]
+PRICE_COLUMNS = ["price", "prev_price", "price_change", "avg_price", "diff_from_avg", *ROLLING_COLUMNS]
+PERCENT_COLUMNS = ["percent_change"]
+
+PRICE_DTYPES = {
+    **{col: "Int64" for col in PRICE_COLUMNS},
+    **{col: "float64" for col in PERCENT_COLUMNS},
+    "quantity": "Int64",
+}
+
+# Percent changes are kept to this many decimals (display shows 2)
+PERCENT_DECIMALS = 4
+
+MISSING_DISPLAY = "N/A"
+
+
+def to_cents(prices):
+    # Integer columns are already cents; anything else is dollars, either as
+    # numbers or display strs (e.g. "$1,234.56", "N/A")
+    prices = pd.Series(prices)
+
+    if pd.api.types.is_integer_dtype(prices):
+        return prices.astype("Int64")
+
+    if not pd.api.types.is_numeric_dtype(prices):
+        prices = pd.to_numeric(prices.astype(str).str.replace(r"[\$,]", "", regex=True), errors="coerce")
+
+    return pd.Series(np.rint(prices.astype(float) * 100), index=prices.index).astype("Int64")
+
+
+def to_percent(percentages):
+    percentages = pd.Series(percentages)
+
+    if not pd.api.types.is_numeric_dtype(percentages):
+        percentages = percentages.astype(str).str.replace(r"[%,]", "", regex=True)
+
+    return pd.to_numeric(percentages, errors="coerce").astype(float)
+
+
+def round_cents(values):
+    # e.g. averages (fractional cents) --> nearest cent
+    values = pd.Series(values, dtype=float)
+    return pd.Series(np.rint(values), index=values.index).astype("Int64")
+
+
+def format_hundredths(hundredths, prefix="", suffix=""):
+    # Ints in hundredths --> "1,234.56" style strs (w/ prefix / suffix), all
+    # through vectorized str ops
+    hundredths = pd.Series(hundredths).astype("Int64")
+    missing = hundredths.isna()
+
+    values = hundredths.fillna(0).astype("int64")
+    absolute = values.abs()
+
+    sign = pd.Series(np.where(values < 0, "-", ""), index=values.index)
+    whole = (absolute // 100).astype(str).str.replace(r"\B(?=(\d{3})+$)", ",", regex=True)
+    fraction = (absolute % 100).astype(str).str.zfill(2)
+
+    formatted = prefix + sign + whole + "." + fraction + suffix
+    return formatted.where(~missing, MISSING_DISPLAY)
+
+
+def format_cents(cents):
+    # Same look as before (e.g. "$1,001.25", "$-0.50", "N/A")
+    return format_hundredths(cents, prefix="$")
+
+
+def format_percent(percentages):
+    percentages = pd.Series(percentages, dtype=float)
+    return format_hundredths(round_cents(percentages * 100), suffix="%")
+
+
+def format_prices_for_display(items):
+    # Single pass over whichever price / percent columns are present
+    items = items.copy()
+
+    for col in PRICE_COLUMNS:
+        if col in items:
+            items[col] = format_cents(items[col])
+    for col in PERCENT_COLUMNS:
+        if col in items:
+            items[col] = format_percent(items[col])
+
+    return items
+
+
+def parse_display_prices(items):
+    # Display strs (older files) --> typed cents / percent columns
+    items = items.copy()
+
+    for col in PRICE_COLUMNS:
+        if col in items:
+            items[col] = to_cents(items[col])
+    for col in PERCENT_COLUMNS:
+        if col in items:
+            items[col] = to_percent(items[col])
+    if "quantity" in items:
+        items["quantity"] = pd.to_numeric(items["quantity"], errors="coerce").astype("Int64")
+
+    return items
+
+
+def apply_price_dtypes(items):
+    # e.g. after reading ints back as floats (missing values) from SQLite
+    dtypes = {col: dtype for col, dtype in PRICE_DTYPES.items() if col in items}
+    return items.astype(dtypes)
+
+
+def has_display_prices(values):
+    # True if values still look like display strs (older data)
+    values = pd.Series(values).dropna().astype(str)
+    return bool(values.str.contains(r"[\$%]|N/A", regex=True).any())
@@ -0,0 +1,194 @@
+###############################################################################
+##  `rolling_utils.py`                                                       ##
+##                                                                           ##
+##  Purpose: Handles windowed price stats per product (N-point & N-day       ##
+##           means, min / max, percentile, EWMA): vectorized for full        ##
+##           recomputes, & kept up incrementally from saved window state     ##
+###############################################################################
+
+
+from bisect import bisect_left, insort
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from pandas.api.indexers import BaseIndexer
+
+from src.utils.price_utils import round_cents, ROLLING_COLUMNS
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Unrounded EWMA (cents, float), kept alongside rounded column so saved state
+# continues from exact value
+EWMA_EXACT_COLUMN = "ewma_exact"
+
+
+def to_epoch_seconds(timestamps):
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy().astype("datetime64[s]").astype(np.int64)
+
+
+class RollingWindow:
+    # One product's windows; each new point updates every stat in O(1)
+    # amortized (running sums, monotonic deques), except percentile, which
+    # keeps a sorted copy of point window (O(log w) search + small memmove)
+    def __init__(self, config):
+        self.config = list(config)
+        self.points, days, self.alpha, percentile = config
+        self.window_seconds = days * SECONDS_PER_DAY
+        self.quantile = percentile / 100
+
+        # Last N (timestamp, price) points
+        self.recent = deque()
+        self.recent_sum = 0
+        self.recent_sorted = []
+
+        # Points in last N days, plus candidates for min / max (w/ prices
+        # increasing / decreasing front to back)
+        self.window = deque()
+        self.window_sum = 0
+        self.mins = deque()
+        self.maxs = deque()
+
+        self.ewma = None
+
+    @classmethod
+    def from_state(cls, rolling_state, config):
+        window = cls(config)
+        for timestamp, price in rolling_state["points"]:
+            window.add(timestamp, price)
+        window.ewma = rolling_state["ewma"]
+        return window
+
+    def to_state(self):
+        # Both windows end at latest point, so longer one covers the other
+        points = self.recent if len(self.recent) >= len(self.window) else self.window
+        return {"config": self.config, "points": [list(point) for point in points], "ewma": self.ewma}
+
+    def get_percentile(self):
+        # Linear interpolation between closest ranks (same as pandas default)
+        values = self.recent_sorted
+        pos = (len(values) - 1) * self.quantile
+        lo = int(pos)
+
+        if lo == len(values) - 1:
+            return float(values[lo])
+        return values[lo] + (values[lo + 1] - values[lo]) * (pos - lo)
+
+    def add(self, timestamp, price):
+        # Points must come in time order; returns unrounded stats in
+        # ROLLING_COLUMNS order
+        if len(self.recent) == self.points:
+            _, old_price = self.recent.popleft()
+            self.recent_sum -= old_price
+            del self.recent_sorted[bisect_left(self.recent_sorted, old_price)]
+
+        self.recent.append((timestamp, price))
+        self.recent_sum += price
+        insort(self.recent_sorted, price)
+
+        # Window is (timestamp - N days, timestamp]
+        cutoff = timestamp - self.window_seconds
+        self.window.append((timestamp, price))
+        self.window_sum += price
+        while self.window[0][0] <= cutoff:
+            self.window_sum -= self.window.popleft()[1]
+
+        while self.mins and self.mins[-1][1] >= price:
+            self.mins.pop()
+        self.mins.append((timestamp, price))
+        while self.mins[0][0] <= cutoff:
+            self.mins.popleft()
+
+        while self.maxs and self.maxs[-1][1] <= price:
+            self.maxs.pop()
+        self.maxs.append((timestamp, price))
+        while self.maxs[0][0] <= cutoff:
+            self.maxs.popleft()
+
+        self.ewma = float(price) if self.ewma is None else self.alpha * price + (1 - self.alpha) * self.ewma
+
+        return (
+            self.recent_sum / len(self.recent),
+            self.get_percentile(),
+            self.window_sum / len(self.window),
+            self.mins[0][1],
+            self.maxs[0][1],
+            self.ewma,
+        )
+
+
+class WindowBounds(BaseIndexer):
+    # Precomputed [start, end) rows per window, so one rolling pass covers
+    # every product (bounds never reach into another product's rows)
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        return self.start, self.end
+
+
+def get_window_bounds(names, seconds, config):
+    # Expects rows sorted by name, then timestamp
+    points, days = config[0], config[1]
+    window_seconds = days * SECONDS_PER_DAY
+    rows = np.arange(len(names))
+
+    is_first = np.r_[True, names[1:] != names[:-1]] if len(names) else np.zeros(0, dtype=bool)
+    first_rows = np.maximum.accumulate(np.where(is_first, rows, 0))
+    point_start = np.maximum(rows - points + 1, first_rows)
+
+    # Products laid out end to end on one time axis (w/ gaps wider than
+    # window), so a single binary search finds each time window's start
+    offsets = seconds - seconds.min() if len(seconds) else seconds
+    stride = (int(offsets.max()) if len(offsets) else 0) + int(window_seconds) + 1
+    keys = (np.cumsum(is_first) - 1) * stride + offsets
+    time_start = np.searchsorted(keys, keys - window_seconds, side="right")
+
+    end = rows + 1
+    return WindowBounds(start=point_start, end=end), WindowBounds(start=time_start, end=end)
+
+
+def calculate_rolling_stats(items, config):
+    # Expects items sorted by name, then timestamp (w/ prices in cents)
+    alpha, percentile = config[2], config[3]
+
+    names = items["name"].to_numpy(dtype=object)
+    prices = pd.Series(items["price"].to_numpy(dtype=float, na_value=np.nan))
+    point_bounds, time_bounds = get_window_bounds(names, to_epoch_seconds(items["timestamp"]), config)
+
+    point_window = prices.rolling(point_bounds, min_periods=1)
+    time_window = prices.rolling(time_bounds, min_periods=1)
+
+    stats = pd.DataFrame({
+        "rolling_mean": point_window.mean().to_numpy(),
+        "rolling_percentile": point_window.quantile(percentile / 100).to_numpy(),
+        "window_mean": time_window.mean().to_numpy(),
+        "window_min": time_window.min().to_numpy(),
+        "window_max": time_window.max().to_numpy(),
+        EWMA_EXACT_COLUMN: prices.groupby(names, sort=False).ewm(alpha=alpha, adjust=False).mean().to_numpy(),
+    }, index=items.index)
+
+    stats["ewma_price"] = stats[EWMA_EXACT_COLUMN]
+    for col in ROLLING_COLUMNS:
+        stats[col] = round_cents(stats[col])
+
+    return stats[ROLLING_COLUMNS + [EWMA_EXACT_COLUMN]]
+
+
+def build_rolling_state(seconds, prices, ewma, config):
+    # From one product's full (sorted) history, as epoch seconds & cents:
+    # only points still inside either window need saving
+    points, days = config[0], config[1]
+
+    in_days = int(np.searchsorted(seconds, seconds[-1] - days * SECONDS_PER_DAY, side="right"))
+    start = min(max(len(prices) - points, 0), in_days)
+
+    window = RollingWindow(config)
+    for timestamp, price in zip(seconds[start:].tolist(), prices[start:].tolist()):
+        window.add(timestamp, price)
+    window.ewma = float(ewma)
+
+    return window.to_state()
+
+
+def rolling_state_matches(state, config):
+    # False if saved windows predate rolling stats or used other settings
+    return all(product.get("rolling", {}).get("config") == list(config) for product in state.values())
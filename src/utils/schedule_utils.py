@@ -0,0 +1,225 @@
+###############################################################################
+##  `schedule_utils.py`                                                      ##
+##                                                                           ##
+##  Purpose: Handles adaptive scrape scheduling: each item's next check      ##
+##           time comes from its price history (how often & how much it      ##
+##           changes) & whether its page content changed at all              ##
+###############################################################################
+
+
+import json
+import hashlib
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.config import TIMESTAMP_FORMAT, add_path_prefix
+from src.utils.state_utils import read_state, write_state, merge_state_changes
+from src.utils.price_utils import to_cents
+from src.utils.data_utils import csv_exists, read_purchases_prices_csv, PRICE_SCRAPER_LOG_FILE
+
+
+SCRAPE_SCHEDULE_FILE = add_path_prefix("data/state/scrape_schedule.json")
+PAGE_FINGERPRINTS_FILE = add_path_prefix("data/state/page_fingerprints.json")
+
+# Unchanged pages double the interval each time, up to this many doublings
+MAX_UNCHANGED_BACKOFF = 4
+
+_fingerprints_lock = threading.Lock()
+_page_fingerprints = None
+
+
+def get_page_fingerprint(results):
+    # Fingerprint of extracted item data (markup noise like ads doesn't count)
+    serialized = json.dumps(results, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def record_page_fingerprint(name, results):
+    # Returns True if page content is unchanged since item's last check
+    global _page_fingerprints
+    fingerprint = get_page_fingerprint(results)
+
+    with _fingerprints_lock:
+        if _page_fingerprints is None:
+            _page_fingerprints = read_state(PAGE_FINGERPRINTS_FILE)
+
+        prev = _page_fingerprints.get(name, {})
+        unchanged = prev.get("fingerprint") == fingerprint
+        _page_fingerprints[name] = {
+            "fingerprint": fingerprint,
+            "unchanged": prev.get("unchanged", 0) + 1 if unchanged else 0,
+        }
+
+    return unchanged
+
+
+def collect_page_fingerprints():
+    # This process's copy (None if never loaded), for handing to parent
+    with _fingerprints_lock:
+        return _page_fingerprints
+
+
+def merge_page_fingerprints(page_fingerprints):
+    # Worker's changes --> this process's copy (saved once, by parent only)
+    global _page_fingerprints
+
+    with _fingerprints_lock:
+        if _page_fingerprints is None:
+            _page_fingerprints = read_state(PAGE_FINGERPRINTS_FILE)
+        merge_state_changes(_page_fingerprints, page_fingerprints, PAGE_FINGERPRINTS_FILE)
+
+
+def save_page_fingerprints():
+    with _fingerprints_lock:
+        if _page_fingerprints is not None:
+            write_state(PAGE_FINGERPRINTS_FILE, _page_fingerprints)
+
+
+def add_price_point(stats, timestamp, price):
+    # Running (JSON friendly) stats for one item, updated one point at a time;
+    # % change spread kept Welford style so volatility needs no history
+    timestamp = pd.Timestamp(timestamp).strftime(TIMESTAMP_FORMAT)
+
+    if stats is None:
+        return {
+            "points": 1, "first": timestamp, "last": timestamp, "last_price": float(price),
+            "last_change": None, "num_changes": 0, "change_mean": 0.0, "change_m2": 0.0,
+        }
+
+    # Already counted (e.g. re-seen point)
+    if timestamp <= stats["last"]:
+        return stats
+
+    prev_price = stats["last_price"]
+    stats.update(points=stats["points"] + 1, last=timestamp, last_price=float(price))
+
+    if price != prev_price:
+        percent_change = (price - prev_price) / prev_price * 100 if prev_price else 0.0
+        num_changes = stats["num_changes"] + 1
+        delta = percent_change - stats["change_mean"]
+        change_mean = stats["change_mean"] + delta / num_changes
+
+        stats.update(
+            last_change=timestamp, num_changes=num_changes, change_mean=change_mean,
+            change_m2=stats["change_m2"] + delta * (percent_change - change_mean),
+        )
+
+    return stats
+
+
+def build_price_stats(timestamps, prices):
+    # Expects one item's history, sorted by time
+    stats = None
+    for timestamp, price in zip(timestamps, prices):
+        stats = add_price_point(stats, timestamp, price)
+    return stats
+
+
+def summarize_price_stats(stats, now):
+    first = datetime.strptime(stats["first"], TIMESTAMP_FORMAT)
+    last = datetime.strptime(stats["last"], TIMESTAMP_FORMAT)
+    last_change = datetime.strptime(stats["last_change"] or stats["first"], TIMESTAMP_FORMAT)
+    num_changes = stats["num_changes"]
+
+    return {
+        "points": stats["points"],
+        "num_changes": num_changes,
+        "span_hours": (last - first).total_seconds() / 3600,
+        "volatility": (stats["change_m2"] / num_changes) ** 0.5 if num_changes else 0.0,
+        "hours_since_change": (now - last_change).total_seconds() / 3600,
+    }
+
+
+def summarize_price_history(timestamps, prices, now):
+    # Expects one item's history, sorted by time
+    return summarize_price_stats(build_price_stats(timestamps, prices), now)
+
+
+def compute_check_interval(summary, min_hours, max_hours, unchanged_checks=0):
+    # Too little history to judge, so check again soon
+    if summary["points"] < 2:
+        return min_hours
+
+    if summary["num_changes"]:
+        # Check ~twice per typical gap between changes, sooner for big swings,
+        # but back off if it's been quiet for a while
+        interval = summary["span_hours"] / summary["num_changes"] / 2
+        interval /= 1 + summary["volatility"] / 10
+        interval = max(interval, summary["hours_since_change"] / 4)
+    else:
+        # Never changed, so back off w/ how long it's been stable
+        interval = summary["hours_since_change"] / 2
+
+    interval *= 2 ** min(unchanged_checks, MAX_UNCHANGED_BACKOFF)
+
+    return min(max(interval, min_hours), max_hours)
+
+
+def to_price_points(items):
+    # Timestamp, name, price (cents) per row, sorted per item by time
+    points = pd.DataFrame(items, columns=["timestamp", "name", "price"])
+    points["timestamp"] = pd.to_datetime(points["timestamp"])
+    points["price"] = to_cents(points["price"]).astype(float)
+    return points.dropna(subset=["price"]).sort_values(by=["name", "timestamp"], kind="stable")
+
+
+def update_scrape_schedule(items, min_hours, max_hours, now=None):
+    # Called w/ newly scraped items (timestamp, name, price) once they're
+    # tracked. Each item's running price stats live in schedule state, so only
+    # new points get looked at (log only read once per item, to seed its stats)
+    items = [item for item in items if item]
+    if not items:
+        return {}
+
+    now = now or datetime.now()
+    new_points = to_price_points(items)
+    names = list(dict.fromkeys(item["name"] for item in items))
+
+    schedule = read_state(SCRAPE_SCHEDULE_FILE)
+    fingerprints = read_state(PAGE_FINGERPRINTS_FILE)
+    stats_by_name = {name: schedule[name]["stats"] for name in names if "stats" in schedule.get(name, {})}
+
+    # Log already has new points (tracked 1st), so seeded items skip them below
+    to_seed = [name for name in names if name not in stats_by_name]
+    if to_seed and csv_exists(PRICE_SCRAPER_LOG_FILE):
+        history = to_price_points(read_purchases_prices_csv(PRICE_SCRAPER_LOG_FILE, ["timestamp", "name", "price"], names=to_seed))
+        for name, item_history in history.groupby("name", sort=False):
+            stats_by_name[name] = build_price_stats(item_history["timestamp"], item_history["price"])
+    seeded = set(to_seed) & set(stats_by_name)
+
+    for name, item_points in new_points.groupby("name", sort=False):
+        if name in seeded:
+            continue
+        stats = stats_by_name.get(name)
+        for timestamp, price in zip(item_points["timestamp"], item_points["price"]):
+            stats = add_price_point(stats, timestamp, price)
+        stats_by_name[name] = stats
+
+    for name, stats in stats_by_name.items():
+        summary = summarize_price_stats(stats, now)
+        unchanged_checks = fingerprints.get(name, {}).get("unchanged", 0)
+        interval = compute_check_interval(summary, min_hours, max_hours, unchanged_checks)
+
+        schedule[name] = {
+            "next_check": (now + timedelta(hours=interval)).strftime(TIMESTAMP_FORMAT),
+            "interval_hours": round(interval, 2),
+            "stats": stats,
+        }
+
+    write_state(SCRAPE_SCHEDULE_FILE, schedule)
+    return schedule
+
+
+def select_due_items(items, now=None):
+    # Items never scheduled (e.g. new ones) are always due
+    now = now or datetime.now()
+    schedule = read_state(SCRAPE_SCHEDULE_FILE)
+
+    due = []
+    for item in items:
+        entry = schedule.get(item["name"])
+        if not entry or datetime.strptime(entry["next_check"], TIMESTAMP_FORMAT) <= now:
+            due.append(item)
+
+    return due
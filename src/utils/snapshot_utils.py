@@ -0,0 +1,259 @@
+###############################################################################
+##  `snapshot_utils.py`                                                      ##
+##                                                                           ##
+##  Purpose: Handles raw scraped snapshots, partitioned by day               ##
+##           (year=/month=/day=) w/ a manifest of each partition's time      ##
+##           range & products, so range reads only open what overlaps;       ##
+##           closed days get compacted into one gzipped file                 ##
+###############################################################################
+
+
+import os
+import glob
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from src.config import TIMESTAMP_FORMAT, TIMESTAMP_DATE_FORMAT, add_path_prefix
+from src.utils.state_utils import read_state, write_state
+from src.utils.price_utils import to_cents
+from src.utils.metrics_utils import timed, increment
+
+
+SNAPSHOT_DIR = add_path_prefix("data/scraped")
+MANIFEST_FILE = os.path.join(SNAPSHOT_DIR, "manifest.json")
+
+# Dated files from before partitioning (e.g. scraper_03-10-2025.csv), moved
+# aside once migrated
+LEGACY_SNAPSHOT_PATTERN = "scraper_*.csv"
+LEGACY_SNAPSHOT_DIR = os.path.join(SNAPSHOT_DIR, "legacy")
+
+SNAPSHOT_COLUMNS = ["timestamp", "name", "matching_name", "price"]
+COMPACTED_FILE = "part-compacted.csv.gz"
+
+
+def get_partition_key(day):
+    # ISO parts, so partition keys (& folders) sort chronologically
+    return f"year={day:%Y}/month={day:%m}/day={day:%d}"
+
+
+def get_partition_dir(partition_key):
+    return os.path.join(SNAPSHOT_DIR, *partition_key.split("/"))
+
+
+def read_manifest():
+    return read_state(MANIFEST_FILE, default={"partitions": {}})
+
+
+def write_manifest(manifest):
+    # Partitions kept in key (i.e. date) order
+    manifest["partitions"] = dict(sorted(manifest["partitions"].items()))
+    write_state(MANIFEST_FILE, manifest)
+
+
+def describe_partition(items, files):
+    return {
+        "files": files,
+        "rows": int(sum(files.values())),
+        "min_timestamp": items["timestamp"].min(),
+        "max_timestamp": items["timestamp"].max(),
+        "names": sorted(items["name"].dropna().unique().tolist()),
+    }
+
+
+def merge_partition_entry(entry, new_entry):
+    if not entry:
+        return new_entry
+
+    return {
+        "files": {**entry["files"], **new_entry["files"]},
+        "rows": entry["rows"] + new_entry["rows"],
+        "min_timestamp": min(entry["min_timestamp"], new_entry["min_timestamp"]),
+        "max_timestamp": max(entry["max_timestamp"], new_entry["max_timestamp"]),
+        "names": sorted(set(entry["names"]) | set(new_entry["names"])),
+    }
+
+
+def prepare_snapshot_rows(items):
+    # Timestamps as strs (sort / compare like everywhere else), prices as cents
+    items = items.reindex(columns=SNAPSHOT_COLUMNS).copy()
+    items["timestamp"] = pd.to_datetime(items["timestamp"]).dt.strftime(TIMESTAMP_FORMAT)
+    items["price"] = to_cents(items["price"])
+    return items.sort_values(by=["name", "timestamp"], kind="stable").reset_index(drop=True)
+
+
+@timed()
+def write_snapshot(items, run_time=None, manifest=None):
+    # Each run adds its own part file to each day it touches (never rewrites
+    # earlier parts); returns updated manifest
+    items = prepare_snapshot_rows(items)
+    if items.empty:
+        raise ValueError("Error, missing scraped items, cannot snapshot")
+
+    run_time = run_time or datetime.now()
+    manifest = manifest or read_manifest()
+    partitions = manifest["partitions"]
+    run_day = get_partition_key(run_time.date())
+
+    days = pd.to_datetime(items["timestamp"]).dt.date
+    for day, day_items in items.groupby(days, sort=True):
+        partition_key = get_partition_key(day)
+        partition_dir = get_partition_dir(partition_key)
+        os.makedirs(partition_dir, exist_ok=True)
+
+        # New days already over by run time (e.g. backfills) go straight to
+        # their compacted form (rows are already sorted), rather than a part
+        # to compact later
+        entry = partitions.get(partition_key)
+        if not entry and partition_key < run_day:
+            part_file = COMPACTED_FILE
+            day_items.to_csv(os.path.join(partition_dir, part_file), index=False, compression="gzip")
+        else:
+            part_file = f"part-{run_time:%Y%m%dT%H%M%S}-{len(entry['files']) if entry else 0}.csv"
+            day_items.to_csv(os.path.join(partition_dir, part_file), index=False)
+
+        partitions[partition_key] = merge_partition_entry(entry, describe_partition(day_items, {part_file: len(day_items)}))
+        increment("snapshot_parts_written")
+
+    write_manifest(manifest)
+    return manifest
+
+
+def read_partition(partition_key, entry):
+    partition_dir = get_partition_dir(partition_key)
+    parts = [
+        pd.read_csv(os.path.join(partition_dir, file), dtype={"timestamp": str, "price": "Int64"})
+        for file in entry["files"]
+    ]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+
+@timed()
+def compact_snapshots(before=None, manifest=None):
+    # Closed days (before `before`, today by default) w/ several / plain parts
+    # --> one sorted, gzipped file
+    before = get_partition_key(before or datetime.now().date())
+    manifest = manifest or read_manifest()
+    replaced = {}
+
+    for partition_key, entry in manifest["partitions"].items():
+        if partition_key >= before or list(entry["files"]) == [COMPACTED_FILE]:
+            continue
+
+        partition_dir = get_partition_dir(partition_key)
+        items = read_partition(partition_key, entry).sort_values(by=["name", "timestamp"], kind="stable")
+
+        tmp_file = os.path.join(partition_dir, f"{COMPACTED_FILE}.tmp")
+        items.to_csv(tmp_file, index=False, compression="gzip")
+        os.replace(tmp_file, os.path.join(partition_dir, COMPACTED_FILE))
+
+        manifest["partitions"][partition_key] = {**entry, "files": {COMPACTED_FILE: len(items)}, "rows": len(items)}
+        replaced[partition_key] = [file for file in entry["files"] if file != COMPACTED_FILE]
+
+    if not replaced:
+        return []
+
+    # Manifest saved once per pass, & only then are replaced parts removed
+    # (a crash before that leaves old parts listed & in place)
+    write_manifest(manifest)
+    for partition_key, files in replaced.items():
+        partition_dir = get_partition_dir(partition_key)
+        for file in files:
+            os.remove(os.path.join(partition_dir, file))
+
+    increment("snapshot_partitions_compacted", len(replaced))
+    return list(replaced)
+
+
+def select_partitions(manifest, start=None, end=None, names=None):
+    # Pruned via manifest alone: time range overlap & any wanted product
+    start = pd.Timestamp(start).strftime(TIMESTAMP_FORMAT) if start is not None else None
+    end = pd.Timestamp(end).strftime(TIMESTAMP_FORMAT) if end is not None else None
+    names = set(names) if names is not None else None
+
+    selected = []
+    for partition_key, entry in manifest["partitions"].items():
+        if start is not None and entry["max_timestamp"] < start:
+            continue
+        if end is not None and entry["min_timestamp"] > end:
+            continue
+        if names is not None and names.isdisjoint(entry["names"]):
+            continue
+        selected.append(partition_key)
+
+    return selected
+
+
+@timed()
+def read_snapshots(start=None, end=None, names=None):
+    # Scraped rows w/ start <= timestamp <= end (either open if None),
+    # optionally only for some products
+    manifest = read_manifest()
+    partition_keys = select_partitions(manifest, start, end, names)
+    increment("snapshot_partitions_read", len(partition_keys))
+
+    if not partition_keys:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+    items = pd.concat(
+        [read_partition(key, manifest["partitions"][key]) for key in partition_keys], ignore_index=True
+    )
+    items["timestamp"] = pd.to_datetime(items["timestamp"])
+
+    if start is not None:
+        items = items[items["timestamp"] >= pd.Timestamp(start)]
+    if end is not None:
+        items = items[items["timestamp"] <= pd.Timestamp(end)]
+    if names is not None:
+        items = items[items["name"].isin(names)]
+
+    return items.sort_values(by=["timestamp", "name"], kind="stable").reset_index(drop=True)
+
+
+def migrate_legacy_snapshots():
+    # One-time: dated files --> partitions (by each row's own timestamp),
+    # then move them aside (kept, not deleted)
+    legacy_files = sorted(glob.glob(os.path.join(SNAPSHOT_DIR, LEGACY_SNAPSHOT_PATTERN)))
+    if not legacy_files:
+        return 0
+
+    print(f"Migrating {len(legacy_files)} dated snapshot file(s) into partitions...")
+    manifest = read_manifest()
+    os.makedirs(LEGACY_SNAPSHOT_DIR, exist_ok=True)
+
+    # Names of files already imported, saved w/ the same manifest write as
+    # their rows (so a crash before a file gets moved aside never imports it
+    # twice)
+    migrated = set(manifest.get("migrated", []))
+
+    for legacy_file in legacy_files:
+        file_name = os.path.basename(legacy_file)
+        legacy_path = os.path.join(LEGACY_SNAPSHOT_DIR, file_name)
+        if file_name in migrated:
+            shutil.move(legacy_file, legacy_path)
+            continue
+
+        items = pd.read_csv(legacy_file, dtype={"timestamp": str, "name": str, "matching_name": str})
+        if not items.empty:
+            # Older files kept scraped "$x.xx" strs, newer ones int cents
+            # (w/ gaps, those read back as floats, so not dollars)
+            if pd.api.types.is_numeric_dtype(items["price"]):
+                items["price"] = items["price"].round().astype("Int64")
+
+            # Named after scrape date (e.g. scraper_03-10-2025.csv), so use
+            # that as part file's run time
+            date_str = file_name[len("scraper_"):-len(".csv")]
+            try:
+                run_time = datetime.strptime(date_str, TIMESTAMP_DATE_FORMAT)
+            except ValueError:
+                run_time = datetime.now()
+
+            manifest["migrated"] = sorted(migrated | {file_name})
+            manifest = write_snapshot(items, run_time=run_time, manifest=manifest)
+            migrated.add(file_name)
+
+        shutil.move(legacy_file, legacy_path)
+
+    compact_snapshots(manifest=manifest)
+    return len(legacy_files)
@@ -0,0 +1,257 @@
+###############################################################################
+##  `sqlite_utils.py`                                                        ##
+##                                                                           ##
+##  Purpose: Handles SQLite storage backend (indexed tables, batch inserts,  ##
+##           CSV migration / export) behind `data_utils`                     ##
+###############################################################################
+
+
+import os
+import sqlite3
+import pandas as pd
+
+from src.config import TIMESTAMP_FORMAT
+from src.utils.price_utils import (
+    PRICE_COLUMNS, PERCENT_COLUMNS, ROLLING_COLUMNS, apply_price_dtypes, format_prices_for_display, 
+    parse_display_prices, has_display_prices
+)
+
+
+PURCHASES_TABLE_COLUMNS = ["email_id", "timestamp", "date", "time", "name", "quantity", "price", "url"]
+TRACKER_TABLE_COLUMNS = ["timestamp", "name", "quantity", "price", "prev_price", "price_change", "percent_change", "avg_price", "diff_from_avg", *ROLLING_COLUMNS]
+SCRAPER_TABLE_COLUMNS = ["timestamp", "name", "matching_name", "price", "prev_price", "price_change", "percent_change", "avg_price", "diff_from_avg", *ROLLING_COLUMNS]
+
+TABLE_COLUMNS = {
+    "purchase_tracker": PURCHASES_TABLE_COLUMNS,
+    "free_promo_tracker": PURCHASES_TABLE_COLUMNS,
+    "unique_items": ["name", "url"],
+    "price_tracker": TRACKER_TABLE_COLUMNS,
+    "price_scraper": SCRAPER_TABLE_COLUMNS,
+}
+
+# Everything else is stored as TEXT (same strs the CSVs hold); tracker &
+# scraper prices are cents, percentages floats
+COLUMN_TYPES = {"quantity": "INTEGER"}
+PRICE_COLUMN_TYPES = {
+    **COLUMN_TYPES,
+    **{col: "INTEGER" for col in PRICE_COLUMNS},
+    **{col: "REAL" for col in PERCENT_COLUMNS},
+}
+PRICE_TABLES = ("price_tracker", "price_scraper")
+
+TABLE_INDEXES = {
+    # Unique key doubles as the email_id lookup index (leftmost column)
+    "purchase_tracker": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_purchase_tracker_key ON purchase_tracker (email_id, name, price, quantity)",
+        "CREATE INDEX IF NOT EXISTS idx_purchase_tracker_name_ts ON purchase_tracker (name, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_purchase_tracker_ts ON purchase_tracker (timestamp)",
+    ],
+    "free_promo_tracker": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_free_promo_tracker_key ON free_promo_tracker (email_id, name, price, quantity)",
+        "CREATE INDEX IF NOT EXISTS idx_free_promo_tracker_name_ts ON free_promo_tracker (name, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_free_promo_tracker_ts ON free_promo_tracker (timestamp)",
+    ],
+    "unique_items": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_items_name ON unique_items (name)",
+    ],
+    "price_tracker": [
+        "CREATE INDEX IF NOT EXISTS idx_price_tracker_name_ts ON price_tracker (name, timestamp)",
+    ],
+    "price_scraper": [
+        "CREATE INDEX IF NOT EXISTS idx_price_scraper_name_ts ON price_scraper (name, timestamp)",
+    ],
+}
+
+_connections = {}
+
+
+def connect_db(db_file):
+    if not db_file:
+        raise ValueError("Error, missing SQLite DB file")
+
+    # Reuse one connection per DB for whole run
+    if db_file in _connections:
+        return _connections[db_file]
+
+    folder = os.path.dirname(db_file)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    create_tables(conn)
+    _connections[db_file] = conn
+    return conn
+
+
+def get_db_version(conn):
+    # Changes w/ any commit: data_version for other connections' (which, in
+    # WAL mode, leave DB file's mtime / size alone), total_changes for ours
+    return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+
+def close_db(db_file):
+    conn = _connections.pop(db_file, None)
+    if conn:
+        conn.close()
+
+
+def get_column_types(table):
+    return PRICE_COLUMN_TYPES if table in PRICE_TABLES else COLUMN_TYPES
+
+
+def create_table(conn, table):
+    column_types = get_column_types(table)
+    column_defs = ", ".join(f'"{col}" {column_types.get(col, "TEXT")}' for col in TABLE_COLUMNS[table])
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+
+    for index_sql in TABLE_INDEXES.get(table, []):
+        conn.execute(index_sql)
+
+
+def create_tables(conn):
+    with conn:
+        for table in TABLE_COLUMNS:
+            create_table(conn, table)
+
+    migrate_price_tables(conn)
+
+
+def migrate_price_tables(conn):
+    # Older DBs kept tracker / scraper prices as display strs (TEXT), so
+    # rebuild those tables w/ typed columns (one time)
+    for table in PRICE_TABLES:
+        declared = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+        # Columns added since (e.g. rolling stats), filled in on next recompute
+        column_types = get_column_types(table)
+        with conn:
+            for col in TABLE_COLUMNS[table]:
+                if col not in declared:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN "{col}" {column_types.get(col, "TEXT")}')
+
+        if declared.get("price") != "TEXT":
+            continue
+
+        items = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+        items = parse_display_prices(items.replace("", None))
+
+        with conn:
+            conn.execute(f"DROP TABLE {table}")
+            create_table(conn, table)
+        insert_rows(conn, table, frame_to_rows(items, TABLE_COLUMNS[table]))
+        print(f"Converted {len(items)} row(s) in '{table}' to typed prices")
+
+
+def check_table(table):
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Error, unknown table {table}")
+    return TABLE_COLUMNS[table]
+
+
+def frame_to_rows(items, columns):
+    # DataFrame --> list of tuples w/ SQLite-friendly values (None for NaN,
+    # str timestamps so they sort / compare like the CSVs)
+    items = items.reindex(columns=columns).copy()
+
+    if "timestamp" in items and pd.api.types.is_datetime64_any_dtype(items["timestamp"]):
+        items["timestamp"] = items["timestamp"].dt.strftime(TIMESTAMP_FORMAT)
+
+    items = items.astype(object).where(pd.notna(items), None)
+    return [tuple(row) for row in items.itertuples(index=False, name=None)]
+
+
+def frame_to_table_rows(table, items):
+    return frame_to_rows(items, check_table(table))
+
+
+def insert_rows(conn, table, rows, ignore_duplicates=False):
+    # Batch insert in a single transaction; returns number of rows written
+    columns = check_table(table)
+    placeholders = ", ".join("?" for _ in columns)
+    verb = "INSERT OR IGNORE" if ignore_duplicates else "INSERT"
+
+    with conn:
+        before = conn.total_changes
+        conn.executemany(f"{verb} INTO {table} VALUES ({placeholders})", rows)
+        return conn.total_changes - before
+
+
+def replace_rows(conn, table, rows, names=None):
+    # Swap out rows (all, or only those for given product names) atomically
+    columns = check_table(table)
+    placeholders = ", ".join("?" for _ in columns)
+
+    with conn:
+        if names is None:
+            conn.execute(f"DELETE FROM {table}")
+        else:
+            conn.executemany(f"DELETE FROM {table} WHERE name = ?", [(name,) for name in names])
+
+        conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+
+def read_table(conn, table, columns=None, names=None):
+    columns = columns or check_table(table)
+    check_table(table)
+    column_list = ", ".join(f'"{col}"' for col in columns)
+
+    query = f"SELECT {column_list} FROM {table}"
+    params = []
+
+    if names is not None:
+        # Uses the (name, timestamp) index instead of a full table scan
+        names = list(names)
+        query += f" WHERE name IN ({', '.join('?' for _ in names)})"
+        params = names
+
+    parse_dates = ["timestamp"] if "timestamp" in columns else None
+    items = pd.read_sql_query(query, conn, params=params, parse_dates=parse_dates)
+    return apply_price_dtypes(items) if table in PRICE_TABLES else items
+
+
+def table_has_rows(conn, table):
+    check_table(table)
+    return conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None
+
+
+def get_latest_timestamp(conn, table):
+    check_table(table)
+    row = conn.execute(f"SELECT MAX(timestamp) FROM {table}").fetchone()
+    return row[0] if row else None
+
+
+def export_table_to_csv(conn, table, csv_file):
+    # Display copy, sorted the same way the CSV pipeline sorts its outputs
+    columns = check_table(table)
+    order_by = "name ASC, timestamp DESC" if "timestamp" in columns else "name ASC"
+
+    items = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY {order_by}", conn)
+    if table in PRICE_TABLES:
+        items = format_prices_for_display(apply_price_dtypes(items))
+    items.to_csv(csv_file, index=False)
+
+
+def migrate_csvs_to_sqlite(conn, csv_files_by_table):
+    # One-shot import of existing CSVs; tables that already hold data are
+    # left alone, so re-running is harmless
+    migrated = {}
+
+    for table, csv_file in csv_files_by_table.items():
+        columns = check_table(table)
+        if not os.path.exists(csv_file) or table_has_rows(conn, table):
+            continue
+
+        items = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+        items = items.reindex(columns=columns).replace("", None)
+
+        # Display files hold formatted prices, typed files plain cents
+        if table in PRICE_TABLES:
+            items = parse_display_prices(items) if has_display_prices(items["price"]) else apply_price_dtypes(items)
+
+        migrated[table] = insert_rows(conn, table, frame_to_rows(items, columns), ignore_duplicates=True)
+        print(f"Migrated {migrated[table]} row(s) from {csv_file} into '{table}'")
+
+    return migrated
@@ -0,0 +1,70 @@
+###############################################################################
+##  `state_utils.py`                                                         ##
+##                                                                           ##
+##  Purpose: Handles small on-disk state files (JSON sidecars) that let      ##
+##           pipelines pick up where the previous run left off               ##
+###############################################################################
+
+
+import os
+import json
+import tempfile
+
+
+def read_state(state_file, default=None):
+    if not state_file:
+        raise ValueError("Error, missing state file")
+
+    if not os.path.exists(state_file):
+        return {} if default is None else default
+
+    try:
+        with open(state_file, mode="r") as file:
+            return json.load(file)
+    except (ValueError, OSError):
+        # Corrupt / half-written state is treated as missing (callers rebuild)
+        print(f"Warning: Could not read state file {state_file}, ignoring it")
+        return {} if default is None else default
+
+
+def write_state(state_file, state):
+    if not state_file:
+        raise ValueError("Error, missing state file")
+
+    folder = os.path.dirname(state_file)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+
+    # Write to temp file first, then swap in, so a crash never leaves
+    # a truncated state file behind. Temp file is unique per write, so
+    # concurrent writers never swap in each other's half-written files
+    fd, tmp_file = tempfile.mkstemp(dir=folder or ".", prefix=f"{os.path.basename(state_file)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode="w") as file:
+            json.dump(state, file)
+        os.replace(tmp_file, state_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def merge_state_changes(state, updates, state_file):
+    # Applies only entries another process actually changed vs what's saved
+    # (its untouched copies of saved entries never clobber others' changes)
+    if updates is None:
+        return state
+
+    saved = read_state(state_file)
+    for key, value in updates.items():
+        if saved.get(key) != value:
+            state[key] = value
+    for key in saved.keys() - updates.keys():
+        state.pop(key, None)
+
+    return state
+
+
+def clear_state(state_file):
+    if state_file and os.path.exists(state_file):
+        os.remove(state_file)
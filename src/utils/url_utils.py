@@ -0,0 +1,106 @@
+###############################################################################
+##  `url_utils.py`                                                           ##
+##                                                                           ##
+##  Purpose: Handles URL shortening w/ a disk-backed cache (keyed by long    ##
+##           URL) & concurrent resolution of uncached URLs                   ##
+###############################################################################
+
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import shorten_url, add_path_prefix, load_url_cache_vars
+from src.utils.state_utils import read_state, write_state
+from src.utils.metrics_utils import increment
+
+
+URL_CACHE_FILE = add_path_prefix("data/cache/short_urls.json")
+
+# Loaded once per run (per cache file), then kept in memory
+_url_caches = {}
+
+# Caches changed this run (new / evicted entries, or hits' "used" times),
+# written once at end of run (see save_url_caches)
+_dirty_url_caches = set()
+
+
+def load_url_cache(cache_file=URL_CACHE_FILE):
+    if cache_file not in _url_caches:
+        _url_caches[cache_file] = read_state(cache_file)
+    return _url_caches[cache_file]
+
+
+def get_cached_short_url(cache, url, ttl_days=None, now=None):
+    entry = cache.get(url)
+    if not entry:
+        return None
+
+    now = time.time() if now is None else now
+    if ttl_days is not None and now - entry["created"] > ttl_days * 86400:
+        return None
+
+    entry["used"] = now
+    return entry["short"]
+
+
+def evict_url_cache(cache, max_entries):
+    # Drop least recently used entries once cache grows past its limit
+    if len(cache) <= max_entries:
+        return
+
+    by_last_use = sorted(cache, key=lambda url: cache[url]["used"])
+    for url in by_last_use[:len(cache) - max_entries]:
+        del cache[url]
+
+
+def shorten_urls(urls, cache_file=URL_CACHE_FILE, shortener=shorten_url, max_entries=None, ttl_days=None, workers=None):
+    # Returns {long URL: short URL} for a whole batch (e.g. one email),
+    # only hitting shortener for URLs not (or no longer) in cache
+    default_max_entries, default_ttl_days, default_workers = load_url_cache_vars()
+    max_entries = default_max_entries if max_entries is None else max_entries
+    ttl_days = default_ttl_days if ttl_days is None else ttl_days
+    workers = default_workers if workers is None else workers
+
+    cache = load_url_cache(cache_file)
+    now = time.time()
+
+    short_urls = {}
+    uncached = []
+
+    for url in dict.fromkeys(urls):
+        short_url = get_cached_short_url(cache, url, ttl_days, now)
+        if short_url:
+            short_urls[url] = short_url
+        else:
+            uncached.append(url)
+
+    increment("url_cache_hits", len(short_urls))
+    increment("url_cache_misses", len(uncached))
+
+    if uncached:
+        # Each lookup is a blocking HTTP call, so resolve them side by side
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(uncached)))) as executor:
+            resolved = list(executor.map(shortener, uncached))
+
+        for url, short_url in zip(uncached, resolved):
+            short_urls[url] = short_url
+
+            # Failed lookups (None) aren't cached, so they get retried next time
+            if short_url:
+                cache[url] = {"short": short_url, "created": now, "used": now}
+
+        evict_url_cache(cache, max_entries)
+
+    # Hits count too (so "used" times, i.e. LRU order, carry over to later runs)
+    if short_urls:
+        _dirty_url_caches.add(cache_file)
+
+    return short_urls
+
+
+def save_url_caches():
+    # Once per run (not per batch), so cost doesn't grow w/ emails x cache size
+    for cache_file in sorted(_dirty_url_caches):
+        if cache_file in _url_caches:
+            write_state(cache_file, _url_caches[cache_file])
+    _dirty_url_caches.clear()
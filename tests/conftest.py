@@ -0,0 +1,17 @@
+###############################################################################
+##  `conftest.py`                                                            ##
+##                                                                           ##
+##  Purpose: Shared test fixtures                                            ##
+###############################################################################
+
+
+import pytest
+
+from src.config import reload_settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings():
+    # Settings are loaded once per process, so undo any test's env changes
+    yield
+    reload_settings()
@@ -0,0 +1,137 @@
+###############################################################################
+##  `test_alert_utils.py`                                                    ##
+##                                                                           ##
+##  Purpose: Tests price alert rules, dedup, & notifiers                     ##
+###############################################################################
+
+
+import sys
+import json
+import types
+import pytest
+import pandas as pd
+from datetime import datetime
+
+import src.utils.alert_utils as alert_utils
+from src.utils.alert_utils import (
+    AlertRules, evaluate_alerts, check_alerts, batch_messages, LocalNotifier, TwilioNotifier
+)
+
+
+NOW = datetime(2025, 3, 10, 12, 0, 0)
+
+
+def make_rows(points):
+    return pd.DataFrame(points, columns=["timestamp", "name", "price", "avg_price"])
+
+
+def kinds(alerts):
+    return [(alert["kind"], alert["threshold"]) for alert in alerts]
+
+
+def test_rules_merge_defaults_into_sorted_thresholds():
+    rules = AlertRules({
+        "*": {"drop_percent": 20},
+        "Apples": {"target_price": ["$2.00", 1.5], "drop_percent": [10, 30], "all_time_low": True},
+    })
+
+    assert rules.get("Apples") == {"targets": [150, 200], "drops": [10.0, 20.0, 30.0], "all_time_low": True}
+    assert rules.get("Bread") == {"targets": [], "drops": [20.0], "all_time_low": False}
+    assert not AlertRules({"Apples": {}})
+
+
+def test_target_alerts_dedupe_until_price_recovers():
+    rules = AlertRules({"Apples": {"target_price": [2.00, 1.50]}})
+    state = {}
+
+    alerts = evaluate_alerts(make_rows([
+        ("2025-03-01", "Apples", 250, None),
+        ("2025-03-02", "Apples", 199, None),
+        ("2025-03-03", "Apples", 180, None),
+        ("2025-03-04", "Apples", 149, None),
+        ("2025-03-05", "Apples", 260, None),
+        ("2025-03-06", "Apples", 190, None),
+        ("2025-03-07", "Bread", 100, None),
+    ]), "scraper", rules, state)
+
+    assert kinds(alerts) == [("target_price", 200), ("target_price", 150), ("target_price", 200)]
+    assert alerts[0]["message"] == "Apples is $1.99 (target $2.00)"
+    assert state["fired"]["scraper|Apples"]["target_price"] == 200
+
+
+def test_drop_and_all_time_low_alerts():
+    rules = AlertRules({"Apples": {"drop_percent": [10, 25], "all_time_low": True}})
+    state = {}
+
+    alerts = evaluate_alerts(make_rows([
+        ("2025-03-01", "Apples", 200, 200),
+        ("2025-03-02", "Apples", 170, 185),
+        ("2025-03-03", "Apples", 120, 163),
+        ("2025-03-04", "Apples", 125, 154),
+    ]), "tracker", rules, state, get_prior_low=lambda source, name, timestamp: 210)
+
+    assert kinds(alerts) == [
+        ("all_time_low", 210), ("all_time_low", 200), ("drop_percent", 25.0), ("all_time_low", 170)
+    ]
+    assert state["lows"]["tracker|Apples"] == 120
+
+
+def test_check_alerts_only_recent_points(tmp_path, monkeypatch):
+    rules_file = tmp_path / "alert_rules.json"
+    rules_file.write_text(json.dumps({"Apples": {"target_price": 2}}))
+
+    monkeypatch.setattr(alert_utils, "ALERT_STATE_FILE", str(tmp_path / "alert_state.json"))
+    monkeypatch.setattr(alert_utils, "load_alert_vars", lambda: (str(rules_file), "local", "alerts.jsonl", 48))
+    monkeypatch.setattr(alert_utils, "add_path_prefix", lambda path: path)
+
+    sink = LocalNotifier(str(tmp_path / "alerts" / "alerts.jsonl"))
+    tracked = make_rows([
+        (pd.Timestamp("2025-03-01 10:00:00"), "Apples", 150, 150),
+        (pd.Timestamp("2025-03-10 10:00:00"), "Apples", 175, 160),
+    ])
+
+    assert len(check_alerts("scraper", tracked, now=NOW, notifiers=[sink])) == 1
+    assert check_alerts("scraper", tracked, now=NOW, notifiers=[sink]) == []
+
+    logged = [json.loads(line) for line in open(sink.log_file)]
+    assert [(alert["timestamp"], alert["price"]) for alert in logged] == [("2025-03-10 10:00:00", 175)]
+
+
+def test_twilio_batches_alerts_into_few_messages(monkeypatch):
+    sent = []
+
+    class FakeClient:
+        def __init__(self, account_sid, auth_token):
+            self.messages = types.SimpleNamespace(create=lambda **kwargs: sent.append(kwargs))
+
+    # Twilio only gets imported when something is actually sent
+    monkeypatch.setitem(sys.modules, "twilio", types.ModuleType("twilio"))
+    monkeypatch.setitem(sys.modules, "twilio.rest", types.SimpleNamespace(Client=FakeClient))
+
+    alerts = [{"message": f"Item {i} is $1.00 (target $2.00)"} for i in range(60)]
+    TwilioNotifier("sid", "token", "+100", "+200").send(alerts)
+
+    assert len(sent) == 2
+    assert all(len(message["body"]) <= alert_utils.MAX_SMS_CHARS for message in sent)
+    assert sum(message["body"].count("\n") for message in sent) == 60
+    assert sent[0]["to"] == "+200"
+
+
+@pytest.mark.parametrize("lines, expected", [
+    ([], []),
+    (["a", "b"], ["Price alerts:\na\nb"]),
+])
+def test_batch_messages(lines, expected):
+    assert batch_messages(lines) == expected
+
+
+def test_check_alerts_bad_rules_only_warn(tmp_path, monkeypatch, capsys):
+    rules_file = tmp_path / "alert_rules.json"
+    rules_file.write_text("{not json")
+
+    monkeypatch.setattr(alert_utils, "load_alert_vars", lambda: (str(rules_file), "local", "alerts.jsonl", 48))
+    monkeypatch.setattr(alert_utils, "add_path_prefix", lambda path: path)
+
+    tracked = make_rows([(pd.Timestamp("2025-03-10 10:00:00"), "Apples", 175, 160)])
+    assert check_alerts("scraper", tracked, now=NOW) == []
+    assert "Could not check price alerts" in capsys.readouterr().out
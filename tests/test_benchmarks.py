@@ -0,0 +1,49 @@
+###############################################################################
+##  `test_benchmarks.py`                                                     ##
+##                                                                           ##
+##  Purpose: Smoke tests offline benchmark suite (so it keeps running)       ##
+###############################################################################
+
+
+import os
+import sys
+import json
+import subprocess
+
+from benchmarks.generators import make_receipt_emails, make_price_history, FakeGmailService
+from src.parser import get_items
+from src.utils.email_utils import fetch_emails
+
+
+def test_generated_emails_parse():
+    emails = make_receipt_emails(5, items_per_email=4)
+    fetched = fetch_emails(FakeGmailService(emails), [email["id"] for email in emails])
+
+    for email in fetched:
+        items = get_items(email)
+        assert len(items["purchases"]) + len(items["free_promo"]) == 4
+
+
+def test_price_history_shape():
+    history = make_price_history(500, num_products=20, quantity=True)
+
+    assert list(history.columns) == ["timestamp", "name", "quantity", "price"]
+    assert history["timestamp"].is_monotonic_increasing
+    assert history["name"].nunique() <= 20
+
+
+def test_smoke_run_writes_json(tmp_path):
+    output = tmp_path / "bench.json"
+    env = {key: value for key, value in os.environ.items() if key != "ABSOLUTE_PATH_PREFIX"}
+
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.run_benchmarks", "--size", "smoke", "--output", str(output)],
+        check=True, capture_output=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    report = json.loads(output.read_text())
+    assert report["meta"]["size"] == "smoke"
+    assert "track_scraped[rows=1000,batch=20]" in report["results"]
+    # Cold start import timings recorded, not asserted on
+    assert report["results"]["import_time[command=scrape]"]["modules"] > 0
+    assert all(result["best_s"] >= 0 for result in report["results"].values())
@@ -0,0 +1,94 @@
+###############################################################################
+##  `test_browser_utils.py`                                                  ##
+##                                                                           ##
+##  Purpose: Tests WebDriver session pool (w/ fake drivers, no browser)      ##
+###############################################################################
+
+
+import pytest
+from unittest.mock import MagicMock, PropertyMock
+
+from src.utils.browser_utils import DriverPool
+
+
+@pytest.fixture
+def created_drivers():
+    return []
+
+
+@pytest.fixture
+def driver_factory(created_drivers):
+    def factory(address):
+        driver = MagicMock(name=f"driver{len(created_drivers)}")
+        created_drivers.append(driver)
+        return driver
+    return factory
+
+
+def test_pool_reuses_warm_session(driver_factory, created_drivers):
+    with DriverPool("127.0.0.1:9222", max_pages=10, driver_factory=driver_factory) as pool:
+        for _ in range(5):
+            with pool.session() as driver:
+                driver.get("https://shop.example.com")
+
+    assert len(created_drivers) == 1
+    assert created_drivers[0].get.call_count == 5
+    created_drivers[0].quit.assert_called_once()
+
+
+def test_pool_recycles_after_max_pages(driver_factory, created_drivers):
+    pool = DriverPool("127.0.0.1:9222", max_pages=2, driver_factory=driver_factory)
+
+    for _ in range(5):
+        with pool.session():
+            pass
+    pool.close()
+
+    assert len(created_drivers) == 3
+    assert all(driver.quit.called for driver in created_drivers)
+
+
+def test_pool_recycles_on_error_and_failed_health_check(driver_factory, created_drivers):
+    pool = DriverPool("127.0.0.1:9222", driver_factory=driver_factory)
+
+    with pytest.raises(RuntimeError):
+        with pool.session():
+            raise RuntimeError("page crashed")
+
+    with pool.session() as driver:
+        pass
+    assert len(created_drivers) == 2
+
+    # Connection dropped while idle --> replaced on next acquire
+    type(driver).current_url = PropertyMock(side_effect=ConnectionError())
+    with pool.session() as replacement:
+        assert replacement is not driver
+    assert len(created_drivers) == 3
+
+
+def test_pool_opens_extra_tabs(driver_factory, created_drivers):
+    pool = DriverPool("127.0.0.1:9222", size=2, driver_factory=driver_factory)
+
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    first.switch_to.new_window.assert_not_called()
+    second.switch_to.new_window.assert_called_once_with("tab")
+
+
+def test_recycled_sessions_dont_pile_up_tabs(driver_factory, created_drivers):
+    pool = DriverPool("127.0.0.1:9222", size=2, max_pages=1, driver_factory=driver_factory)
+
+    for _ in range(3):
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+    pool.close()
+
+    # Main tab handed on (never closed), each extra tab closed w/ its session
+    main_tab = [driver for driver in created_drivers if not driver.switch_to.new_window.called]
+    extra_tabs = [driver for driver in created_drivers if driver.switch_to.new_window.called]
+    assert len(main_tab) == 3 and len(extra_tabs) == 3
+    assert not any(driver.close.called for driver in main_tab)
+    assert all(driver.close.call_count == 1 for driver in extra_tabs)
@@ -0,0 +1,52 @@
+###############################################################################
+##  `test_config.py`                                                         ##
+##                                                                           ##
+##  Purpose: Tests settings loading & validation                             ##
+###############################################################################
+
+
+import dataclasses
+import pytest
+
+import src.config as config
+from src.config import parse_settings, get_settings, reload_settings, load_pacing_vars
+
+
+def test_defaults_and_types():
+    settings = parse_settings({"SCRAPE_TABS": "4", "URL_CACHE_TTL_DAYS": "1.5", "STORAGE_BACKEND": "SQLite"})
+
+    assert settings.scrape_tabs == 4
+    assert settings.url_cache_ttl_days == 1.5
+    assert settings.storage_backend == "sqlite"
+    assert settings.scrape_workers == 1 and settings.display_rebuild_hours == 24.0
+    # Scraping is paced per host unless explicitly turned off
+    assert settings.scrape_host_rate == 0.2
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.scrape_tabs = 2
+
+
+@pytest.mark.parametrize("env", [
+    {"STORAGE_BACKEND": "postgres"},
+    {"SCRAPE_TABS": "two"},
+    {"SCRAPE_WORKERS": "0"},
+    {"SCRAPE_MIN_HOURS": "10", "SCRAPE_MAX_HOURS": "5"},
+    {"EWMA_ALPHA": "0"},
+    {"ALERT_NOTIFIER": "twilio", "TWILIO_ACCOUNT_SID": "sid"},
+])
+def test_invalid_values_raise(env):
+    with pytest.raises(ValueError):
+        parse_settings(env)
+
+
+def test_loaded_once_until_reload(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(config, "dotenv_values", lambda: pytest.fail("should not re-read .env"))
+    assert get_settings() is settings
+
+    monkeypatch.setattr(config, "dotenv_values", lambda: {"SCRAPE_TABS": "3", "SCRAPE_HOST_RATE": "2"})
+    monkeypatch.setenv("SCRAPE_HOST_RATE", "0.5")
+    reload_settings()
+
+    # Real environment wins over .env
+    assert load_pacing_vars() == (3, 0.5, 1)
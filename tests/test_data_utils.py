@@ -5,3 +5,164 @@
 ###############################################################################
 
 
+
+import os
+import pytest
+import pandas as pd
+
+import src.utils.data_utils as data_utils
+from src.utils.data_utils import (
+    append_to_purchases_free_promo_csv, load_dedup_index, get_dedup_key_file,
+    get_latest_date, get_latest_date_from_tail, read_watermark
+)
+
+from src.utils.sqlite_utils import (
+    connect_db, close_db, insert_rows, read_table, replace_rows, 
+    get_latest_timestamp, export_table_to_csv, migrate_csvs_to_sqlite
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db_file = str(tmp_path / "test.db")
+    yield connect_db(db_file)
+    close_db(db_file)
+
+
+@pytest.fixture
+def purchase_rows():
+    return [
+        ("a1", "2025-01-01 10:00:00", "January 01, 2025", "10:00 AM", "Apples", 1, "$1.99", "u1"),
+        ("a1", "2025-01-01 10:00:00", "January 01, 2025", "10:00 AM", "Bread", 2, "$3.00", "u2"),
+        ("b2", "2025-02-01 09:30:00", "February 01, 2025", "09:30 AM", "Apples", 1, "$2.49", "u1"),
+    ]
+
+
+def test_sqlite_uses_wal(db):
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_insert_rows_skips_duplicates(db, purchase_rows):
+    assert insert_rows(db, "purchase_tracker", purchase_rows, ignore_duplicates=True) == 3
+    assert insert_rows(db, "purchase_tracker", purchase_rows[:1], ignore_duplicates=True) == 0
+
+    assert get_latest_timestamp(db, "purchase_tracker") == "2025-02-01 09:30:00"
+
+
+def test_read_table_by_name(db, purchase_rows):
+    insert_rows(db, "purchase_tracker", purchase_rows)
+
+    apples = read_table(db, "purchase_tracker", ["timestamp", "name", "price"], names=["Apples"])
+
+    assert apples["price"].tolist() == ["$1.99", "$2.49"]
+    assert pd.api.types.is_datetime64_any_dtype(apples["timestamp"])
+
+
+def test_replace_rows_only_for_names(db):
+    # Tracker prices are stored as cents
+    rows = [("2025-01-01 10:00:00", "Apples", 1, 199), ("2025-01-01 10:00:00", "Bread", 1, 300)]
+    columns = ["timestamp", "name", "quantity", "price"]
+    padded = [row + (None,) * 11 for row in rows]
+
+    replace_rows(db, "price_tracker", padded)
+    replace_rows(db, "price_tracker", [("2025-02-01 10:00:00", "Apples", 1, 249) + (None,) * 11], names=["Apples"])
+
+    tracked = read_table(db, "price_tracker", columns)
+    assert sorted(tracked["price"].tolist()) == [249, 300]
+
+
+def test_migrate_and_export(db, tmp_path):
+    csv_file = tmp_path / "purchase_tracker.csv"
+    csv_file.write_text(
+        "email_id,timestamp,date,time,name,quantity,price,url\n"
+        "a1,2025-01-01 10:00:00,d,t,Apples,1,$1.99,u1\n"
+        "b2,2025-02-01 09:30:00,d,t,Apples,1,$2.49,u1\n"
+    )
+
+    assert migrate_csvs_to_sqlite(db, {"purchase_tracker": str(csv_file)}) == {"purchase_tracker": 2}
+    # Second run is a no-op
+    assert migrate_csvs_to_sqlite(db, {"purchase_tracker": str(csv_file)}) == {}
+
+    export_file = tmp_path / "export.csv"
+    export_table_to_csv(db, "purchase_tracker", str(export_file))
+
+    exported = pd.read_csv(export_file)
+    assert exported["timestamp"].tolist() == ["2025-02-01 09:30:00", "2025-01-01 10:00:00"]
+
+
+@pytest.fixture
+def purchases_csv(tmp_path, monkeypatch):
+    csv_file = tmp_path / "purchase_tracker.csv"
+    csv_file.write_text(
+        "email_id,timestamp,date,time,name,quantity,price,url\n"
+        "a1,2025-01-01 10:00:00,d,t,Apples,1,$1.99,u1\n"
+    )
+
+    # No network: pretend every URL is already short
+    monkeypatch.setattr(data_utils, "shorten_urls", lambda urls: {url: f"short:{url}" for url in urls})
+    monkeypatch.setattr(data_utils, "STORAGE_BACKEND", "csv")
+    monkeypatch.setattr(data_utils, "WATERMARK_FILE", str(tmp_path / "state" / "watermarks.json"))
+    yield str(csv_file)
+    data_utils._dedup_indexes.clear()
+
+
+def email_data(email_id, *items):
+    return {
+        "id": email_id, "timestamp": "2025-02-01 09:30:00",
+        "items": [{"name": name, "URL": f"https://x/{name}", "price": price, "quantity": 1} for name, price in items],
+    }
+
+
+def test_append_skips_duplicate_keys(purchases_csv):
+    append_to_purchases_free_promo_csv(purchases_csv, email_data("a1", ("Apples", "$1.99"), ("Bread", "$3.00")))
+    append_to_purchases_free_promo_csv(purchases_csv, email_data("a1", ("Bread", "$3.00")))
+    append_to_purchases_free_promo_csv(purchases_csv, email_data("b2", ("Bread", "$3.00"), ("Bread", "$3.00")))
+
+    purchases = pd.read_csv(purchases_csv)
+    assert list(zip(purchases["email_id"], purchases["name"])) == [("a1", "Apples"), ("a1", "Bread"), ("b2", "Bread")]
+
+    with open(get_dedup_key_file(purchases_csv)) as file:
+        assert len(file.read().split()) == 3
+
+
+def test_dedup_index_rebuilt_after_manual_edit(purchases_csv):
+    assert len(load_dedup_index(purchases_csv)) == 1
+
+    # Hand-edit CSV (newer than sidecar), then start a "new run"
+    with open(purchases_csv, "a") as file:
+        file.write("c3,2025-03-01 10:00:00,d,t,Milk,1,$4.00,u3\n")
+    key_file_mtime = os.path.getmtime(purchases_csv) - 10
+    os.utime(get_dedup_key_file(purchases_csv), (key_file_mtime, key_file_mtime))
+    data_utils._dedup_indexes.clear()
+
+    append_to_purchases_free_promo_csv(purchases_csv, email_data("c3", ("Milk", "$4.00")))
+    assert len(pd.read_csv(purchases_csv)) == 2
+
+
+def test_latest_date_uses_watermark_after_append(purchases_csv):
+    assert read_watermark(purchases_csv) is None
+    assert get_latest_date(purchases_csv) == "2025-01-01 10:00:00"
+
+    append_to_purchases_free_promo_csv(purchases_csv, email_data("b2", ("Bread", "$3.00")))
+    assert read_watermark(purchases_csv) == "2025-02-01 09:30:00"
+    assert get_latest_date(purchases_csv) == "2025-02-01 09:30:00"
+
+
+def test_watermark_ignored_when_file_shrinks(purchases_csv):
+    append_to_purchases_free_promo_csv(purchases_csv, email_data("b2", ("Bread", "$3.00")))
+
+    # Recreate CSV w/ just its header (e.g. deleted to start over)
+    with open(purchases_csv, "w") as file:
+        file.write("email_id,timestamp,date,time,name,quantity,price,url\n")
+
+    assert read_watermark(purchases_csv) is None
+    assert get_latest_date(purchases_csv) is None
+
+
+def test_latest_date_from_tail(tmp_path):
+    csv_file = tmp_path / "purchases.csv"
+    rows = [f"e{i},2024-01-{1 + i % 28:02d} 08:00:00,d,t,Item {i},1,$1.00,u" for i in range(5000)]
+    rows.append("last,2025-06-30 23:59:59,d,t,Item,1,$1.00,u")
+    csv_file.write_text("email_id,timestamp,date,time,name,quantity,price,url\n" + "\n".join(rows) + "\n")
+
+    assert get_latest_date_from_tail(str(csv_file), tail_bytes=1024) == "2025-06-30 23:59:59"
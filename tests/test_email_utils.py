@@ -7,7 +7,8 @@
 
 import pytest
 from unittest.mock import MagicMock
-from src.email_utils import fetch_email_IDs, fetch_email 
+from src.utils.email_utils import fetch_email_IDs, fetch_email, fetch_emails, EMAIL_FIELDS
+from benchmarks.generators import FakeRequest, FakeBatch
 
 
 @pytest.fixture
@@ -51,3 +52,47 @@ def test_fetch_email(mock_mail, mock_email_payload, email_body):
     assert email_message is not None
     assert email_message["payload"]["body"]["data"] == email_body
 
+
+@pytest.fixture
+def batch_sizes(mock_mail):
+    sizes = []
+    mock_mail.new_batch_http_request.side_effect = lambda callback: FakeBatch(callback, sizes)
+    return sizes
+
+
+def test_fetch_emails_batches_in_order(mock_mail, batch_sizes):
+    requested = []
+
+    def fake_get(**kwargs):
+        requested.append(kwargs)
+        return FakeRequest({"id": kwargs["id"], "internalDate": "0"})
+
+    mock_mail.users().messages().get.side_effect = fake_get
+    email_ids = [str(i) for i in range(250)]
+
+    emails = fetch_emails(mock_mail, email_ids)
+
+    assert [email["id"] for email in emails] == email_ids
+    assert batch_sizes == [100, 100, 50]
+    assert all(kwargs["fields"] == EMAIL_FIELDS for kwargs in requested)
+
+
+def test_fetch_emails_missing_returns_none(mock_mail, batch_sizes):
+    mock_mail.users().messages().get.side_effect = lambda **kwargs: FakeRequest({"id": kwargs["id"]})
+
+    original_callback_batch = mock_mail.new_batch_http_request.side_effect
+
+    def failing_batch(callback):
+        # Report every request for ID "2" as failed
+        def wrapped(request_id, response, exception):
+            if request_id == "2":
+                return callback(request_id, None, Exception("boom"))
+            return callback(request_id, response, exception)
+        return original_callback_batch(wrapped)
+
+    mock_mail.new_batch_http_request.side_effect = failing_batch
+
+    emails = fetch_emails(mock_mail, ["1", "2", "3", "1"], batch_size=2)
+
+    assert [email and email["id"] for email in emails] == ["1", None, "3", "1"]
+    assert batch_sizes == [2, 1]
@@ -0,0 +1,79 @@
+###############################################################################
+##  `test_extract_utils.py`                                                  ##
+##                                                                           ##
+##  Purpose: Tests embedded item JSON extraction (incl. large pages)         ##
+###############################################################################
+
+
+import re
+import json
+
+from src.utils.extract_utils import extract_items, get_item_matchers, measure_extraction_throughput
+
+
+LEGACY_PATTERN = r'"__typename":"Item".*?"name":"(.*?)".*?"price":"(\$[\d.]+)"'
+
+
+def legacy_extract(page_source):
+    return [
+        {"name": json.loads(f'"{name}"'), "price": price}
+        for name, price in re.findall(LEGACY_PATTERN, page_source)
+    ]
+
+
+def make_item(i, name=None):
+    return {
+        "__typename": "Item",
+        "usItemId": str(i),
+        "name": name or f"Product {i} 12 oz",
+        "imageInfo": {"thumbnailUrl": f"https://img.example.com/{i}.jpg"},
+        "priceInfo": {"currentPrice": {"price": f"${i % 50}.{i % 100:02d}", "priceString": "each"}},
+    }
+
+
+def make_product_page(num_items, filler_size=200):
+    items = [make_item(i) for i in range(num_items)]
+    state = {"props": {"pageProps": {"initialData": {"contentLayout": {"modules": [
+        {"__typename": "Module", "config": {"products": items}, "filler": "x" * filler_size}
+    ]}}}}}
+    script = json.dumps(state, separators=(",", ":"))
+    return f'<html><head></head><body><div id="root"></div><script id="__NEXT_DATA__">{script}</script></body></html>'
+
+
+def test_matches_legacy_regex_on_plain_items():
+    page = make_product_page(20)
+    assert extract_items(page, "name", "price") == legacy_extract(page)
+
+
+def test_decodes_escapes_and_keeps_name_price_together():
+    items = [
+        make_item(1, name='Crème "Fraîche" 8 oz'),
+        {"__typename": "Item", "name": "No Price Yet", "priceInfo": {"price": "Out of stock"}},
+        make_item(2),
+    ]
+    page = "<script>" + json.dumps({"items": items}, separators=(",", ":")) + "</script>"
+
+    results = extract_items(page, "name", "price")
+
+    # Item w/o valid price is dropped (not paired w/ next item's price)
+    assert results == [
+        {"name": 'Crème "Fraîche" 8 oz', "price": "$1.01"},
+        {"name": "Product 2 12 oz", "price": "$2.02"},
+    ]
+
+
+def test_skips_broken_objects_and_reuses_matchers():
+    page = '<p>"__typename":"Item" in text</p>' + make_product_page(3)
+
+    assert len(extract_items(page, "name", "price")) == 3
+    assert get_item_matchers() is get_item_matchers()
+
+
+def test_throughput_on_large_page():
+    # ~5 MB page w/ 5000 items
+    page = make_product_page(5000, filler_size=4_000_000)
+    report = measure_extraction_throughput(page, "name", "price", repeat=1)
+
+    print(f"\nExtraction: {report['size_mb']} MB, {report['items']} items, {report['mb_per_sec']:.1f} MB/s")
+    assert report["items"] == 5000
+    assert extract_items(page, "name", "price") == legacy_extract(page)
@@ -0,0 +1,110 @@
+###############################################################################
+##  `test_fetch_utils.py`                                                    ##
+##                                                                           ##
+##  Purpose: Tests HTTP-first fetch strategy (w/ local fixture page server)  ##
+###############################################################################
+
+
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import src.utils.fetch_utils as fetch_utils
+from src.utils.fetch_utils import fetch_page_source, save_fetch_state, load_fetch_state
+
+
+ITEM_PAGE = '<html><script>{"__typename":"Item","name":"Apples","price":"$1.99"}</script></html>'
+SHELL_PAGE = '<html><div id="root"></div><script src="app.js"></script></html>'
+
+FIXTURE_PAGES = {
+    "/item": (ITEM_PAGE, '"v1"'),
+    "/shell": (SHELL_PAGE, None),
+}
+
+
+class FixturePageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requested.append((self.path, self.headers.get("If-None-Match")))
+        body, etag = FIXTURE_PAGES[self.path]
+
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixturePageHandler)
+    server.requested = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fetch_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_utils, "FETCH_STRATEGIES_FILE", str(tmp_path / "fetch_strategies.json"))
+    monkeypatch.setattr(fetch_utils, "HTTP_VALIDATORS_FILE", str(tmp_path / "http_validators.json"))
+    monkeypatch.setattr(fetch_utils, "HTTP_CACHE_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(fetch_utils, "_fetch_strategies", None)
+    monkeypatch.setattr(fetch_utils, "_http_validators", None)
+
+
+def has_item_data(page_source):
+    return '"__typename":"Item"' in page_source
+
+
+def test_http_used_when_page_has_item_data(server):
+    browser_calls = []
+    url = f"http://127.0.0.1:{server.server_port}/item"
+
+    page_source = fetch_page_source(url, browser_calls.append, has_item_data)
+
+    assert page_source == ITEM_PAGE
+    assert browser_calls == []
+
+
+def test_conditional_request_served_from_cache(server):
+    url = f"http://127.0.0.1:{server.server_port}/item"
+
+    fetch_page_source(url, lambda url: None, has_item_data)
+    save_fetch_state()
+
+    # Next run (fresh memory) sends validators & gets 304
+    fetch_utils._fetch_strategies = fetch_utils._http_validators = None
+    page_source = fetch_page_source(url, lambda url: None, has_item_data)
+
+    assert page_source == ITEM_PAGE
+    assert server.requested == [("/item", None), ("/item", '"v1"')]
+
+
+def test_falls_back_to_browser_and_remembers_domain(server):
+    url = f"http://127.0.0.1:{server.server_port}/shell"
+    browser_calls = []
+
+    def browser_fetch(url):
+        browser_calls.append(url)
+        return ITEM_PAGE
+
+    for _ in range(fetch_utils.HTTP_MAX_FAILURES + 2):
+        assert fetch_page_source(url, browser_fetch, has_item_data) == ITEM_PAGE
+
+    # Plain HTTP only tried until domain got marked as browser-only
+    assert len(server.requested) == fetch_utils.HTTP_MAX_FAILURES
+    assert len(browser_calls) == fetch_utils.HTTP_MAX_FAILURES + 2
+
+    strategies, _ = load_fetch_state()
+    assert strategies[f"127.0.0.1:{server.server_port}"]["strategy"] == "browser"
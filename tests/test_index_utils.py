@@ -0,0 +1,113 @@
+###############################################################################
+##  `test_index_utils.py`                                                    ##
+##                                                                           ##
+##  Purpose: Tests in-memory per-product price index & its refreshes         ##
+###############################################################################
+
+
+import sqlite3
+import pytest
+import numpy as np
+import pandas as pd
+
+import src.utils.index_utils as index_utils
+import src.utils.data_utils as data_utils
+from src.utils.sqlite_utils import connect_db, close_db
+from src.utils.index_utils import PriceIndex, get_price_index, refresh_price_index
+
+
+@pytest.fixture
+def history():
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime([
+            "2025-01-10 10:00:00", "2025-01-01 10:00:00", "2025-02-01 10:00:00",
+            "2025-01-05 10:00:00", "2025-03-01 10:00:00",
+        ]),
+        "name": ["Apples", "Apples", "Apples", "Bread", "Bread"],
+        "price": pd.array([250, 199, 225, None, 300], dtype="Int64"),
+    })
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch, history):
+    log_file = str(tmp_path / "price_scraper_log.csv")
+    history.to_csv(log_file, index=False)
+
+    monkeypatch.setitem(index_utils.INDEX_SOURCES, "scraper", log_file)
+    index_utils.clear_price_indexes()
+    yield log_file
+    index_utils.clear_price_indexes()
+
+
+def test_queries(history):
+    index = PriceIndex.from_frame(history)
+
+    assert index.price_at("Apples", "2024-12-31") is None
+    assert index.price_at("Apples", "2025-01-10 10:00:00") == 250
+    assert index.price_at("apples", "2025-01-20") == 250
+
+    timestamps, prices = index.range("Apples", start="2025-01-05", end="2025-02-01 10:00:00")
+    assert prices.tolist() == [250, 225]
+    assert index.min_over("Apples", start="2025-01-05") == (np.datetime64("2025-02-01T10:00:00"), 225)
+    assert index.min_over("Apples", start="2026-01-01") is None
+
+    assert index.last_n("Apples", 2)[1].tolist() == [250, 225]
+    assert index.last_n("Apples", 10)[1].tolist() == [199, 250, 225]
+
+    # Missing prices are skipped, unknown products raise
+    assert index.last_n("Bread", 5)[1].tolist() == [300]
+    with pytest.raises(KeyError):
+        index.price_at("Milk", "2025-01-01")
+
+
+def test_add_items_appends_backfills_and_replaces(history):
+    index = PriceIndex.from_frame(history)
+
+    index.add_items(pd.DataFrame({
+        "timestamp": ["2025-03-01 10:00:00", "2025-01-03 10:00:00"],
+        "name": ["Apples", "Apples"],
+        "price": [210, 205],
+    }))
+    assert index.last_n("Apples", 5)[1].tolist() == [199, 205, 250, 225, 210]
+
+    index.add_items(pd.DataFrame({"timestamp": ["2025-04-01"], "name": ["Bread"], "price": [320]}), replace_names=["Bread"])
+    assert index.last_n("Bread", 5)[1].tolist() == [320]
+
+
+def test_cached_index_refreshes(log_file):
+    index = get_price_index("scraper")
+    assert get_price_index("scraper") is index
+
+    # Our own writes extend cached index in place
+    new_rows = pd.DataFrame({"timestamp": ["2025-03-02 10:00:00"], "name": ["Milk"], "price": [400]})
+    new_rows.to_csv(log_file, mode="a", header=False, index=False)
+    refresh_price_index("scraper", new_rows)
+
+    assert get_price_index("scraper") is index
+    assert index.price_at("Milk", "2025-03-03") == 400
+
+    # Writes from elsewhere trigger a reload
+    pd.DataFrame({"timestamp": ["2025-03-03 10:00:00"], "name": ["Eggs"], "price": [500]}).to_csv(
+        log_file, mode="a", header=False, index=False
+    )
+    assert get_price_index("scraper").price_at("Eggs", "2025-03-04") == 500
+
+
+def test_sqlite_version_sees_other_connections_commits(tmp_path, monkeypatch):
+    db_file = str(tmp_path / "prices.db")
+    monkeypatch.setattr(data_utils, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(index_utils, "SQLITE_DB_FILE", db_file)
+    connect_db(db_file)
+
+    try:
+        version = index_utils.get_source_version("scraper")
+
+        # WAL mode: another connection's commit leaves DB file's stat as is
+        other = sqlite3.connect(db_file)
+        other.execute("INSERT INTO price_scraper (timestamp, name, price) VALUES ('2025-03-01 10:00:00', 'Eggs', 500)")
+        other.commit()
+        other.close()
+
+        assert index_utils.get_source_version("scraper") != version
+    finally:
+        close_db(db_file)
@@ -0,0 +1,50 @@
+###############################################################################
+##  `test_main.py`                                                           ##
+##                                                                           ##
+##  Purpose: Tests CLI subcommands & cold start import cost                  ##
+###############################################################################
+
+
+import os
+import sys
+import subprocess
+
+import src.main as main
+
+
+# Kept out of `import src.main` (cron runs pay cold start every time), only
+# imported by subcommands that need them
+HEAVY_MODULES = ["pandas", "selenium", "googleapiclient", "bs4", "rapidfuzz", "requests", "lxml"]
+
+
+def get_imported_modules(module):
+    # Top-level packages loaded by importing module in a fresh interpreter
+    # (this one already has everything loaded)
+    env = {**os.environ, "ABSOLUTE_PATH_PREFIX": os.environ.get("ABSOLUTE_PATH_PREFIX", "/tmp")}
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return {name.split(".")[0] for name in result.stdout.splitlines()}
+
+
+def test_import_stays_light():
+    modules = get_imported_modules("src.main")
+
+    assert "src" in modules
+    assert not [module for module in HEAVY_MODULES if module in modules]
+
+
+def test_subcommands_dispatch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "ingest", lambda track=True: calls.append(("ingest", track)))
+    monkeypatch.setattr(main, "track", lambda full=False: calls.append(("track", full)))
+    monkeypatch.setattr(main, "scrape", lambda workers=None: calls.append(("scrape", workers)))
+    monkeypatch.setattr(main, "run", lambda: calls.append(("run",)))
+
+    main.main(["ingest", "--no-track"])
+    main.main(["track", "--full"])
+    main.main(["scrape", "--workers", "3"])
+    main.main([])
+
+    assert calls == [("ingest", False), ("track", True), ("scrape", 3), ("run",)]
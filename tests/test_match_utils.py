@@ -0,0 +1,73 @@
+###############################################################################
+##  `test_match_utils.py`                                                    ##
+##                                                                           ##
+##  Purpose: Tests batched fuzzy matching & match memoization                ##
+###############################################################################
+
+
+import random
+import pytest
+from rapidfuzz import fuzz
+
+import src.utils.match_utils as match_utils
+from src.utils.match_utils import find_matches, best_match_indexes, save_match_cache, load_match_cache
+
+
+def legacy_find_match(potential_matches, name):
+    matching_item, max_match_score = None, 0
+    for item in potential_matches:
+        similarity_score = fuzz.ratio(item["name"], name)
+        if similarity_score > max_match_score:
+            matching_item, max_match_score = item, similarity_score
+    return matching_item
+
+
+@pytest.fixture
+def match_cache_file(tmp_path, monkeypatch):
+    cache_file = str(tmp_path / "match_cache.json")
+    monkeypatch.setattr(match_utils, "MATCH_CACHE_FILE", cache_file)
+    monkeypatch.setattr(match_utils, "_match_cache", None)
+    return cache_file
+
+
+def random_name(rng):
+    words = ["Organic", "Apples", "Milk", "Whole", "2%", "Bread", "12 oz", "Eggs", "Large", "Cheese"]
+    return " ".join(rng.sample(words, rng.randint(1, 4)))
+
+
+def test_same_matches_as_legacy_loop(match_cache_file):
+    rng = random.Random(7)
+    for _ in range(300):
+        # Small vocab means plenty of ties (first best must win)
+        candidates = [{"name": random_name(rng), "price": f"${i}.00"} for i in range(rng.randint(0, 8))]
+        name = random_name(rng)
+        assert find_matches([name], candidates, use_cache=False)[0] is legacy_find_match(candidates, name)
+
+    candidates = [{"name": "abc"}, {"name": "xyz"}]
+    assert find_matches(["qqq"], candidates, use_cache=False) == [None]
+
+
+def test_batch_scoring_matches_single(match_cache_file):
+    candidates = [{"name": n} for n in ["Whole Milk", "2% Milk", "Large Eggs", "Whole Milk"]]
+    names = ["Milk Whole", "Eggs", "zzz"]
+
+    assert best_match_indexes(names, [c["name"] for c in candidates]) == [0, 2, None]
+    assert find_matches(names, candidates) == [candidates[0], candidates[2], None]
+
+
+def test_memoized_per_candidate_set(match_cache_file, monkeypatch):
+    candidates = [{"name": "Whole Milk", "price": "$3.49"}, {"name": "Large Eggs", "price": "$2.99"}]
+    find_matches(["Whole Milk 1 gal"], candidates)
+    save_match_cache()
+
+    # Same names (new prices) on next run: no scoring at all
+    monkeypatch.setattr(match_utils, "_match_cache", None)
+    monkeypatch.setattr(match_utils, "best_match_index", lambda *args: pytest.fail("should be cached"))
+    repriced = [{"name": "Whole Milk", "price": "$3.59"}, {"name": "Large Eggs", "price": "$2.89"}]
+    assert find_matches(["Whole Milk 1 gal"], repriced) == [repriced[0]]
+
+    # Changed listing gets re-scored
+    monkeypatch.setattr(match_utils, "best_match_index", lambda *args: 1)
+    changed = [{"name": "Whole Milk"}, {"name": "Whole Milk 1 gal"}]
+    assert find_matches(["Whole Milk 1 gal"], changed) == [changed[1]]
+    assert load_match_cache()["Whole Milk 1 gal"]["index"] == 1
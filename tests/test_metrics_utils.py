@@ -0,0 +1,105 @@
+###############################################################################
+##  `test_metrics_utils.py`                                                  ##
+##                                                                           ##
+##  Purpose: Tests run instrumentation (spans, counters, summaries)          ##
+###############################################################################
+
+
+import os
+import json
+import pytest
+import multiprocessing
+
+from src.utils.metrics_utils import (
+    timed, span, increment, enable_metrics, disable_metrics, reset_metrics, 
+    collect_metrics, merge_metrics, write_metrics, run_worker_task, NULL_SPAN
+)
+
+
+@pytest.fixture
+def metrics():
+    enable_metrics()
+    reset_metrics()
+    yield
+    disable_metrics()
+    reset_metrics()
+
+
+@timed()
+def parse_thing(value):
+    if value is None:
+        raise ValueError("Error, missing value")
+    return value * 2
+
+
+def test_disabled_records_nothing():
+    disable_metrics()
+    reset_metrics()
+
+    assert parse_thing(2) == 4
+    assert span("anything") is NULL_SPAN
+    increment("pages")
+
+    assert collect_metrics() == {"spans": {}, "counters": {}}
+
+
+def test_spans_counters_and_errors(metrics):
+    parse_thing(1)
+    parse_thing(2)
+    with pytest.raises(ValueError):
+        parse_thing(None)
+
+    with span("csv_write"):
+        increment("rows_written", 10)
+    increment("rows_written", 5)
+
+    snapshot = collect_metrics()
+    assert snapshot["spans"]["parse_thing"]["count"] == 3
+    assert snapshot["spans"]["parse_thing"]["errors"] == 1
+    assert snapshot["spans"]["csv_write"]["count"] == 1
+    assert snapshot["counters"] == {"rows_written": 15}
+
+    # e.g. snapshot handed back from a worker process
+    merge_metrics(snapshot)
+    assert collect_metrics()["spans"]["parse_thing"]["count"] == 6
+
+
+def parse_thing_task(value):
+    return run_worker_task(parse_thing, value, metrics_on=True)
+
+
+def test_worker_tasks_hand_back_only_their_metrics(metrics):
+    increment("emails_parsed", 5)
+    parse_thing(1)
+
+    # Forked workers start w/ parent's totals & get reused across tasks
+    with multiprocessing.get_context("fork").Pool(1) as pool:
+        task_results = pool.map(parse_thing_task, [1, 2, 3])
+    for value, snapshot in task_results:
+        assert snapshot["spans"]["parse_thing"]["count"] == 1
+        assert snapshot["counters"] == {}
+        merge_metrics(snapshot)
+
+    assert [value for value, _ in task_results] == [2, 4, 6]
+    assert collect_metrics()["spans"]["parse_thing"]["count"] == 4
+    assert collect_metrics()["counters"] == {"emails_parsed": 5}
+
+    # In-process, already counted here --> nothing to merge
+    assert parse_thing_task(4) == (8, None)
+
+
+def test_writes_json_and_prometheus(metrics, tmp_path):
+    parse_thing(3)
+    increment("gmail_batch_requests", 2)
+
+    summary = write_metrics(str(tmp_path / "run.json"), str(tmp_path / "metrics" / "run.prom"))
+
+    assert json.loads((tmp_path / "run.json").read_text()) == summary
+    prometheus = (tmp_path / "metrics" / "run.prom").read_text()
+    assert 'price_tracker_span_calls_total{span="parse_thing"} 1' in prometheus
+    assert 'price_tracker_events_total{event="gmail_batch_requests"} 2' in prometheus
+    assert "# TYPE price_tracker_span_seconds_total counter" in prometheus
+
+    # Written via unique temp files, none left behind
+    assert sorted(os.listdir(tmp_path / "metrics")) == ["run.prom"]
+    assert os.stat(tmp_path / "metrics" / "run.prom").st_mode & 0o777 == 0o644
@@ -0,0 +1,63 @@
+###############################################################################
+##  `test_pacing_utils.py`                                                   ##
+##                                                                           ##
+##  Purpose: Tests per-host pacing scheduler (on a simulated clock)          ##
+###############################################################################
+
+
+import pytest
+
+from src.utils.pacing_utils import SimulatedClock, HostPacer, run_paced
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+def make_jobs(clock, urls, work_seconds, log):
+    def make_job(url):
+        async def job():
+            log.append((url, clock.now()))
+            await clock.sleep(work_seconds)
+            return url
+        return job
+
+    return [(url, make_job(url)) for url in urls]
+
+
+def test_pacer_enforces_spacing_and_burst(clock):
+    pacer = HostPacer(rate=0.5, burst=2, clock=clock)
+
+    waits = [pacer.reserve("https://a.example/p/1") for _ in range(4)]
+    assert waits == [0, 0, 2, 4]
+
+    # Other hosts have their own bucket
+    assert pacer.reserve("https://b.example/p/1") == 0
+
+
+def test_run_paced_overlaps_hosts(clock):
+    urls = [f"https://a.example/p/{i}" for i in range(5)] + [f"https://b.example/p/{i}" for i in range(5)]
+    log = []
+
+    pacer = HostPacer(rate=1, clock=clock)
+    results = clock.run(run_paced(make_jobs(clock, urls, 3, log), pacer, concurrency=4))
+
+    assert results == urls
+
+    # Requests to same host are always at least 1s apart
+    for host in ("a.example", "b.example"):
+        starts = [start for url, start in log if host in url]
+        assert all(later - earlier >= 1 for earlier, later in zip(starts, starts[1:]))
+
+    # 10 pages x 3s of work, but 2 hosts x 1 req/s & 4 tabs --> well under the 30s sum
+    assert clock.now() <= 10
+
+
+def test_run_paced_without_pacer_is_fifo(clock):
+    urls = [f"https://a.example/p/{i}" for i in range(3)]
+    log = []
+
+    clock.run(run_paced(make_jobs(clock, urls, 1, log), concurrency=1))
+
+    assert log == [(urls[0], 0), (urls[1], 1), (urls[2], 2)]
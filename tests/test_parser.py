@@ -0,0 +1,105 @@
+###############################################################################
+##  `test_parser.py`                                                         ##
+##                                                                           ##
+##  Purpose: Tests email receipt parsing pipelines                           ##
+###############################################################################
+
+
+import pytest
+from bs4 import BeautifulSoup
+from multiprocessing import Pool
+
+from src.parser import (
+    get_items, parse_email_items, get_item_names_URLs_prices_quantities, 
+    extract_item_names, extract_item_URLs, extract_item_prices, extract_item_quantities,
+    HTML_PARSER_BACKENDS
+)
+from src.utils.metrics_utils import enable_metrics, disable_metrics, reset_metrics, collect_metrics
+from benchmarks.generators import make_receipt_html, make_receipt_email
+
+
+@pytest.fixture
+def receipt_items():
+    return [
+        {"name": "Honeycrisp Apples", "price": "$3.49", "quantity": 2},
+        {"name": "Sourdough Bread", "price": "$5.00", "quantity": 1},
+        {"name": "Promo Tote Bag", "price": "FREE", "quantity": 1},
+    ]
+
+
+@pytest.fixture
+def receipt_emails(receipt_items):
+    return [
+        make_receipt_email(str(i), receipt_items[: 1 + i % len(receipt_items)]) 
+        for i in range(12)
+    ]
+
+
+def test_get_items(receipt_items):
+    items = get_items(make_receipt_email("1", receipt_items))
+
+    assert [item["name"] for item in items["purchases"]] == ["Honeycrisp Apples", "Sourdough Bread"]
+    assert items["purchases"][0]["quantity"] == 2
+    assert items["purchases"][0]["URL"] == "https://shop.example.com/item/0"
+    assert [item["name"] for item in items["free_promo"]] == ["Promo Tote Bag"]
+
+
+def test_parse_email_items_pool_keeps_order(receipt_emails):
+    serial = parse_email_items(receipt_emails)
+
+    enable_metrics()
+    reset_metrics()
+    try:
+        with Pool(2) as pool:
+            parallel = parse_email_items(receipt_emails, pool, chunk_size=3)
+        spans = collect_metrics()["spans"]
+    finally:
+        disable_metrics()
+        reset_metrics()
+
+    assert parallel == serial
+    # Each worker's get_items timings merged back (once per email)
+    assert spans["get_items"]["count"] == len(receipt_emails)
+
+
+def legacy_extract(html_body):
+    soup = BeautifulSoup(html_body, "html.parser")
+    return (
+        extract_item_names(soup), extract_item_URLs(soup),
+        extract_item_prices(soup), extract_item_quantities(soup),
+    )
+
+
+@pytest.mark.parametrize("backend", HTML_PARSER_BACKENDS)
+def test_single_pass_matches_legacy_extractors(receipt_items, backend):
+    html_body = make_receipt_html(receipt_items * 5)
+    names, URLs, prices, quantities = legacy_extract(html_body)
+
+    expected = [
+        {"name": name, "URL": link, "price": price, "quantity": qty}
+        for name, link, price, qty in zip(names, URLs, prices, quantities)
+    ]
+    assert len(expected) == 15
+    assert get_item_names_URLs_prices_quantities(html_body, backend) == expected
+
+
+@pytest.mark.parametrize("backend", HTML_PARSER_BACKENDS)
+def test_single_pass_matches_legacy_on_odd_markup(backend):
+    # Markers w/o matching cells, nested text, & entities
+    html_body = """
+    <div><!--ITEM IMAGE--><span>no link here</span></div>
+    <table>
+      <tr><td class="copy wide"><a href="/p/1"> Caf&eacute; <b>Beans</b> </a></td></tr>
+      <tr><td><!--ITEM IMAGE--><a href="/p/1">img</a></td></tr>
+      <tr><td><!--IF SHOW QTY--><table><tr><td class="copy">1 item</td></tr></table></td></tr>
+      <tr><td><!--IF SHOW PRICE--><table><tr><td class="price-mobile"> $12.<sup>99</sup> </td></tr></table></td></tr>
+      <tr><td><!--IF SHOW PRICE--><table><tr><td class="price-mobile">$12.99</td></tr></table></td></tr>
+      <tr><td><!--IF SHOW PRICE--></td></tr>
+    </table>"""
+
+    single_pass = get_item_names_URLs_prices_quantities(html_body, backend)
+    names, URLs, prices, quantities = legacy_extract(html_body)
+
+    assert single_pass == [{"name": names[0], "URL": URLs[0], "price": prices[0], "quantity": quantities[0]}]
+    assert single_pass[0]["name"] == "Café Beans"
+    assert single_pass[0]["price"] == "$12.99"
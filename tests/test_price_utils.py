@@ -0,0 +1,89 @@
+###############################################################################
+##  `test_price_utils.py`                                                    ##
+##                                                                           ##
+##  Purpose: Tests integer-cents price handling & display formatting         ##
+###############################################################################
+
+
+import sqlite3
+import pandas as pd
+
+from src.utils.price_utils import (
+    to_cents, format_cents, format_percent, format_prices_for_display, parse_display_prices
+)
+from src.utils.data_utils import convert_price_csv_to_cents
+from src.utils.sqlite_utils import connect_db, close_db, read_table
+
+
+def test_to_cents_handles_strs_floats_and_ints():
+    assert to_cents(["$1,001.25", "$0.10", "N/A", None]).tolist() == [100125, 10, pd.NA, pd.NA]
+    assert to_cents([0.1, 0.7, 2.675]).tolist() == [10, 70, 268]
+    assert to_cents(pd.Series([199, 250])).tolist() == [199, 250]
+
+
+def test_format_matches_previous_display_strs():
+    cents = pd.Series([199, 100125, -50, 0, None], dtype="Int64")
+    assert format_cents(cents).tolist() == ["$1.99", "$1,001.25", "$-0.50", "$0.00", "N/A"]
+    assert format_percent([25.1256, -3.5, None]).tolist() == ["25.13%", "-3.50%", "N/A"]
+
+
+def test_display_round_trip():
+    display = pd.DataFrame({
+        "name": ["Apples", "Apples"],
+        "price": ["$1.99", "$2.49"],
+        "prev_price": ["N/A", "$1.99"],
+        "percent_change": ["N/A", "25.13%"],
+    })
+
+    parsed = parse_display_prices(display)
+    assert parsed["price"].tolist() == [199, 249]
+
+    pd.testing.assert_frame_equal(format_prices_for_display(parsed), display, check_dtype=False)
+
+
+def test_convert_legacy_csv_to_cents(tmp_path):
+    csv_file = str(tmp_path / "price_scraper_log.csv")
+    pd.DataFrame({
+        "timestamp": ["2025-02-05 10:00:00"], "name": ["Apples"], "price": ["$1.00"],
+        "prev_price": ["N/A"], "percent_change": ["N/A"],
+    }).to_csv(csv_file, index=False)
+
+    assert convert_price_csv_to_cents(csv_file)
+    assert not convert_price_csv_to_cents(csv_file)
+
+    converted = pd.read_csv(csv_file)
+    assert converted["price"].tolist() == [100]
+    assert converted["prev_price"].isna().all()
+
+
+def test_legacy_sqlite_price_table_gets_typed(tmp_path):
+    db_file = str(tmp_path / "legacy.db")
+
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE price_tracker (timestamp TEXT, name TEXT, quantity INTEGER, price TEXT, prev_price TEXT, "
+        "price_change TEXT, percent_change TEXT, avg_price TEXT, diff_from_avg TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO price_tracker VALUES ('2025-01-01 10:00:00', 'Apples', 1, '$1.99', 'N/A', 'N/A', 'N/A', '$1.99', '$0.00')"
+    )
+    conn.commit()
+    conn.close()
+
+    tracked = read_table(connect_db(db_file), "price_tracker")
+    close_db(db_file)
+
+    assert tracked["price"].tolist() == [199]
+    assert tracked["prev_price"].isna().all()
+    assert tracked["percent_change"].isna().all()
+
+
+def test_convert_only_sniffs_first_rows(tmp_path):
+    csv_file = str(tmp_path / "price_scraper_log.csv")
+    prices = [100] * 50 + ["$9.99"]
+    pd.DataFrame({"timestamp": ["2025-02-05 10:00:00"] * 51, "name": ["Apples"] * 51, "price": prices}).to_csv(
+        csv_file, index=False
+    )
+
+    # Typed log (display-looking values past the 1st rows aren't looked at)
+    assert not convert_price_csv_to_cents(csv_file)
@@ -0,0 +1,69 @@
+###############################################################################
+##  `test_rolling_utils.py`                                                  ##
+##                                                                           ##
+##  Purpose: Tests windowed price stats (vectorized vs incremental)          ##
+###############################################################################
+
+
+import numpy as np
+import pandas as pd
+
+from src.tracker import calculate_price_deltas_numeric, calculate_price_deltas_incremental, build_price_state
+from src.utils.price_utils import ROLLING_COLUMNS
+from src.utils.rolling_utils import RollingWindow, calculate_rolling_stats, rolling_state_matches, EWMA_EXACT_COLUMN
+
+
+CONFIG = (3, 10.0, 0.5, 25.0)
+
+
+def make_history(num_rows=300, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 200 * 24, num_rows)), unit="h"),
+        "name": rng.choice(["Apples", "Bread", "Milk"], num_rows),
+        "price": rng.integers(100, 500, num_rows),
+    }).drop_duplicates(subset=["name", "timestamp"]).reset_index(drop=True)
+
+
+def test_rolling_window_stats():
+    window = RollingWindow((3, 1.0, 0.5, 50.0))
+    day = 24 * 60 * 60
+
+    window.add(0, 400)
+    window.add(day // 2, 100)
+    assert window.add(day, 300) == (800 / 3, 300.0, 200.0, 100, 300, 275.0)
+
+    # 1st point falls out of both windows
+    assert window.add(day + 1, 200) == (200.0, 200.0, 200.0, 100, 300, 237.5)
+
+
+def test_vectorized_matches_incremental():
+    history = make_history().sort_values(by=["name", "timestamp"], kind="stable")
+    stats = calculate_rolling_stats(history, CONFIG)
+
+    for name, group in history.groupby("name"):
+        window = RollingWindow(CONFIG)
+        seconds = group["timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        expected = np.array([window.add(int(ts), int(price)) for ts, price in zip(seconds, group["price"])])
+
+        np.testing.assert_allclose(stats.loc[group.index, EWMA_EXACT_COLUMN], expected[:, -1])
+        np.testing.assert_array_equal(stats.loc[group.index, ROLLING_COLUMNS[:-1]].astype(float), np.rint(expected[:, :-1]))
+
+
+def test_incremental_deltas_continue_from_state():
+    history = make_history()
+    cutoff = history["timestamp"].iloc[len(history) // 2]
+    old_rows, new_rows = history[history["timestamp"] <= cutoff], history[history["timestamp"] > cutoff]
+
+    state = build_price_state(calculate_price_deltas_numeric(old_rows.copy(), CONFIG), rolling_config=CONFIG)
+    assert rolling_state_matches(state, CONFIG)
+    assert not rolling_state_matches(state, (5, 30.0, 0.3, 50.0))
+
+    tracked_new, state = calculate_price_deltas_incremental(new_rows, state, CONFIG)
+
+    full = calculate_price_deltas_numeric(history.copy(), CONFIG)
+    expected = full[full["timestamp"] > cutoff]
+
+    pd.testing.assert_frame_equal(
+        tracked_new[ROLLING_COLUMNS].reset_index(drop=True), expected[ROLLING_COLUMNS].reset_index(drop=True)
+    )
@@ -0,0 +1,124 @@
+###############################################################################
+##  `test_schedule_utils.py`                                                 ##
+##                                                                           ##
+##  Purpose: Tests adaptive scrape scheduling from price history             ##
+###############################################################################
+
+
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+
+import src.utils.schedule_utils as schedule_utils
+from src.utils.schedule_utils import (
+    compute_check_interval, summarize_price_history, record_page_fingerprint, 
+    save_page_fingerprints, merge_page_fingerprints, update_scrape_schedule, select_due_items
+)
+from src.utils.state_utils import read_state, write_state
+
+
+NOW = datetime(2025, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def schedule_files(tmp_path, monkeypatch):
+    files = {
+        "PRICE_SCRAPER_LOG_FILE": str(tmp_path / "price_scraper_log.csv"),
+        "SCRAPE_SCHEDULE_FILE": str(tmp_path / "state" / "scrape_schedule.json"),
+        "PAGE_FINGERPRINTS_FILE": str(tmp_path / "state" / "page_fingerprints.json"),
+    }
+    for attr, path in files.items():
+        monkeypatch.setattr(schedule_utils, attr, path)
+    monkeypatch.setattr(schedule_utils, "_page_fingerprints", None)
+    return files
+
+
+def write_history(log_file, prices_by_name, step_hours=24):
+    rows = []
+    for name, prices in prices_by_name.items():
+        start = NOW - timedelta(hours=step_hours * len(prices))
+        for i, price in enumerate(prices):
+            timestamp = (start + timedelta(hours=step_hours * i)).strftime("%Y-%m-%d %H:%M:%S")
+            rows.append({"timestamp": timestamp, "name": name, "price": f"${price:.2f}"})
+    pd.DataFrame(rows).to_csv(log_file, index=False)
+
+
+def summary_for(prices, step_hours=24):
+    timestamps = pd.Series([NOW - timedelta(hours=step_hours * (len(prices) - i)) for i in range(len(prices))])
+    return summarize_price_history(timestamps, pd.Series(prices, dtype=float), NOW)
+
+
+def test_volatile_items_get_checked_more_often():
+    stable = summary_for([3.00] * 30)
+    weekly = summary_for(([3.00] * 7 + [3.50] * 7) * 2)
+    daily = summary_for([3.00, 3.50, 2.75, 3.25, 2.50, 3.75] * 5)
+
+    intervals = [compute_check_interval(s, 6, 168) for s in (stable, weekly, daily)]
+    assert intervals[0] > intervals[1] > intervals[2]
+    assert intervals[0] == 168 and intervals[2] == 6
+
+    # Not enough history yet, so check soon
+    assert compute_check_interval(summary_for([3.00]), 6, 168) == 6
+
+
+def test_unchanged_page_backs_off(schedule_files):
+    results = [{"name": "Apples", "price": "$1.00"}]
+    assert not record_page_fingerprint("Apples", results)
+    assert record_page_fingerprint("Apples", results)
+    assert not record_page_fingerprint("Apples", [{"name": "Apples", "price": "$1.10"}])
+    assert record_page_fingerprint("Apples", [{"name": "Apples", "price": "$1.10"}])
+    save_page_fingerprints()
+
+    summary = summary_for(([3.00] * 7 + [3.50] * 7) * 2)
+    assert compute_check_interval(summary, 6, 168, unchanged_checks=1) == 2 * compute_check_interval(summary, 6, 168)
+
+
+def test_parent_merges_each_workers_changes(schedule_files):
+    fingerprints_file = schedule_files["PAGE_FINGERPRINTS_FILE"]
+    saved = {"Apples": {"fingerprint": "a", "unchanged": 0}, "Bread": {"fingerprint": "b", "unchanged": 0}}
+    write_state(fingerprints_file, saved)
+
+    # Each worker holds a full copy but only changed its own items
+    merge_page_fingerprints({**saved, "Apples": {"fingerprint": "a", "unchanged": 1}})
+    merge_page_fingerprints({**saved, "Bread": {"fingerprint": "b2", "unchanged": 0}})
+    merge_page_fingerprints(None)
+    save_page_fingerprints()
+
+    assert read_state(fingerprints_file) == {
+        "Apples": {"fingerprint": "a", "unchanged": 1}, "Bread": {"fingerprint": "b2", "unchanged": 0}
+    }
+
+
+def test_schedule_skips_items_not_due(schedule_files):
+    write_history(schedule_files["PRICE_SCRAPER_LOG_FILE"], {
+        "Stable": [2.00] * 20,
+        "Volatile": [2.00, 2.50, 1.75, 2.25] * 5,
+    })
+    latest = NOW - timedelta(hours=24)
+    update_scrape_schedule([
+        {"timestamp": latest, "name": "Stable", "price": "$2.00"},
+        {"timestamp": latest, "name": "Volatile", "price": "$2.25"},
+        None,
+    ], 6, 168, now=NOW)
+
+    items = [{"name": "Stable"}, {"name": "Volatile"}, {"name": "New"}]
+    assert select_due_items(items, now=NOW + timedelta(hours=1)) == [{"name": "New"}]
+    assert select_due_items(items, now=NOW + timedelta(hours=7)) == [{"name": "Volatile"}, {"name": "New"}]
+    assert select_due_items(items, now=NOW + timedelta(days=8)) == items
+
+
+def test_schedule_stats_update_from_new_points_only(schedule_files, monkeypatch):
+    prices = [2.00, 2.50, 1.75, 2.25, 2.25, 3.00]
+    write_history(schedule_files["PRICE_SCRAPER_LOG_FILE"], {"Apples": prices[:3]})
+    timestamps = [NOW - timedelta(hours=24 * (3 - i)) for i in range(len(prices))]
+
+    # 1st run seeds stats from log (which already has that run's point)
+    update_scrape_schedule([{"timestamp": timestamps[2], "name": "Apples", "price": "$1.75"}], 6, 168, now=NOW)
+
+    # Later runs never touch log
+    monkeypatch.setattr(schedule_utils, "read_purchases_prices_csv", lambda *args, **kwargs: pytest.fail("log read"))
+    for timestamp, price in zip(timestamps[3:], prices[3:]):
+        schedule = update_scrape_schedule([{"timestamp": timestamp, "name": "Apples", "price": price}], 6, 168, now=NOW)
+
+    expected = summarize_price_history(pd.Series(timestamps), pd.Series(prices) * 100, NOW)
+    assert schedule_utils.summarize_price_stats(schedule["Apples"]["stats"], NOW) == pytest.approx(expected)
@@ -0,0 +1,122 @@
+###############################################################################
+##  `test_scraper.py`                                                        ##
+##                                                                           ##
+##  Purpose: Tests scraping / scraped price tracking pipelines               ##
+###############################################################################
+
+
+import pytest
+import pandas as pd
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import src.scraper as scraper
+import src.utils.snapshot_utils as snapshot_utils
+from src.config import reload_settings
+
+
+@pytest.fixture
+def scraper_files(tmp_path, monkeypatch):
+    files = {
+        "PRICE_SCRAPER_FILE": str(tmp_path / "price_scraper.csv"),
+        "PRICE_SCRAPER_LOG_FILE": str(tmp_path / "price_scraper_log.csv"),
+        "PRICE_SCRAPER_STATE_FILE": str(tmp_path / "state" / "price_scraper_state.json"),
+    }
+    for attr, path in files.items():
+        monkeypatch.setattr(scraper, attr, path)
+
+    # Keep snapshot store inside tmp dir too
+    snapshot_dir = tmp_path / "scraped"
+    monkeypatch.setattr(snapshot_utils, "SNAPSHOT_DIR", str(snapshot_dir))
+    monkeypatch.setattr(snapshot_utils, "MANIFEST_FILE", str(snapshot_dir / "manifest.json"))
+    monkeypatch.setattr(snapshot_utils, "LEGACY_SNAPSHOT_DIR", str(snapshot_dir / "legacy"))
+    return files
+
+
+def scraped_row(timestamp, name, price):
+    return {"timestamp": timestamp, "name": name, "matching_name": name, "price": price}
+
+
+def test_track_scraped_appends_to_log(scraper_files, monkeypatch):
+    monkeypatch.setenv("DISPLAY_REBUILD_HOURS", "-1")
+    reload_settings()
+
+    scraper.track_scraped([scraped_row("2025-02-05 10:00:00", "Apples", "$1.00"), None])
+    scraper.track_scraped([scraped_row("2025-02-06 10:00:00", "Apples", "$2.00")])
+
+    log = pd.read_csv(scraper_files["PRICE_SCRAPER_LOG_FILE"])
+    # Log keeps int cents, display file gets formatted
+    assert log["price"].tolist() == [100, 200]
+    assert log["prev_price"].tolist()[1] == 100
+    assert log["avg_price"].tolist()[1] == 150
+
+    # Display file only built on request when rebuild interval is negative
+    with pytest.raises(FileNotFoundError):
+        pd.read_csv(scraper_files["PRICE_SCRAPER_FILE"])
+
+    scraper.build_price_scraper_display(force=True)
+    display = pd.read_csv(scraper_files["PRICE_SCRAPER_FILE"])
+    assert display["timestamp"].tolist() == ["2025-02-06 10:00:00", "2025-02-05 10:00:00"]
+    assert display["price"].tolist() == ["$2.00", "$1.00"]
+
+
+def test_track_scraped_seeds_log_from_display(scraper_files, monkeypatch):
+    monkeypatch.setenv("DISPLAY_REBUILD_HOURS", "0")
+    reload_settings()
+
+    pd.DataFrame([
+        {**scraped_row("2025-02-06 10:00:00", "Apples", "$2.00"), "prev_price": "$1.00", "price_change": "$1.00", 
+         "percent_change": "100.00%", "avg_price": "$1.50", "diff_from_avg": "$0.50"},
+        {**scraped_row("2025-02-05 10:00:00", "Apples", "$1.00"), "prev_price": "N/A", "price_change": "N/A", 
+         "percent_change": "N/A", "avg_price": "$1.00", "diff_from_avg": "$0.00"},
+    ]).to_csv(scraper_files["PRICE_SCRAPER_FILE"], index=False)
+
+    scraper.track_scraped([scraped_row("2025-02-07 10:00:00", "Apples", "$3.00")])
+
+    display = pd.read_csv(scraper_files["PRICE_SCRAPER_FILE"])
+    assert display["price"].tolist() == ["$3.00", "$2.00", "$1.00"]
+    assert display["avg_price"].tolist()[0] == "$2.00"
+
+
+def test_scrape_items_parallel_keeps_row_order(monkeypatch):
+    calls = []
+
+    def fake_scrape_items(rows, port, save_state=True):
+        assert not save_state
+        calls.append((port, [row["name"] for row in rows]))
+        return [{"name": row["name"], "port": port} for row in rows]
+
+    merged, saved = [], []
+    monkeypatch.setattr(scraper, "scrape_items", fake_scrape_items)
+    monkeypatch.setattr(scraper, "merge_scrape_state", merged.append)
+    monkeypatch.setattr(scraper, "save_scrape_state", lambda: saved.append(True))
+    items_list = [{"name": f"Item {i}", "url": f"https://x/{i}"} for i in range(7)]
+
+    latest_batch = scraper.scrape_items_parallel(items_list, [9222, 9223, 9224])
+
+    assert [item["name"] for item in latest_batch] == [row["name"] for row in items_list]
+    assert calls[1] == (9223, ["Item 1", "Item 4"])
+
+    # Workers' scrape state merged, then saved once (by parent only)
+    assert len(merged) == 3 and saved == [True]
+
+
+@pytest.mark.parametrize("host_rate, expected_pauses", [("0.5", 0), ("0", 2)])
+def test_pacer_replaces_fixed_browser_sleeps(monkeypatch, host_rate, expected_pauses):
+    monkeypatch.setenv("SCRAPE_HOST_RATE", host_rate)
+    reload_settings()
+
+    pauses = []
+    monkeypatch.setattr(scraper, "load_IP_vars", lambda: ("127.0.0.1", "9222", "https://shop.example.com"))
+    monkeypatch.setattr(scraper, "clear_cache_and_hard_reload", lambda driver: None)
+    monkeypatch.setattr(scraper, "ActionBuilder", MagicMock())
+    monkeypatch.setattr(scraper, "pause", lambda low, high: pauses.append((low, high)))
+    monkeypatch.setattr(scraper.random, "random", lambda: 1.0)
+
+    class FakePool:
+        @contextmanager
+        def session(self):
+            yield MagicMock(page_source="<html></html>")
+
+    assert scraper.get_page_source("https://shop.example.com/item", FakePool()) == "<html></html>"
+    assert len(pauses) == expected_pauses
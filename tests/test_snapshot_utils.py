@@ -0,0 +1,136 @@
+###############################################################################
+##  `test_snapshot_utils.py`                                                 ##
+##                                                                           ##
+##  Purpose: Tests day-partitioned scraped snapshots (manifest, compaction,  ##
+##           range pruning, legacy migration)                                ##
+###############################################################################
+
+
+import os
+import pytest
+import pandas as pd
+from datetime import datetime, date
+
+import src.utils.snapshot_utils as snapshot_utils
+from src.utils.snapshot_utils import (
+    write_snapshot, compact_snapshots, read_snapshots, read_manifest, migrate_legacy_snapshots, COMPACTED_FILE
+)
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    folder = tmp_path / "scraped"
+    monkeypatch.setattr(snapshot_utils, "SNAPSHOT_DIR", str(folder))
+    monkeypatch.setattr(snapshot_utils, "MANIFEST_FILE", str(folder / "manifest.json"))
+    monkeypatch.setattr(snapshot_utils, "LEGACY_SNAPSHOT_DIR", str(folder / "legacy"))
+    return folder
+
+
+def make_rows(points):
+    return pd.DataFrame(
+        [{"timestamp": ts, "name": name, "matching_name": name, "price": price} for ts, name, price in points]
+    )
+
+
+def partition_files(snapshot_dir, partition_key):
+    return sorted(os.listdir(snapshot_dir / partition_key))
+
+
+def test_runs_add_parts_and_manifest(snapshot_dir):
+    write_snapshot(make_rows([
+        ("2025-03-09 23:00:00", "Apples", "$1.00"),
+        ("2025-03-10 08:00:00", "Apples", "$1.10"),
+    ]), run_time=datetime(2025, 3, 10, 8))
+    write_snapshot(make_rows([("2025-03-10 09:00:00", "Bread", "$2.50")]), run_time=datetime(2025, 3, 10, 9))
+
+    partitions = read_manifest()["partitions"]
+    assert list(partitions) == ["year=2025/month=03/day=09", "year=2025/month=03/day=10"]
+
+    # Day already over by run time --> written compacted right away
+    assert partition_files(snapshot_dir, "year=2025/month=03/day=09") == [COMPACTED_FILE]
+
+    day = partitions["year=2025/month=03/day=10"]
+    assert day["rows"] == 2
+    assert day["names"] == ["Apples", "Bread"]
+    assert (day["min_timestamp"], day["max_timestamp"]) == ("2025-03-10 08:00:00", "2025-03-10 09:00:00")
+
+    # Same day, 2nd run --> its own part (1st run's file left alone)
+    assert partition_files(snapshot_dir, "year=2025/month=03/day=10") == [
+        "part-20250310T080000-0.csv", "part-20250310T090000-1.csv"
+    ]
+
+
+def test_compaction_only_closed_days(snapshot_dir):
+    write_snapshot(make_rows([("2025-03-09 10:00:00", "Bread", 250), ("2025-03-10 10:00:00", "Bread", 260)]))
+    write_snapshot(make_rows([("2025-03-09 12:00:00", "Apples", 100)]))
+
+    assert compact_snapshots(before=date(2025, 3, 10)) == ["year=2025/month=03/day=09"]
+    assert partition_files(snapshot_dir, "year=2025/month=03/day=09") == [COMPACTED_FILE]
+    assert len(partition_files(snapshot_dir, "year=2025/month=03/day=10")) == 1
+
+    # Nothing left to do for already compacted days
+    assert compact_snapshots(before=date(2025, 3, 10)) == []
+
+    items = read_snapshots(end="2025-03-09 23:59:59")
+    assert items["name"].tolist() == ["Bread", "Apples"]
+    assert items["price"].tolist() == [250, 100]
+
+
+def test_reads_prune_partitions(snapshot_dir, monkeypatch):
+    for day in range(1, 6):
+        write_snapshot(make_rows([(f"2025-03-0{day} 10:00:00", "Apples", day * 100)]))
+    write_snapshot(make_rows([("2025-03-03 11:00:00", "Bread", 999)]))
+
+    opened = []
+    read_partition = snapshot_utils.read_partition
+    monkeypatch.setattr(
+        snapshot_utils, "read_partition", lambda key, entry: opened.append(key) or read_partition(key, entry)
+    )
+
+    items = read_snapshots(start="2025-03-02 12:00:00", end="2025-03-04")
+    assert opened == ["year=2025/month=03/day=03"]
+    assert items["price"].tolist() == [300, 999]
+
+    opened.clear()
+    items = read_snapshots(names=["Bread"])
+    assert opened == ["year=2025/month=03/day=03"]
+    assert items["name"].tolist() == ["Bread"]
+
+    assert read_snapshots(start="2025-04-01").empty
+
+
+def test_migrates_legacy_dated_files(snapshot_dir):
+    os.makedirs(snapshot_dir)
+    # Pre-cents file (display strs) & a later one (int cents)
+    make_rows([("2025-02-05 10:00:00", "Apples", "$1.00")]).to_csv(snapshot_dir / "scraper_02-05-2025.csv", index=False)
+    make_rows([("2025-02-06 10:00:00", "Apples", 120), ("2025-02-06 10:00:00", "Bread", None)]).to_csv(
+        snapshot_dir / "scraper_02-06-2025.csv", index=False
+    )
+
+    assert migrate_legacy_snapshots() == 2
+    assert migrate_legacy_snapshots() == 0
+
+    assert sorted(os.listdir(snapshot_dir / "legacy")) == ["scraper_02-05-2025.csv", "scraper_02-06-2025.csv"]
+    assert partition_files(snapshot_dir, "year=2025/month=02/day=05") == [COMPACTED_FILE]
+
+    items = read_snapshots()
+    assert items["price"].tolist()[:2] == [100, 120]
+    assert pd.isna(items["price"].iloc[2])
+
+
+def test_migration_skips_files_already_imported(snapshot_dir, monkeypatch):
+    os.makedirs(snapshot_dir)
+    make_rows([("2025-02-05 10:00:00", "Apples", 100)]).to_csv(snapshot_dir / "scraper_02-05-2025.csv", index=False)
+
+    def crash(*args):
+        raise OSError("crash")
+
+    # Crash after rows were written, but before file got moved aside
+    with monkeypatch.context() as patched:
+        patched.setattr(snapshot_utils.shutil, "move", crash)
+        with pytest.raises(OSError):
+            migrate_legacy_snapshots()
+
+    assert migrate_legacy_snapshots() == 1
+    assert read_manifest()["migrated"] == ["scraper_02-05-2025.csv"]
+    assert read_snapshots()["price"].tolist() == [100]
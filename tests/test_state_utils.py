@@ -0,0 +1,30 @@
+###############################################################################
+##  `test_state_utils.py`                                                    ##
+##                                                                           ##
+##  Purpose: Tests JSON state sidecars (atomic, concurrent-safe writes)      ##
+###############################################################################
+
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.state_utils import read_state, write_state
+
+
+def test_concurrent_writes_never_clash(tmp_path):
+    state_file = str(tmp_path / "state" / "shared.json")
+    states = [{"writer": i, "values": list(range(2000))} for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda state: [write_state(state_file, state) for _ in range(20)], states))
+
+    # Whole state from one of the writers, & no temp files left behind
+    assert read_state(state_file) in states
+    assert os.listdir(tmp_path / "state") == ["shared.json"]
+
+
+def test_corrupt_state_treated_as_missing(tmp_path):
+    state_file = tmp_path / "state.json"
+    state_file.write_text('{"half": ')
+
+    assert read_state(str(state_file), default={"fresh": True}) == {"fresh": True}
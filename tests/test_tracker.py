@@ -0,0 +1,110 @@
+###############################################################################
+##  `test_tracker.py`                                                        ##
+##                                                                           ##
+##  Purpose: Tests price tracking / delta calculations                       ##
+###############################################################################
+
+
+import pytest
+import pandas as pd
+
+import src.tracker as tracker
+from src.config import reload_settings
+from src.tracker import (
+    calculate_price_deltas, calculate_price_deltas_numeric, 
+    calculate_price_deltas_incremental, build_price_state
+)
+
+
+@pytest.fixture
+def price_history():
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime([
+            "2025-01-01 10:00:00", "2025-01-05 10:00:00", "2025-02-01 10:00:00",
+            "2025-01-02 10:00:00", "2025-01-09 10:00:00", "2025-03-01 10:00:00",
+        ]),
+        "name": ["Apples", "Apples", "Apples", "Bread", "Bread", "Bread"],
+        "quantity": [1, 2, 1, 1, 1, 3],
+        "price": ["$1.99", "$2.49", "$1,001.25", "$3.00", "$2.50", "$3.25"],
+    })
+
+
+def test_calculate_price_deltas(price_history):
+    tracked = calculate_price_deltas(price_history.copy())
+    apples = tracked[tracked["name"] == "Apples"]
+
+    assert apples["price"].tolist() == ["$1.99", "$2.49", "$1,001.25"]
+    assert apples["prev_price"].tolist() == ["N/A", "$1.99", "$2.49"]
+    assert apples["percent_change"].iloc[1] == "25.13%"
+
+
+def test_incremental_matches_full_recompute(price_history):
+    old_rows = price_history[price_history["timestamp"] < "2025-01-20"]
+    new_rows = price_history[price_history["timestamp"] >= "2025-01-20"]
+
+    state = build_price_state(calculate_price_deltas_numeric(old_rows.copy()))
+    tracked_new, state = calculate_price_deltas_incremental(new_rows, state)
+
+    full = calculate_price_deltas_numeric(price_history.copy())
+    expected = full[full["timestamp"] >= "2025-01-20"].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(tracked_new.reset_index(drop=True), expected)
+    assert state["Apples"]["count"] == 3
+    assert state["Bread"]["last_price"] == 325
+
+
+def test_incremental_new_product_has_no_prev_price():
+    new_rows = pd.DataFrame({
+        "timestamp": ["2025-04-01 09:00:00"], "name": ["Milk"], "price": ["$4.00"]
+    })
+
+    tracked_new, state = calculate_price_deltas_incremental(new_rows, {})
+
+    assert tracked_new["prev_price"].isna().all()
+    assert tracked_new["avg_price"].tolist() == [400]
+    assert state["Milk"] == {
+        "count": 1, "sum": 400, "last_price": 400, "last_timestamp": "2025-04-01 09:00:00",
+        "rolling": {"config": [5, 30.0, 0.3, 50.0], "points": [[1743498000, 400]], "ewma": 400.0},
+    }
+
+
+@pytest.fixture
+def tracker_files(tmp_path, monkeypatch):
+    files = {
+        "PURCHASES_FILE": str(tmp_path / "purchases.csv"),
+        "PRICE_TRACKER_FILE": str(tmp_path / "price_tracker.csv"),
+        "PRICE_TRACKER_DATA_FILE": str(tmp_path / "price_tracker_data.csv"),
+        "PRICE_TRACKER_STATE_FILE": str(tmp_path / "state" / "price_tracker_state.json"),
+    }
+    for attr, path in files.items():
+        monkeypatch.setattr(tracker, attr, path)
+    monkeypatch.setattr(tracker, "refresh_price_index", lambda *args, **kwargs: None)
+    monkeypatch.setattr(tracker, "check_alerts", lambda *args, **kwargs: None)
+    return files
+
+
+def test_track_prices_appends_incremental_rows(tracker_files, price_history, monkeypatch):
+    monkeypatch.setenv("DISPLAY_REBUILD_HOURS", "-1")
+    reload_settings()
+    files = tracker_files
+
+    price_history.iloc[:4].to_csv(files["PURCHASES_FILE"], index=False)
+    tracker.track_prices([{"name": "Apples"}, {"name": "Bread"}])
+
+    # Incremental run --> only new rows appended (never a rewrite)
+    price_history.to_csv(files["PURCHASES_FILE"], index=False)
+    monkeypatch.setattr(tracker, "merge_into_price_tracker_scraper_csv", lambda *args, **kwargs: pytest.fail("rewrote"))
+    tracker.track_prices([{"name": "Bread"}])
+
+    data = pd.read_csv(files["PRICE_TRACKER_DATA_FILE"])
+    assert len(data) == 6
+    assert data["timestamp"].tolist()[-2:] == ["2025-01-09 10:00:00", "2025-03-01 10:00:00"]
+
+    # Display file only built on request when rebuild interval is negative
+    with pytest.raises(FileNotFoundError):
+        pd.read_csv(files["PRICE_TRACKER_FILE"])
+
+    tracker.build_price_tracker_display(force=True)
+    display = pd.read_csv(files["PRICE_TRACKER_FILE"])
+    assert display["name"].tolist() == ["Apples"] * 3 + ["Bread"] * 3
+    assert display["timestamp"].tolist()[3] == "2025-03-01 10:00:00"
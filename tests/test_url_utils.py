@@ -0,0 +1,125 @@
+###############################################################################
+##  `test_url_utils.py`                                                      ##
+##                                                                           ##
+##  Purpose: Tests URL shortening cache (w/ local stand-in shortener)        ##
+###############################################################################
+
+
+import json
+import threading
+import pytest
+from functools import partial
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config import shorten_url
+import src.utils.url_utils as url_utils
+from src.utils.url_utils import shorten_urls, save_url_caches, _url_caches
+
+
+class FakeShortenerHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        long_url = parse_qs(urlparse(self.path).query)["url"][0]
+        self.server.requested.append(long_url)
+
+        body = f"https://tiny.example/{len(self.server.requested)}".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shortener():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeShortenerHandler)
+    server.requested = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    api_url = f"http://127.0.0.1:{server.server_port}/api-create.php"
+    yield server, partial(shorten_url, api_url=api_url)
+
+    server.shutdown()
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    cache_file = str(tmp_path / "short_urls.json")
+    yield cache_file
+    _url_caches.pop(cache_file, None)
+
+
+def test_shorten_urls_caches_on_disk(shortener, cache_file):
+    server, shorten = shortener
+    urls = ["https://shop.example.com/a?x=1&y=2", "https://shop.example.com/b", "https://shop.example.com/a?x=1&y=2"]
+
+    short_urls = shorten_urls(urls, cache_file, shorten, max_entries=10, workers=4)
+    assert sorted(server.requested) == sorted(set(urls))
+    assert set(short_urls) == set(urls)
+
+    # Fresh process (memory cleared) still reads from disk, w/o any requests
+    save_url_caches()
+    _url_caches.clear()
+    assert shorten_urls(urls, cache_file, shorten, max_entries=10) == short_urls
+    assert len(server.requested) == 2
+
+    save_url_caches()
+    with open(cache_file) as file:
+        assert set(json.load(file)) == set(urls)
+
+
+def test_shorten_urls_evicts_least_recently_used(shortener, cache_file):
+    _, shorten = shortener
+
+    shorten_urls(["https://a.example"], cache_file, shorten, max_entries=2)
+    shorten_urls(["https://b.example"], cache_file, shorten, max_entries=2)
+    shorten_urls(["https://a.example"], cache_file, shorten, max_entries=2)
+    shorten_urls(["https://c.example"], cache_file, shorten, max_entries=2)
+
+    assert set(_url_caches[cache_file]) == {"https://a.example", "https://c.example"}
+
+
+def test_cache_hits_keep_recency_across_runs(shortener, cache_file):
+    _, shorten = shortener
+
+    shorten_urls(["https://a.example"], cache_file, shorten, max_entries=2)
+    shorten_urls(["https://b.example"], cache_file, shorten, max_entries=2)
+
+    save_url_caches()
+
+    # Hit-only run, then a fresh process (memory cleared)
+    shorten_urls(["https://a.example"], cache_file, shorten, max_entries=2)
+    save_url_caches()
+    _url_caches.clear()
+    shorten_urls(["https://c.example"], cache_file, shorten, max_entries=2)
+    save_url_caches()
+
+    with open(cache_file) as file:
+        assert set(json.load(file)) == {"https://a.example", "https://c.example"}
+
+
+def test_cache_saved_once_per_run(shortener, cache_file, monkeypatch):
+    _, shorten = shortener
+    writes = []
+    monkeypatch.setattr(url_utils, "write_state", lambda file, state: writes.append(file))
+
+    for url in ["https://a.example", "https://b.example", "https://a.example"]:
+        shorten_urls([url], cache_file, shorten)
+    assert writes == []
+
+    save_url_caches()
+    save_url_caches()
+    assert writes == [cache_file]
+
+
+def test_shorten_urls_ttl_expires(shortener, cache_file):
+    server, shorten = shortener
+
+    shorten_urls(["https://a.example"], cache_file, shorten, ttl_days=1)
+    _url_caches[cache_file]["https://a.example"]["created"] -= 2 * 86400
+
+    shorten_urls(["https://a.example"], cache_file, shorten, ttl_days=1)
+    assert server.requested == ["https://a.example", "https://a.example"]